@@ -0,0 +1,5 @@
+"""
+Набор бенчмарков горячих путей системы медкарт
+
+Запуск: python benchmarks/run.py [--only crypto,formatting,api,backup]
+"""
@@ -0,0 +1,86 @@
+"""
+Бенчмарк Flask endpoints через test client на локальной PostgreSQL
+"""
+from benchmarks.common import result, measure_ops
+
+# Эндпоинты, которые не имеет смысла замерять (отладка, статика)
+SKIP_ENDPOINTS = {'static'}
+
+
+def _sample_ids(db) -> dict:
+    """Первые существующие ID для параметризованных маршрутов"""
+    ids = {}
+    queries = {
+        'patient_id': "SELECT MIN(id) as id FROM patients",
+        'doctor_id': "SELECT MIN(id) as id FROM doctors",
+        'record_id': "SELECT MIN(id) as id FROM medical_records",
+    }
+    with db.get_cursor() as cursor:
+        for name, query in queries.items():
+            cursor.execute(query)
+            row = cursor.fetchone()
+            ids[name] = row['id'] if row else None
+    return ids
+
+
+def seed_database(db) -> None:
+    """Загрузка базовых тестовых данных, если БД пустая"""
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) as count FROM patients")
+        if cursor.fetchone()['count'] > 0:
+            return
+    
+    from src.database.load_test_data import load_test_data
+    load_test_data()
+
+
+def get_benchmark_urls(app, ids: dict) -> dict:
+    """Список GET-URL для всех маршрутов приложения"""
+    urls = {}
+    
+    for rule in app.url_map.iter_rules():
+        if 'GET' not in rule.methods or rule.endpoint in SKIP_ENDPOINTS:
+            continue
+        
+        values = {}
+        for argument in rule.arguments:
+            if ids.get(argument) is None:
+                break
+            values[argument] = ids[argument]
+        else:
+            urls[rule.endpoint] = rule.build(values)[1]
+    
+    # Поиск без параметров возвращает ошибку короткого запроса
+    if 'search' in urls:
+        urls['search'] = '/api/search?q=Ив'
+        urls['search_doctors'] = '/api/search?type=doctors'
+    
+    return urls
+
+
+def run(iterations: int = 50, seed: bool = False) -> dict:
+    """Запросов в секунду для каждого GET-эндпоинта"""
+    from src.database.connection import db
+    from src.api.russian_routes import app
+    
+    if not db.test_connection():
+        print("⚠️ База данных недоступна, API бенчмарк пропущен")
+        return {}
+    
+    if seed:
+        seed_database(db)
+    
+    client = app.test_client()
+    urls = get_benchmark_urls(app, _sample_ids(db))
+    results = {}
+    
+    for endpoint, url in sorted(urls.items()):
+        response = client.get(url)
+        if response.status_code >= 500:
+            print(f"⚠️ {url}: HTTP {response.status_code}, пропущен")
+            continue
+        
+        requests_per_sec = measure_ops(lambda: client.get(url), iterations, warmup=2)
+        results[f'api.{endpoint}'] = result(requests_per_sec, 'req/sec', url=url)
+    
+    return results
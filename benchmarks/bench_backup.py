@@ -0,0 +1,35 @@
+"""
+Бенчмарк пропускной способности python_backup (MB/s)
+"""
+import os
+import time
+
+from benchmarks.common import result
+
+
+def run() -> dict:
+    """Один прогон python_backup с удалением созданного файла"""
+    from src.database.connection import db
+    from scripts.python_backup import python_backup
+    
+    if not db.test_connection():
+        print("⚠️ База данных недоступна, backup бенчмарк пропущен")
+        return {}
+    
+    start_time = time.perf_counter()
+    stats = python_backup()
+    elapsed = time.perf_counter() - start_time
+    
+    if not stats:
+        return {}
+    
+    try:
+        os.remove(stats['file'])
+    except OSError:
+        pass
+    
+    megabytes = stats['size'] / (1024 * 1024)
+    return {
+        'backup.throughput': result(megabytes / elapsed, 'MB/s',
+                                    size_bytes=stats['size'], records=stats['records']),
+    }
@@ -0,0 +1,28 @@
+"""
+Бенчмарк TDE: шифрование и расшифровка полей разного размера
+"""
+from benchmarks.common import result, measure_ops
+
+FIELD_SIZES = (16, 64, 256, 1024, 4096)
+
+
+def run(iterations: int = 2000) -> dict:
+    """Пропускная способность encrypt_field/decrypt_field по размерам поля"""
+    from src.security.tde import TDEManager
+    
+    tde = TDEManager()
+    results = {}
+    
+    for size in FIELD_SIZES:
+        value = ('Острый бронхит, кашель 38.5°C; ' * (size // 16 + 1))[:size]
+        ciphertext, iv = tde.encrypt_field('medical_records', 'diagnosis', value)
+        
+        encrypt_ops = measure_ops(
+            lambda: tde.encrypt_field('medical_records', 'diagnosis', value), iterations)
+        decrypt_ops = measure_ops(
+            lambda: tde.decrypt_field('medical_records', 'diagnosis', ciphertext, iv), iterations)
+        
+        results[f'tde.encrypt.{size}'] = result(encrypt_ops, 'ops/sec')
+        results[f'tde.decrypt.{size}'] = result(decrypt_ops, 'ops/sec')
+    
+    return results
@@ -0,0 +1,109 @@
+"""
+Бенчмарк форматирования страниц пациентов и приёмов
+
+format_patient_data - словарь на строку; строки RowMapper форматируются
+по строке (format_patient_row) и столбцами (format_patient_rows); страница
+приёмов - по строке (format_appointment) и столбцами (format_appointments).
+"""
+import random
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import result, measure_ops
+
+PAGE_SIZES = (20, 100, 1000)
+
+
+def make_patient_rows(count: int, tde_manager=None, seed: int = 42) -> list:
+    """Синтетические строки patients в том виде, в каком их отдает курсор"""
+    rnd = random.Random(seed)
+    rows = []
+    
+    for i in range(count):
+        phone = f"+7{rnd.randint(9000000000, 9999999999)}"
+        email = f"patient{i}@example.ru"
+        address = f"г. Москва, ул. Тестовая, д. {rnd.randint(1, 200)}, кв. {rnd.randint(1, 300)}"
+        row = {
+            'id': i + 1,
+            'first_name': 'Иван',
+            'last_name': f'Иванов{i}',
+            'middle_name': 'Иванович',
+            'birth_date': date(1950 + rnd.randint(0, 60), rnd.randint(1, 12), rnd.randint(1, 28)),
+            'gender': rnd.choice(['M', 'F']),
+            'phone': None,
+            'email': None,
+            'address': None,
+        }
+        
+        if tde_manager:
+            for field, value in (('phone', phone), ('email', email), ('address', address)):
+                ciphertext, iv = tde_manager.encrypt_field('patients', field, value)
+                row[f'{field}_encrypted'] = ciphertext
+                row[f'{field}_iv'] = iv
+        else:
+            row.update({'phone': phone, 'email': email, 'address': address})
+        
+        rows.append(row)
+    
+    return rows
+
+
+def make_appointment_rows(count: int, seed: int = 42) -> list:
+    """Синтетические строки страницы приёмов: слоты по 30 минут за две недели"""
+    rnd = random.Random(seed)
+    start = datetime(2025, 3, 3, 9, 0)
+    return [{
+        'id': i + 1,
+        'appointment_date': start + timedelta(days=rnd.randint(0, 13), minutes=30 * rnd.randint(0, 17)),
+        'status': rnd.choice(['scheduled', 'completed', 'cancelled']),
+        'patient_name': f'Иван Иванов{i}',
+        'doctor_name': 'Петр Петров',
+    } for i in range(count)]
+
+
+def _patient_row_cursor(rows):
+    from benchmarks.bench_rows import FakeCursor
+    
+    columns = list(rows[0])
+    return FakeCursor(columns, [tuple(row[name] for name in columns) for row in rows])
+
+
+def run(iterations: int = 20) -> dict:
+    """Время форматирования страницы из 20/100/1000 строк"""
+    from src.api import russian_routes
+    
+    results = {}
+    
+    for page_size in PAGE_SIZES:
+        rows = make_patient_rows(page_size, russian_routes.tde_manager)
+        page_iterations = max(1, iterations * 100 // page_size)
+        
+        pages_per_sec = measure_ops(
+            lambda: [russian_routes.format_patient_data(row) for row in rows],
+            page_iterations, warmup=1)
+        
+        results[f'format_patient_data.page_{page_size}'] = result(
+            pages_per_sec * page_size, 'rows/sec', page_size=page_size)
+        
+        # Строки RowMapper форматируются на месте - для каждого прогона новые
+        cursor = _patient_row_cursor(rows)
+        mapped = lambda: russian_routes.patient_rows.fetchall(cursor, russian_routes.tde_manager)
+        patient_pages = {
+            'row_by_row': lambda: [russian_routes.format_patient_row(row) for row in mapped()],
+            'column': lambda: russian_routes.format_patient_rows(mapped()),
+        }
+        for name, format_page in patient_pages.items():
+            pages_per_sec = measure_ops(format_page, page_iterations, warmup=1)
+            results[f'format_patient_rows.{name}.page_{page_size}'] = result(
+                pages_per_sec * page_size, 'rows/sec', page_size=page_size)
+        
+        appointments = make_appointment_rows(page_size)
+        appointment_pages = {
+            'row_by_row': lambda: [russian_routes.format_appointment(row) for row in appointments],
+            'column': lambda: russian_routes.format_appointments(appointments),
+        }
+        for name, format_page in appointment_pages.items():
+            pages_per_sec = measure_ops(format_page, page_iterations, warmup=1)
+            results[f'format_appointments.{name}.page_{page_size}'] = result(
+                pages_per_sec * page_size, 'rows/sec', page_size=page_size)
+    
+    return results
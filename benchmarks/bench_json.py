@@ -0,0 +1,62 @@
+"""
+Бенчмарк кодирования JSON-ответов: Flask по умолчанию, stdlib и orjson
+"""
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.common import result, measure_ops
+from benchmarks.bench_formatting import make_patient_rows
+
+LIST_SIZE = 1000  # LIMIT в /api/patients/list
+
+
+def make_patients_list_payload(count: int = LIST_SIZE) -> dict:
+    """Ответ /api/patients/list из count строк"""
+    patients = [
+        {
+            'id': row['id'],
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'middle_name': row['middle_name'],
+            'phone': row['phone'],
+            'email': row['email'],
+        }
+        for row in make_patient_rows(count)
+    ]
+    return {'patients': patients, 'count': len(patients)}
+
+
+def make_patients_rows_payload(count: int = LIST_SIZE) -> dict:
+    """Те же строки с датами без предварительного форматирования"""
+    return {'patients': make_patient_rows(count), 'count': count}
+
+
+def run(iterations: int = 50) -> dict:
+    """Время кодирования ответа из 1000 пациентов каждым провайдером"""
+    from src.api.json_provider import FastJSONProvider, orjson
+    
+    app = Flask(__name__)
+    providers = {
+        'flask_default': DefaultJSONProvider(app),
+        'stdlib': FastJSONProvider(app, backend='stdlib'),
+    }
+    if orjson is not None:
+        providers['orjson'] = FastJSONProvider(app, backend='orjson')
+    else:
+        print("⚠️ orjson не установлен, замер orjson пропущен")
+    
+    payloads = {
+        'patients_list': make_patients_list_payload(),
+        'patients_rows': make_patients_rows_payload(),
+    }
+    
+    results = {}
+    with app.app_context():
+        for payload_name, payload in payloads.items():
+            for provider_name, provider in providers.items():
+                size = len(provider.response(payload).get_data())
+                ops = measure_ops(lambda: provider.response(payload), iterations, warmup=2)
+                results[f'json.{payload_name}.{provider_name}'] = result(
+                    ops, 'responses/sec', rows=LIST_SIZE, size_bytes=size)
+    
+    return results
@@ -0,0 +1,94 @@
+"""
+Бенчмарк представления строк: словари RealDictCursor и slotted-строки RowMapper
+
+Конвейер /api/patients на 1000 строк без БД: кортежи курсора -> строки
+(словари или RowMapper) -> форматирование -> JSON. Замеряются время CPU
+и память, занятая строками после форматирования (tracemalloc).
+"""
+import time
+import tracemalloc
+
+from benchmarks.common import result, LOWER_IS_BETTER
+from benchmarks.bench_formatting import make_patient_rows
+
+ROWS = 1000
+
+
+class FakeCursor:
+    """Курсор с готовыми кортежами и cursor.description"""
+    
+    def __init__(self, columns, rows):
+        self.description = [(name, None, None, None, None, None, None) for name in columns]
+        self.rows = rows
+    
+    def fetchall(self):
+        return list(self.rows)
+
+
+def _dict_pipeline(cursor, format_patient_data):
+    # RealDictCursor: словарь на строку, затем копия в format_patient_data
+    columns = [column[0] for column in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    return [format_patient_data(row) for row in rows]
+
+
+def _slots_pipeline(cursor, patient_rows, format_patient_row, tde_manager):
+    return [format_patient_row(row) for row in patient_rows.fetchall(cursor, tde_manager)]
+
+
+def _retained_kib(build) -> float:
+    """Память (КиБ), которую занимает результат build()"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        data = build()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del data
+    return retained / 1024
+
+
+def _cpu_ms(func, iterations: int, repeat: int = 7) -> float:
+    """Лучшее время CPU одного прогона (мс)"""
+    func()
+    best = None
+    for _ in range(repeat):
+        start_time = time.process_time()
+        for _ in range(iterations):
+            func()
+        elapsed = (time.process_time() - start_time) / iterations * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(iterations: int = 20) -> dict:
+    """Память и время CPU на 1000 строк пациентов для словарей и RowMapper"""
+    from src.api import russian_routes
+    from src.api.json_provider import encode_json, resolve_backend
+    
+    tde_manager = russian_routes.tde_manager
+    backend = resolve_backend('auto')
+    
+    # Столбцы те же, что в запросе страницы пациентов (при TDE - с шифротекстами)
+    dict_rows = make_patient_rows(ROWS, tde_manager)
+    columns = list(dict_rows[0])
+    tuples = [tuple(row.get(name) for name in columns) for row in dict_rows]
+    cursor = FakeCursor(columns, tuples)
+    
+    pipelines = {
+        'dict': lambda: _dict_pipeline(cursor, russian_routes.format_patient_data),
+        'slots': lambda: _slots_pipeline(cursor, russian_routes.patient_rows,
+                                         russian_routes.format_patient_row, tde_manager),
+    }
+    
+    results = {}
+    for name, pipeline in pipelines.items():
+        extra = {'rows': ROWS, 'tde': tde_manager is not None}
+        results[f'rows.{name}.memory'] = result(_retained_kib(pipeline), 'KiB', LOWER_IS_BETTER, **extra)
+        results[f'rows.{name}.cpu'] = result(_cpu_ms(pipeline, iterations), 'ms', LOWER_IS_BETTER, **extra)
+        results[f'rows.{name}.cpu_with_json'] = result(
+            _cpu_ms(lambda: encode_json({'patients': pipeline()}, backend), iterations),
+            'ms', LOWER_IS_BETTER, json_backend=backend, **extra)
+    
+    return results
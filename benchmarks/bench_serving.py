@@ -0,0 +1,108 @@
+"""
+Бенчмарк режимов запуска: встроенный сервер Flask и gunicorn с воркерами
+
+Сервер запускается отдельным процессом, нагрузка - параллельные клиенты с
+keep-alive на эндпоинт /api (без обращений к БД), поэтому замеряется сам
+сервер, а не PostgreSQL.
+"""
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.common import result, PROJECT_ROOT
+
+BENCH_PATH = '/api'
+STARTUP_TIMEOUT = 30
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(port: int, process: subprocess.Popen) -> bool:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', BENCH_PATH)
+            connection.getresponse().read()
+            connection.close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def _load(port: int, clients: int, duration: float) -> float:
+    """Запросов в секунду от clients параллельных соединений"""
+    counts = [0] * clients
+    deadline = time.monotonic() + duration
+    
+    def worker(index):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        while time.monotonic() < deadline:
+            connection.request('GET', BENCH_PATH)
+            connection.getresponse().read()
+            counts[index] += 1
+        connection.close()
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - start_time)
+
+
+def _measure(command: list, port: int, clients: int, duration: float):
+    process = subprocess.Popen(command, cwd=str(PROJECT_ROOT), env=os.environ.copy(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not _wait_ready(port, process):
+            return None
+        _load(port, clients, 0.5)  # прогрев
+        return _load(port, clients, duration)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def run(clients: int = 16, duration: float = 3.0, workers: int = 4, threads: int = 4) -> dict:
+    """Запросов в секунду для каждого режима запуска"""
+    results = {}
+    
+    port = _free_port()
+    dev_server = [sys.executable, '-c',
+                  f"from src.main import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    requests_per_sec = _measure(dev_server, port, clients, duration)
+    if requests_per_sec is None:
+        print("⚠️ Встроенный сервер не запустился, бенчмарк пропущен")
+        return {}
+    results['serving.flask_dev'] = result(requests_per_sec, 'req/sec', clients=clients)
+    
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        print("⚠️ gunicorn не установлен, замер промышленного режима пропущен")
+        return results
+    
+    port = _free_port()
+    production = [sys.executable, 'src/server.py', '--bind', f'127.0.0.1:{port}',
+                  '--workers', str(workers), '--threads', str(threads), '--no-backup']
+    requests_per_sec = _measure(production, port, clients, duration)
+    if requests_per_sec is None:
+        print("⚠️ gunicorn не запустился, замер пропущен")
+        return results
+    results['serving.gunicorn'] = result(requests_per_sec, 'req/sec', clients=clients,
+                                         workers=workers, threads=threads)
+    
+    return results
@@ -0,0 +1,52 @@
+"""
+Бенчмарк времени запуска: импорт модулей в новом процессе (python -X importtime)
+
+Каждый замер - отдельный интерпретатор, поэтому учитывается полный импорт
+модуля со всеми зависимостями, как у CLI-скриптов, backup и воркеров сервера.
+"""
+import os
+import subprocess
+import sys
+
+from benchmarks.common import result, PROJECT_ROOT, LOWER_IS_BETTER
+
+# Метрика -> модуль
+IMPORT_TARGETS = {
+    'startup.import_connection': 'src.database.connection',
+    'startup.import_api': 'src.api.russian_routes',
+}
+
+
+def parse_importtime(output: str, module: str) -> float:
+    """Суммарное время импорта модуля (мс) из вывода -X importtime"""
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Модуль верхнего уровня - без отступа в дереве импортов
+        if name.rstrip() == f' {module}':
+            return int(cumulative) / 1000
+    raise ValueError(f"Модуль {module} не найден в выводе -X importtime")
+
+
+def import_time_ms(module: str, repeat: int = 3) -> float:
+    """Лучшее время импорта модуля в новом процессе (мс)"""
+    best = None
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                   cwd=str(PROJECT_ROOT), env=os.environ.copy(),
+                                   capture_output=True, text=True, encoding='utf-8')
+        if completed.returncode != 0:
+            raise RuntimeError(f"Импорт {module} завершился с ошибкой: {completed.stderr[-500:]}")
+        
+        elapsed = parse_importtime(completed.stderr, module)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(repeat: int = 5) -> dict:
+    """Время импорта ключевых модулей (мс)"""
+    return {
+        metric: result(import_time_ms(module, repeat), 'ms', LOWER_IS_BETTER, module=module)
+        for metric, module in IMPORT_TARGETS.items()
+    }
@@ -0,0 +1,50 @@
+"""
+Общие утилиты бенчмарков: замер времени и формат результатов
+"""
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any
+
+# Добавляем корень проекта в path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# Направление метрики: чем больше, тем лучше (ops/sec, MB/s)
+HIGHER_IS_BETTER = 'higher'
+LOWER_IS_BETTER = 'lower'
+
+
+def result(value: float, unit: str, direction: str = HIGHER_IS_BETTER, **extra) -> Dict[str, Any]:
+    """Одна метрика бенчмарка в формате JSON-отчета"""
+    data = {'value': round(value, 3), 'unit': unit, 'direction': direction}
+    data.update(extra)
+    return data
+
+
+def measure_ops(func: Callable[[], Any], iterations: int = 1000, warmup: int = 10,
+                repeat: int = 3) -> float:
+    """
+    Замер пропускной способности функции
+    
+    Returns:
+        float: Лучшее значение операций в секунду из repeat прогонов
+    """
+    for _ in range(warmup):
+        func()
+    
+    best = 0.0
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start_time
+        best = max(best, iterations / elapsed if elapsed > 0 else 0.0)
+    
+    return best
+
+
+def env_flag(name: str, default: str = 'False') -> bool:
+    """Чтение булевой переменной окружения"""
+    return os.getenv(name, default).lower() == 'true'
@@ -0,0 +1,149 @@
+"""
+Запуск бенчмарков с сохранением JSON-результатов и сравнением с baseline
+
+Примеры:
+    python benchmarks/run.py                          # все бенчмарки
+    python benchmarks/run.py --only crypto,formatting,json,rows # без БД
+    python benchmarks/run.py --seed                   # залить тестовые данные перед API
+    python benchmarks/run.py --save-baseline          # сохранить результат как baseline
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks import (bench_crypto, bench_formatting, bench_json, bench_rows, bench_api, bench_backup,
+                        bench_serving, bench_startup)
+from benchmarks.common import HIGHER_IS_BETTER
+
+BENCHMARKS_DIR = Path(__file__).parent
+DEFAULT_OUTPUT = BENCHMARKS_DIR / 'results' / 'latest.json'
+DEFAULT_BASELINE = BENCHMARKS_DIR / 'baseline.json'
+DEFAULT_THRESHOLD = 0.10  # 10% ухудшения считается регрессией
+
+SUITES = {
+    'crypto': lambda args: bench_crypto.run(),
+    'formatting': lambda args: bench_formatting.run(),
+    'json': lambda args: bench_json.run(),
+    'rows': lambda args: bench_rows.run(),
+    'api': lambda args: bench_api.run(seed=args.seed),
+    'backup': lambda args: bench_backup.run(),
+    'serving': lambda args: bench_serving.run(),
+    'startup': lambda args: bench_startup.run(),
+}
+
+
+def run_suites(names, args) -> dict:
+    """Выполнение выбранных наборов бенчмарков"""
+    metrics = {}
+
+    for name in names:
+        print(f"\n⏱️ Бенчмарк: {name}")
+        try:
+            suite_results = SUITES[name](args)
+        except Exception as e:
+            print(f"❌ Ошибка бенчмарка {name}: {e}")
+            continue
+
+        for metric, data in suite_results.items():
+            print(f"   {metric}: {data['value']:,.1f} {data['unit']}")
+        metrics.update(suite_results)
+
+    return metrics
+
+
+def compare_with_baseline(metrics: dict, baseline: dict, threshold: float) -> list:
+    """
+    Сравнение с baseline
+
+    Returns:
+        list: Регрессии [(метрика, baseline, текущее, изменение)]
+    """
+    regressions = []
+    baseline_metrics = baseline.get('metrics', {})
+
+    print(f"\n📊 Сравнение с baseline ({baseline.get('created_at', '?')}), порог {threshold:.0%}:")
+
+    for metric, data in sorted(metrics.items()):
+        base = baseline_metrics.get(metric)
+        if not base or not base.get('value'):
+            print(f"   {metric}: нет в baseline")
+            continue
+
+        change = (data['value'] - base['value']) / base['value']
+        if data.get('direction', HIGHER_IS_BETTER) != HIGHER_IS_BETTER:
+            change = -change
+
+        mark = '✅'
+        if change < -threshold:
+            mark = '❌'
+            regressions.append((metric, base['value'], data['value'], change))
+
+        print(f"   {mark} {metric}: {base['value']:,.1f} → {data['value']:,.1f} ({change:+.1%})")
+
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Бенчмарки системы медкарт')
+    parser.add_argument('--only', help=f"Наборы через запятую: {','.join(SUITES)}")
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='Файл JSON-результатов')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Файл baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Допустимое ухудшение (0.10 = 10%%)')
+    parser.add_argument('--save-baseline', action='store_true', help='Сохранить результат как baseline')
+    parser.add_argument('--seed', action='store_true', help='Загрузить тестовые данные перед API бенчмарком')
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(SUITES)
+    unknown = [name for name in names if name not in SUITES]
+    if unknown:
+        parser.error(f"Неизвестные наборы: {', '.join(unknown)}")
+
+    print("🏁 БЕНЧМАРКИ СИСТЕМЫ МЕДКАРТ")
+    print("=" * 50)
+
+    metrics = run_suites(names, args)
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'tde_enabled': os.getenv('TDE_ENABLED', 'False').lower() == 'true',
+        'metrics': metrics,
+    }
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Результаты сохранены: {output_path}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📌 Baseline обновлен: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("ℹ️ Baseline не найден, сравнение пропущено (используйте --save-baseline)")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = compare_with_baseline(metrics, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ Обнаружено регрессий: {len(regressions)}")
+        return 1
+
+    print("\n✅ Регрессий не обнаружено")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,7 @@
 """
 Главный файл для запуска системы с встроенным автоматическим backup
 """
+import argparse
 import os
 import sys
 import threading
@@ -10,9 +11,11 @@ from pathlib import Path
 # Добавляем корневую папку в path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.main import app
+from src.config import config, load_env
+
+load_env()
+
 from src.database.connection import db
-from src.config import config
 
 # Устанавливаем schedule если его нет
 try:
@@ -47,7 +50,7 @@ def create_backup():
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Python backup завершен успешно")
         else:
             print(f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Ошибка backup: {result.stderr}")
-            
+    
     except subprocess.TimeoutExpired:
         print(f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Timeout Python backup (60с)")
     except Exception as e:
@@ -141,29 +144,65 @@ def check_system():
     print("✅ Система готова к работе!")
     return True
 
+def run_backup_only():
+    """Только планировщик backup (отдельный процесс при промышленном запуске)"""
+    try:
+        backup_scheduler()
+    except KeyboardInterrupt:
+        print("\n👋 Планировщик backup остановлен")
+
 def main():
     """Главная функция с встроенным автоматическим backup"""
+    parser = argparse.ArgumentParser(description='Запуск системы электронных медкарт')
+    parser.add_argument('--production', action='store_true',
+                        help='Промышленный сервер (gunicorn, несколько воркеров)')
+    parser.add_argument('--workers', type=int, default=None, help='Число процессов-воркеров')
+    parser.add_argument('--threads', type=int, default=None, help='Потоков в каждом воркере')
+    parser.add_argument('--bind', default=f"{config.API_HOST}:{config.API_PORT}",
+                        help='Адрес и порт (host:port)')
+    parser.add_argument('--no-backup', action='store_true', help='Без планировщика backup')
+    parser.add_argument('--backup-only', action='store_true', help='Только планировщик backup')
+    args = parser.parse_args()
+    
+    if args.backup_only:
+        run_backup_only()
+        return
+    
     print("🏥 СИСТЕМА ЭЛЕКТРОННЫХ МЕДКАРТ")
     print("=" * 50)
     
     if not check_system():
+        if args.production:
+            sys.exit(1)
         input("\nНажмите Enter для выхода...")
         return
     
+    if args.production:
+        # Планировщик backup - отдельный процесс, воркеры его не запускают
+        from src.server import serve, DEFAULT_WORKERS
+        sys.exit(serve(args.bind,
+                       workers=args.workers or config.API_WORKERS or DEFAULT_WORKERS,
+                       threads=args.threads or config.API_THREADS,
+                       backup=not args.no_backup))
+    
+    from src.main import app
+    
     # Запускаем автоматический backup в фоне
-    print("\n🕐 Запуск автоматического планировщика backup...")
-    backup_thread = start_backup_scheduler()
+    if not args.no_backup:
+        print("\n🕐 Запуск автоматического планировщика backup...")
+        backup_thread = start_backup_scheduler()
     
-    print(f"\n🚀 Запуск сервера на http://localhost:8000")
+    print(f"\n🚀 Запуск сервера на http://localhost:{config.API_PORT}")
     print("📱 Веб-интерфейс доступен в браузере")
-    print("📖 API документация: http://localhost:8000/api")
-    print("💾 Автоматический backup работает в фоне")
+    print(f"📖 API документация: http://localhost:{config.API_PORT}/api")
+    if not args.no_backup:
+        print("💾 Автоматический backup работает в фоне")
     print("\nНажмите Ctrl+C для остановки\n")
     
     try:
         app.run(
             host=config.API_HOST,
-            port=8000,
+            port=config.API_PORT,
             debug=config.API_DEBUG
         )
     except KeyboardInterrupt:
@@ -172,4 +211,4 @@ def main():
         print(f"\n❌ Ошибка запуска: {e}")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -11,7 +11,12 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.database.connection import db
 
 def python_backup():
-    """Backup через Python без pg_dump"""
+    """
+    Backup через Python без pg_dump
+    
+    Returns:
+        dict: {'file', 'size', 'compressed_size', 'records'} при успехе, иначе False
+    """
     backup_dir = "backups"
     os.makedirs(backup_dir, exist_ok=True)
     
@@ -110,7 +115,12 @@ def python_backup():
             print(f"Compressed: {compressed_size:,} bytes ({compression:.1f}% saved)")
             print(f"BACKUP_SUCCESS: {backup_file}.gz")
             
-            return True
+            return {
+                'file': f"{backup_file}.gz",
+                'size': size,
+                'compressed_size': compressed_size,
+                'records': total_records
+            }
             
     except Exception as e:
         print(f"BACKUP_ERROR: {e}")
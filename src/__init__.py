@@ -1,26 +1,7 @@
-import os
-from dotenv import load_dotenv
+"""
+Система электронных медицинских карт
 
-load_dotenv()
-
-class Config:
-    # Database
-    DB_HOST = os.getenv('DB_HOST')
-    DB_PORT = int(os.getenv('DB_PORT'))
-    DB_NAME = os.getenv('DB_NAME')
-    DB_USER = os.getenv('DB_USER')
-    DB_PASSWORD = os.getenv('DB_PASSWORD')
-    
-    # Security
-    SECRET_KEY = os.getenv('SECRET_KEY', 'dev-key-change-in-production')
-    ENCRYPTION_KEY_FILE = os.getenv('ENCRYPTION_KEY_FILE', '.encryption_key')
-    JWT_EXPIRATION_HOURS = int(os.getenv('JWT_EXPIRATION_HOURS', 24))
-    
-    # API
-    API_HOST = os.getenv('API_HOST')
-    API_PORT = os.getenv('API_PORT')
-    API_DEBUG = os.getenv('API_DEBUG', 'False').lower() == 'true'
-    
-    @property
-    def database_url(self):
-        return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
\ No newline at end of file
+Настройки - src/config.py. Импорт пакета не загружает .env: это делает
+src.config.load_env() в точках входа и при первом подключении к БД.
+"""
+from src.config import Config
@@ -0,0 +1,316 @@
+"""
+Асинхронный вариант API для чтения: aiohttp + пул подключений psycopg 3
+
+Обслуживает GET /api/patients, /api/search, /api/appointments,
+/api/medical-records/<id> и /api/statistics с теми же подготовленными SQL
+(src/database/read_queries.py), форматированием (src/api/russian_routes.py)
+и ответами, что и Flask-приложение. Ожидание PostgreSQL не занимает поток:
+тысячи клиентов одного процесса обслуживает цикл событий, а число
+одновременных запросов к БД ограничено размером пула (ASYNC_DB_POOL_MAX).
+Расшифровка TDE и форматирование строк выполняются в пуле потоков, чтобы
+не останавливать цикл событий.
+
+Запуск (рядом с основным приложением, обычно за общим reverse proxy):
+    pip install aiohttp "psycopg[binary,pool]"
+    python src/api/async_app.py --port 8001
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from pathlib import Path
+
+try:
+    from aiohttp import web
+    from psycopg.conninfo import make_conninfo
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool, PoolTimeout
+except ImportError:
+    web = None
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.config import config, load_env
+
+# .env - до импорта модулей, читающих настройки при импорте
+load_env()
+
+from src.database.connection import db
+from src.database import statistics_store, read_queries, repositories
+from src.database.prepared_statements import statements, PLAN_CACHE_QUERY
+from src.api.json_provider import encode_json, resolve_backend
+from src.api.russian_routes import (
+    TDE_ENABLED, tde_manager, format_patient_data, format_appointments,
+    format_doctor_contacts, format_medical_record,
+)
+
+logger = logging.getLogger(__name__)
+
+JSON_BACKEND = resolve_backend(config.JSON_BACKEND)
+
+if web is not None:
+    POOL = web.AppKey('pool', AsyncConnectionPool)
+    DECRYPT_EXECUTOR = web.AppKey('decrypt_executor', ThreadPoolExecutor)
+
+
+def json_response(data, status: int = 200):
+    """JSON-ответ в том же кодировании, что и jsonify"""
+    return web.Response(body=encode_json(data, JSON_BACKEND) + b'\n', status=status,
+                        content_type='application/json', charset='utf-8')
+
+
+def api_errors(message: str):
+    """Ответы об ошибках как у Flask-маршрутов, 503 при исчерпании пула"""
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request):
+            try:
+                return await handler(request)
+            except ValueError as e:
+                return json_response({'error': f'Некорректные параметры: {e}'}, 400)
+            except PoolTimeout:
+                logger.warning(f"⚠️ Нет свободного подключения за {config.ASYNC_DB_POOL_TIMEOUT} с: {request.path}")
+                return json_response({'error': 'Сервер перегружен, повторите запрос позже'}, 503)
+            except Exception as e:
+                logger.error(f"{message}: {e}")
+                return json_response({'error': f'{message}: {str(e)}'}, 500)
+        return wrapper
+    return decorator
+
+
+def _prepare_rows(rows, formatter=None, page_formatter=None):
+    """
+    Расшифровка (как в TDECursor) и форматирование строк результата:
+    formatter - для каждой строки, page_formatter - для всей страницы
+    """
+    if db.tde_enabled:
+        from src.security.tde import decrypt_rows
+        rows = decrypt_rows(db.tde_manager, rows)
+    if page_formatter is not None:
+        return page_formatter(rows)
+    if formatter is None:
+        return rows
+    return [formatter(row) for row in rows]
+
+
+async def prepare_rows(request, rows, formatter=None, page_formatter=None):
+    """Подготовка строк; при TDE - в пуле потоков, вне цикла событий"""
+    if not db.tde_enabled and not TDE_ENABLED:
+        return _prepare_rows(rows, formatter, page_formatter)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app[DECRYPT_EXECUTOR],
+                                      partial(_prepare_rows, rows, formatter, page_formatter))
+
+
+async def fetch(request, statement, params=None):
+    """Выполнение подготовленного запроса на подключении из пула"""
+    async with request.app[POOL].connection() as conn:
+        return await (await statements.execute_async(conn, statement, params)).fetchall()
+
+
+def _pagination(request):
+    page = int(request.query.get('page', 1))
+    per_page = int(request.query.get('per_page', 20))
+    return page, per_page, (page - 1) * per_page
+
+
+# === ПАЦИЕНТЫ ===
+@api_errors('Ошибка получения пациентов')
+async def get_patients(request):
+    page, per_page, offset = _pagination(request)
+    fields = read_queries.patient_fields(request.query.get('fields'))
+    
+    async with request.app[POOL].connection() as conn:
+        total = (await (await statements.execute_async(conn, read_queries.PATIENTS_COUNT)).fetchone())['total']
+        cursor = await statements.execute_async(conn, read_queries.patients_page_statement(TDE_ENABLED, fields),
+                                                (per_page, offset))
+        patients = await cursor.fetchall()
+    
+    return json_response({
+        'patients': await prepare_rows(request, patients, format_patient_data),
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page
+        }
+    })
+
+
+# === ПОИСК ===
+@api_errors('Ошибка поиска')
+async def search(request):
+    query = request.query.get('q', '').strip()
+    search_type = request.query.get('type', 'patients')
+    
+    if search_type == 'doctors':
+        doctors = await fetch(request, read_queries.DOCTORS_SEARCH)
+        return json_response({'doctors': await prepare_rows(request, doctors, format_doctor_contacts)})
+    
+    if len(query) < 2:
+        return json_response({'error': 'Запрос слишком короткий', 'patients': []})
+    
+    fields = read_queries.patient_fields(request.query.get('fields'))
+    patients = await fetch(request, *read_queries.patient_search_statement(query, TDE_ENABLED, fields))
+    formatted_patients = await prepare_rows(request, patients, format_patient_data)
+    
+    return json_response({
+        'patients': formatted_patients,
+        'count': len(formatted_patients),
+        'query': query
+    })
+
+
+# === ПРИЁМЫ ===
+@api_errors('Ошибка получения приёмов')
+async def get_appointments(request):
+    page, per_page, offset = _pagination(request)
+    count_statement, page_statement, params = read_queries.appointment_statements(request.query.get('status', ''))
+    
+    async with request.app[POOL].connection() as conn:
+        total = (await (await statements.execute_async(conn, count_statement, params)).fetchone())['total']
+        appointments = await (await statements.execute_async(conn, page_statement,
+                                                             params + [per_page, offset])).fetchall()
+    
+    return json_response({
+        'appointments': await prepare_rows(request, appointments, page_formatter=format_appointments),
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page if total > 0 else 1
+        }
+    })
+
+
+# === МЕДКАРТЫ ===
+@api_errors('Ошибка получения медкарты')
+async def get_medical_record(request):
+    record_id = int(request.match_info['record_id'])
+    
+    async with request.app[POOL].connection() as conn:
+        record = await (await statements.execute_async(conn, read_queries.MEDICAL_RECORD,
+                                                       (record_id,))).fetchone()
+        if not record:
+            return json_response({'error': 'Медицинская запись не найдена'}, 404)
+        build_prescriptions = await repositories.prescriptions.find_by_async(
+            conn, 'medical_record_id', [record_id], tde_manager=tde_manager)
+    
+    formatted_record = (await prepare_rows(request, [record], format_medical_record))[0]
+    formatted_record['prescriptions'] = await asyncio.get_running_loop().run_in_executor(
+        request.app[DECRYPT_EXECUTOR], build_prescriptions)
+    return json_response(formatted_record)
+
+
+# === СТАТИСТИКА ===
+@api_errors('Ошибка получения статистики')
+async def get_statistics(request):
+    fresh = request.query.get('fresh', 'false').lower() == 'true'
+    
+    async with request.app[POOL].connection() as conn:
+        return json_response(await statistics_store.get_statistics_async(conn, fresh=fresh))
+
+
+@api_errors('Ошибка получения статистики подготовленных запросов')
+async def debug_prepared_statements(request):
+    """Статистика подготовленных запросов и кэш планов одного подключения пула"""
+    report = statements.report()
+    async with request.app[POOL].connection() as conn:
+        report['connection_plans'] = statements.plan_cache(await (await conn.execute(PLAN_CACHE_QUERY)).fetchall())
+    return json_response(report)
+
+
+async def health(request):
+    """Состояние пула подключений"""
+    stats = request.app[POOL].get_stats()
+    return json_response({
+        'status': 'healthy',
+        'pool': {
+            'size': stats.get('pool_size', 0),
+            'available': stats.get('pool_available', 0),
+            'waiting': stats.get('requests_waiting', 0),
+            'max': config.ASYNC_DB_POOL_MAX,
+        }
+    })
+
+
+def _conninfo() -> str:
+    """Строка подключения psycopg 3 из параметров db"""
+    params = dict(db.connection_params)
+    params['dbname'] = params.pop('database')
+    return make_conninfo(**{key: value for key, value in params.items() if value not in (None, '')})
+
+
+async def _resources(app):
+    """Пул подключений и потоки расшифровки на время работы приложения"""
+    # Вывод ключей TDE до приема запросов, а не в цикле событий
+    db.initialize()
+    
+    pool = AsyncConnectionPool(
+        _conninfo(),
+        min_size=config.ASYNC_DB_POOL_MIN,
+        max_size=config.ASYNC_DB_POOL_MAX,
+        timeout=config.ASYNC_DB_POOL_TIMEOUT,
+        kwargs={'row_factory': dict_row, 'autocommit': True},
+        name='medical-records-async',
+        open=False,
+    )
+    await pool.open()
+    executor = ThreadPoolExecutor(max_workers=config.ASYNC_DECRYPT_THREADS,
+                                  thread_name_prefix='tde-decrypt')
+    
+    app[POOL] = pool
+    app[DECRYPT_EXECUTOR] = executor
+    logger.info(f"✅ Пул подключений: {config.ASYNC_DB_POOL_MIN}-{config.ASYNC_DB_POOL_MAX}, "
+                f"потоков расшифровки: {config.ASYNC_DECRYPT_THREADS}")
+    
+    yield
+    
+    await pool.close()
+    executor.shutdown(wait=False)
+
+
+def create_app():
+    """Создание aiohttp-приложения"""
+    if web is None:
+        raise RuntimeError('Асинхронный API требует: pip install aiohttp "psycopg[binary,pool]"')
+    
+    app = web.Application()
+    app.cleanup_ctx.append(_resources)
+    app.router.add_get('/health', health)
+    app.router.add_get('/api/patients', get_patients)
+    app.router.add_get('/api/search', search)
+    app.router.add_get('/api/appointments', get_appointments)
+    app.router.add_get(r'/api/medical-records/{record_id:\d+}', get_medical_record)
+    app.router.add_get('/api/statistics', get_statistics)
+    app.router.add_get('/api/debug/prepared-statements', debug_prepared_statements)
+    return app
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Асинхронный API чтения системы медкарт')
+    parser.add_argument('--host', default=config.API_HOST)
+    parser.add_argument('--port', type=int, default=config.ASYNC_API_PORT)
+    args = parser.parse_args(argv)
+    
+    try:
+        app = create_app()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
+    print(f"🚀 Асинхронный API: http://{args.host}:{args.port}")
+    web.run_app(app, host=args.host, port=args.port, access_log=None)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
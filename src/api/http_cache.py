@@ -0,0 +1,146 @@
+"""
+Сжатие ответов и условные GET (ETag / If-None-Match -> 304)
+
+ETag списка строится из версий таблиц, от которых он зависит
+(src/database/table_versions.py), и полного URL запроса. Если клиент прислал
+тот же ETag, обработчик не вызывается и запрос списка к БД не выполняется.
+Сжатые ответы получают суффикс кодировки в ETag (strong ETag различается
+для разных Content-Encoding), при сравнении суффикс не учитывается.
+"""
+import gzip
+import hashlib
+import logging
+from functools import wraps
+from typing import Optional
+
+from flask import current_app, request, make_response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from src.database.table_versions import table_versions
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/x-ndjson',
+    'image/svg+xml',
+}
+
+ENCODING_SUFFIXES = ('', '-gzip', '-br')
+
+
+def make_etag(versions: dict) -> str:
+    """ETag из URL запроса и версий таблиц"""
+    source = request.full_path + '|' + ','.join(
+        f'{table}={version}' for table, version in sorted(versions.items()))
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()[:20]
+
+
+def conditional_get(tables):
+    """
+    ETag и ответ 304 для GET-обработчика
+    
+    Args:
+        tables: Кортеж таблиц, от которых зависит ответ, или функция,
+                возвращающая его по текущему запросу
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get('ETAG_ENABLED', True):
+                return view(*args, **kwargs)
+            
+            depends_on = tables() if callable(tables) else tables
+            versions = table_versions.get(depends_on)
+            if versions is None:
+                return view(*args, **kwargs)
+            
+            etag = make_etag(versions)
+            if any(request.if_none_match.contains(etag + suffix) for suffix in ENCODING_SUFFIXES):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                return response
+            
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'no-cache'
+            return response
+        
+        return wrapper
+    return decorator
+
+
+def _choose_encoding() -> Optional[str]:
+    """Кодировка по Accept-Encoding: br (если установлен brotli) или gzip"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def init_http_cache(app, etag: bool = True, compression: bool = True,
+                    min_size: int = 1024, level: int = 6):
+    """
+    Подключение ETag, сжатия ответов и сброса кэша версий таблиц
+    
+    Args:
+        app: Flask-приложение
+        etag: Включить ETag и ответы 304 в обработчиках с conditional_get
+        compression: Сжимать ответы
+        min_size: Минимальный размер тела для сжатия (байт)
+        level: Уровень сжатия gzip (1-9)
+    """
+    app.config['ETAG_ENABLED'] = etag
+    
+    @app.after_request
+    def invalidate_table_versions(response):
+        # Изменения через этот процесс видны в ETag без ожидания TTL
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            table_versions.invalidate()
+        return response
+    
+    if not compression:
+        return app
+    
+    @app.after_request
+    def compress_response(response):
+        response.vary.add('Accept-Encoding')
+        
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code != 200
+                or 'Content-Encoding' in response.headers):
+            return response
+        
+        mimetype = response.mimetype or ''
+        if not (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES):
+            return response
+        
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+        
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        
+        if encoding == 'br':
+            response.set_data(brotli.compress(data, quality=min(level, 11)))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=level))
+        response.headers['Content-Encoding'] = encoding
+        
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}-{encoding}', weak=weak)
+        
+        return response
+    
+    return app
@@ -0,0 +1,71 @@
+"""
+Flask-хуки для учета задержек запросов и экспорт метрик на /metrics
+"""
+import time
+
+from flask import request, jsonify, Response
+
+from src.utils.metrics import current_request_stats, metrics_registry, RequestStats
+
+
+def _endpoint_label() -> str:
+    """Метка эндпоинта: метод и шаблон маршрута (без конкретных ID)"""
+    rule = request.url_rule.rule if request.url_rule else 'unmatched'
+    return f"{request.method} {rule}"
+
+
+def format_server_timing(stats: RequestStats, wall_time: float) -> str:
+    """Значение заголовка Server-Timing"""
+    return ', '.join([
+        f'app;dur={wall_time * 1000:.2f}',
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries, {stats.rows} rows"',
+        f'decrypt;dur={stats.decrypt_time * 1000:.2f};desc="{stats.decrypts} fields"',
+    ])
+
+
+def init_request_metrics(app, server_timing: bool = False):
+    """
+    Подключение учета метрик к приложению
+    
+    Args:
+        app: Flask-приложение
+        server_timing: Добавлять заголовок Server-Timing к ответам
+    """
+    
+    @app.before_request
+    def start_request_metrics():
+        request.environ['emr.metrics_token'] = current_request_stats.set(RequestStats(_endpoint_label()))
+    
+    @app.after_request
+    def finish_request_metrics(response):
+        stats = current_request_stats.get()
+        if stats is None or request.path == '/metrics':
+            return response
+        
+        wall_time = time.perf_counter() - stats.started_at
+        metrics_registry.record_request(stats.endpoint, stats, wall_time, response.status_code)
+        
+        if server_timing:
+            response.headers['Server-Timing'] = format_server_timing(stats, wall_time)
+        
+        return response
+    
+    @app.teardown_request
+    def reset_request_metrics(exc=None):
+        token = request.environ.pop('emr.metrics_token', None)
+        if token is not None:
+            current_request_stats.reset(token)
+    
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Метрики производительности (Prometheus или JSON при ?format=json)"""
+        if request.args.get('format') == 'json':
+            return jsonify({
+                'uptime_seconds': round(time.time() - metrics_registry.started_at, 1),
+                'endpoints': metrics_registry.to_dict()
+            })
+        
+        return Response(metrics_registry.render_prometheus(),
+                        mimetype='text/plain; version=0.0.4; charset=utf-8')
+    
+    return app
@@ -0,0 +1,111 @@
+"""
+Кодировщик JSON-ответов API
+
+Если установлен orjson, ответы jsonify кодируются им сразу в байты UTF-8,
+иначе - стандартным json. Даты и дата-время кодируются в ISO 8601 одинаково
+в обоих вариантах, bytes/memoryview (BYTEA) - в hex, Decimal - строкой,
+диапазоны (TSTZRANGE) - объектом с границами lower/upper. Dataclass (строки
+RowMapper) orjson кодирует сам, stdlib - через json_default.
+Выбор реализации: JSON_BACKEND=auto|orjson|stdlib.
+"""
+import dataclasses
+import json
+import logging
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+JSON_BACKENDS = ('auto', 'orjson', 'stdlib')
+
+
+def json_default(value):
+    """Кодирование типов, которые не поддерживает json/orjson"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+    if hasattr(value, 'isempty') and hasattr(value, 'lower') and hasattr(value, 'upper'):
+        # Диапазоны PostgreSQL (appointments.appointment_period): границы [lower, upper)
+        return None if value.isempty else {'lower': value.lower, 'upper': value.upper}
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def resolve_backend(name: str = 'auto') -> str:
+    """Реализация JSON по настройке: orjson, если он нужен и установлен"""
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"JSON_BACKEND должен быть одним из: {', '.join(JSON_BACKENDS)}")
+    if name == 'stdlib':
+        return 'stdlib'
+    if orjson is None:
+        if name == 'orjson':
+            logger.warning("⚠️ orjson не установлен, используется стандартный json")
+        return 'stdlib'
+    return 'orjson'
+
+
+def encode_json(obj, backend: str = 'orjson', sort_keys: bool = True, indent: bool = False) -> bytes:
+    """Сериализация в байты UTF-8 (orjson без промежуточной строки)"""
+    if backend == 'orjson':
+        options = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=json_default, option=options)
+        except TypeError:
+            # Целые вне 64 бит и прочие случаи, которые orjson не кодирует
+            pass
+    
+    kwargs = {'indent': 2} if indent else {'separators': (',', ':')}
+    return json.dumps(obj, default=json_default, ensure_ascii=False,
+                      sort_keys=sort_keys, **kwargs).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON-провайдер Flask с orjson и единым кодированием дат"""
+    
+    default = staticmethod(json_default)
+    
+    def __init__(self, app, backend: str = 'auto'):
+        super().__init__(app)
+        self.backend = resolve_backend(backend)
+    
+    def dumps_bytes(self, obj, indent: bool = False) -> bytes:
+        """Сериализация в байты UTF-8 (orjson без промежуточной строки)"""
+        return encode_json(obj, self.backend, sort_keys=self.sort_keys, indent=indent)
+    
+    def dumps(self, obj, **kwargs) -> str:
+        if self.backend == 'orjson' and set(kwargs) <= {'indent', 'separators'}:
+            return self.dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        # orjson.JSONDecodeError - подкласс json.JSONDecodeError
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+    
+    def response(self, *args, **kwargs):
+        """Ответ jsonify: тело кодируется сразу в байты"""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent) + b'\n',
+                                        mimetype=self.mimetype)
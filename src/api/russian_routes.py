@@ -1,30 +1,61 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, abort, Response
 from datetime import datetime
+from psycopg2 import errors as pg_errors
+import io
 import os
 import sys
 import logging
+from pathlib import Path
 
 # Добавляем путь к корню проекта
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
 sys.path.insert(0, project_root)
 
+from src.config import config, load_env
+
+# .env - до импорта модулей, читающих настройки при импорте
+load_env()
+
 from src.database.connection import db
-from src.config import config
+from src.database import statistics_store, patient_import, medical_records, data_export, read_queries, repositories, timeline
+from src.database.prepared_statements import statements
+from src.database.row_mapping import RowMapper, TUPLE_CURSOR
+from src.database.repositories import LoaderSession
+from src.models import Patient
+from src.database.slots import find_free_slots, DEFAULT_SEARCH_DAYS, DEFAULT_APPOINTMENT_MINUTES
+from src.api.validators import validate_patient_data, normalize_phone
+from src.utils.russian_helpers import (
+    GENDER_NAMES, format_birth_date, format_phone_number, format_datetime_russian, phone_digits,
+    format_column, format_birth_date_column, format_datetime_column, format_phone_column, format_gender_column,
+)
+from src.api.json_provider import FastJSONProvider
+from src.api.http_cache import init_http_cache, conditional_get
+from src.api.static_assets import StaticAssets
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+app = Flask(__name__, static_folder=None)  # /static отдается из памяти, см. static_file()
 app.config['SECRET_KEY'] = config.SECRET_KEY
+app.json = FastJSONProvider(app, backend=config.JSON_BACKEND)
 
 # Включаем CORS для работы с frontend
 from flask_cors import CORS
 CORS(app)
 
+# Учет задержек запросов и времени БД (/metrics)
+if config.METRICS_ENABLED:
+    from src.api.instrumentation import init_request_metrics
+    init_request_metrics(app, server_timing=config.SERVER_TIMING_ENABLED)
+
+# ETag по версиям таблиц (304 без запроса к БД) и сжатие ответов
+init_http_cache(app, etag=config.ETAG_ENABLED, compression=config.COMPRESSION_ENABLED,
+                min_size=config.COMPRESSION_MIN_SIZE, level=config.COMPRESSION_LEVEL)
+
 # Проверяем статус TDE
-TDE_ENABLED = os.getenv('TDE_ENABLED', 'False').lower() == 'true'
+TDE_ENABLED = config.TDE_ENABLED
 
 if TDE_ENABLED:
     try:
@@ -40,6 +71,9 @@ else:
     logger.info("📖 TDE отключен в настройках")
     tde_manager = None
 
+# Строки пациентов для списков и поиска: slotted-объекты вместо словарей
+patient_rows = RowMapper(Patient, table='patients')
+
 def safe_encrypt_field(table_name, field_name, value):
     """Безопасное шифрование поля с обработкой пустых значений"""
     if not TDE_ENABLED or not tde_manager:
@@ -76,27 +110,7 @@ def format_patient_data(patient):
     
     # Форматируем дату рождения
     if 'birth_date' in formatted and formatted['birth_date']:
-        try:
-            birth_date = formatted['birth_date']
-            
-            if isinstance(birth_date, str):
-                try:
-                    if '.' in birth_date:
-                        pass  # Уже в русском формате
-                    elif '-' in birth_date:
-                        birth_date = datetime.strptime(birth_date, '%Y-%m-%d').date()
-                        formatted['birth_date'] = birth_date.strftime('%d.%m.%Y')
-                    else:
-                        birth_date = datetime.strptime(birth_date, '%Y-%m-%d').date()
-                        formatted['birth_date'] = birth_date.strftime('%d.%m.%Y')
-                except ValueError:
-                    logger.warning(f"Could not parse birth_date: {birth_date}")
-                    pass
-            elif hasattr(birth_date, 'strftime'):
-                formatted['birth_date'] = birth_date.strftime('%d.%m.%Y')
-        except Exception as e:
-            logger.error(f"Error formatting birth_date: {e}")
-            pass
+        formatted['birth_date'] = format_birth_date(formatted['birth_date'])
     
     # Расшифровываем и форматируем телефон
     if TDE_ENABLED and 'phone_encrypted' in formatted and 'phone_iv' in formatted:
@@ -114,15 +128,7 @@ def format_patient_data(patient):
     
     # Форматируем телефон
     if 'phone' in formatted:
-        phone = formatted['phone']
-        if phone and phone != "не указан" and not phone.startswith("[ОШИБКА"):
-            digits = ''.join(filter(str.isdigit, phone))
-            if len(digits) == 11 and digits.startswith('7'):
-                formatted['phone'] = f"+7 ({digits[1:4]}) {digits[4:7]}-{digits[7:9]}-{digits[9:11]}"
-            elif len(digits) == 11 and digits.startswith('8'):
-                formatted['phone'] = f"8 ({digits[1:4]}) {digits[4:7]}-{digits[7:9]}-{digits[9:11]}"
-        else:
-            formatted['phone'] = "не указан"
+        formatted['phone'] = format_phone_number(formatted['phone'])
     
     # Расшифровываем и форматируем email
     if TDE_ENABLED and 'email_encrypted' in formatted and 'email_iv' in formatted:
@@ -159,44 +165,151 @@ def format_patient_data(patient):
     
     # Форматируем пол
     if 'gender' in formatted:
-        gender_map = {'M': 'Мужской', 'F': 'Женский'}
-        formatted['gender'] = gender_map.get(formatted['gender'], formatted['gender'] or 'не указан')
+        formatted['gender'] = GENDER_NAMES.get(formatted['gender'], formatted['gender'] or 'не указан')
     
     return formatted
 
-def format_datetime_russian(dt):
-    """Форматирование даты/времени в русском формате"""
-    if not dt:
-        return "не указано"
+def format_patient_row(patient):
+    """
+    Форматирование строки пациента из RowMapper на месте, без копии в словарь;
+    результат тот же, что у format_patient_data для строки-словаря
+    """
+    fields = patient.__dataclass_fields__
     
-    try:
-        if isinstance(dt, str):
-            if '.' in dt and ':' in dt:
-                return dt
-            
-            if 'T' in dt:
-                dt = datetime.fromisoformat(dt.replace('Z', '+00:00'))
-            else:
-                dt = datetime.fromisoformat(dt)
-        
-        return dt.strftime('%d.%m.%Y %H:%M')
-    except Exception as e:
-        logger.error(f"Error formatting datetime: {e}")
-        return str(dt) if dt else "не указано"
+    # Поля, расшифрованные конструктором строки: без значения - "не указан"
+    for field in patient.__decrypted__:
+        if not getattr(patient, field):
+            setattr(patient, field, "не указан")
+    
+    if 'birth_date' in fields and patient.birth_date:
+        patient.birth_date = format_birth_date(patient.birth_date)
+    if 'phone' in fields:
+        patient.phone = format_phone_number(patient.phone)
+    if 'email' in fields and (not patient.email or patient.email.startswith("[ОШИБКА")):
+        patient.email = "не указан"
+    if 'gender' in fields:
+        patient.gender = GENDER_NAMES.get(patient.gender, patient.gender or 'не указан')
+    
+    return patient
+
+def format_patient_rows(patients):
+    """
+    Страница строк RowMapper: каждый столбец форматируется целиком,
+    результат тот же, что у format_patient_row для каждой строки
+    """
+    if not patients:
+        return patients
+    fields = patients[0].__dataclass_fields__
+    
+    for field in patients[0].__decrypted__:
+        format_column(patients, field, lambda values: [value or "не указан" for value in values])
+    
+    if 'birth_date' in fields:
+        format_column(patients, 'birth_date', format_birth_date_column)
+    if 'phone' in fields:
+        format_column(patients, 'phone', format_phone_column)
+    if 'email' in fields:
+        format_column(patients, 'email', lambda values: [
+            "не указан" if not value or value.startswith("[ОШИБКА") else value for value in values])
+    if 'gender' in fields:
+        format_column(patients, 'gender', format_gender_column)
+    
+    return patients
+
+APPOINTMENT_STATUS_NAMES = {
+    'scheduled': 'запланирован',
+    'completed': 'завершен',
+    'cancelled': 'отменен'
+}
+
+def format_appointment(appointment):
+    """Форматирование приёма: дата и статус на русском"""
+    formatted = dict(appointment)
+    
+    formatted['appointment_date'] = format_datetime_russian(
+        formatted['appointment_date']
+    )
+    formatted['status'] = APPOINTMENT_STATUS_NAMES.get(
+        formatted['status'], formatted['status']
+    )
+    
+    return formatted
+
+def format_appointments(appointments):
+    """Страница приёмов: даты и статусы форматируются столбцами, как в format_appointment"""
+    formatted = [dict(appointment) for appointment in appointments]
+    format_column(formatted, 'appointment_date', format_datetime_column)
+    format_column(formatted, 'status', lambda values: [
+        APPOINTMENT_STATUS_NAMES.get(status, status) for status in values])
+    return formatted
+
+def format_doctor_contacts(doctor):
+    """Форматирование телефона и email врача"""
+    formatted = dict(doctor)
+    if formatted['phone']:
+        digits = phone_digits(formatted['phone'])
+        if len(digits) == 11:
+            formatted['phone'] = f"+7 ({digits[1:4]}) {digits[4:7]}-{digits[7:9]}-{digits[9:11]}"
+    else:
+        formatted['phone'] = "не указан"
+    
+    if not formatted['email']:
+        formatted['email'] = "не указан"
+    
+    return formatted
+
+def format_medical_record(record):
+    """Медицинская запись с расшифрованным диагнозом"""
+    formatted_record = dict(record)
+    
+    # Расшифровываем диагноз
+    if record.get('diagnosis_encrypted') and record.get('diagnosis_iv'):
+        try:
+            decrypted = safe_decrypt_field('medical_records', 'diagnosis',
+                                         bytes(record['diagnosis_encrypted']),
+                                         bytes(record['diagnosis_iv']))
+            formatted_record['diagnosis'] = decrypted or "Ошибка расшифровки"
+        except Exception as e:
+            logger.error(f"Decryption error: {e}")
+            formatted_record['diagnosis'] = f"Ошибка расшифровки: {e}"
+    elif 'diagnosis_encrypted' in record:
+        formatted_record['diagnosis'] = "Диагноз не зашифрован"
+    # Иначе диагноз уже расшифрован курсором TDE
+    
+    if 'diagnosis_encrypted' in formatted_record:
+        del formatted_record['diagnosis_encrypted']
+    if 'diagnosis_iv' in formatted_record:
+        del formatted_record['diagnosis_iv']
+    
+    formatted_record['appointment_date'] = format_datetime_russian(
+        formatted_record['appointment_date']
+    )
+    
+    return formatted_record
 
 # === ГЛАВНАЯ СТРАНИЦА ===
+# Веб-интерфейс и static/ читаются и сжимаются один раз при запуске
+static_assets = StaticAssets().load(Path(project_root) / 'static',
+                                    Path(project_root) / 'web_interface.html')
+
 @app.route('/')
 def index():
-    """Главная страница - возвращает веб-интерфейс"""
-    web_interface_path = os.path.join(project_root, 'web_interface.html')
-    if os.path.exists(web_interface_path):
-        return send_file(web_interface_path)
-    else:
-        return jsonify({
-            'message': 'Система электронных медкарт API',
-            'error': 'web_interface.html не найден',
-            'path': web_interface_path
-        })
+    """Главная страница - возвращает веб-интерфейс (из памяти, с ETag)"""
+    if static_assets.index is not None:
+        return static_assets.index.response()
+    return jsonify({
+        'message': 'Система электронных медкарт API',
+        'error': 'web_interface.html не найден',
+        'path': os.path.join(project_root, 'web_interface.html')
+    })
+
+@app.route('/static/<path:filename>', endpoint='static')
+def static_file(filename):
+    """Статические файлы: с хешем в имени - кэш на год, без хеша - ETag"""
+    response = static_assets.serve(filename)
+    if response is None:
+        abort(404)
+    return response
 
 @app.route('/api')
 def api_info():
@@ -212,14 +325,23 @@ def api_info():
             'GET /': 'Главная страница (веб-интерфейс)',
             'GET /api': 'Эта страница с документацией',
             'GET /health': 'Проверка работы системы',
-            'GET /api/patients': 'Список пациентов',
+            'GET /api/patients': 'Список пациентов (fields=id,last_name,... - выбранные поля)',
+            'GET /api/patients/<id>/timeline': 'Лента пациента: приёмы, медкарты и назначения',
             'POST /api/patients': 'Добавить пациента',
+            'POST /api/patients/import?format=ndjson|csv': 'Массовый импорт пациентов',
             'GET /api/search?q=Иванов': 'Поиск пациентов',
             'GET /api/appointments': 'Список приёмов',
             'POST /api/appointments': 'Создать приём',
-            'GET /api/medical-records': 'Список медкарт',
+            'GET /api/appointments/free-slots?specialization=Терапевт': 'Ближайшие свободные слоты',
+            'GET /api/medical-records': 'Список медкарт (include=prescriptions - с назначениями)',
             'POST /api/medical-records': 'Создать медкарту',
-            'GET /api/statistics': 'Статистика системы'
+            'POST /api/medical-records/batch': 'Закрыть пакет приёмов (медкарты и назначения)',
+            'GET /api/statistics': 'Статистика системы (?fresh=true - точный подсчет)',
+            'GET /api/export/patients?format=ndjson|csv&since=2024-01-01': 'Потоковая выгрузка (patients, appointments, medical-records)',
+            'GET /api/statistics/timeseries': 'Приемы по дням/неделям/месяцам (?granularity=week&group_by=doctor)',
+            'GET /metrics': 'Метрики производительности (Prometheus, ?format=json)',
+            'GET /api/debug/slow-queries': 'Медленные SQL-запросы (?limit=20&sort=total|max|count)',
+            'GET /api/debug/prepared-statements': 'Подготовленные запросы и кэш планов'
         }
     })
 
@@ -257,39 +379,26 @@ def health():
 # === ПАЦИЕНТЫ ===
 @app.route('/api/patients', methods=['GET'])
 def get_patients():
-    """Получить список пациентов"""
+    """
+    Получить список пациентов
+    
+    fields=id,last_name,... - только перечисленные поля (id всегда)
+    """
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
     offset = (page - 1) * per_page
     
     try:
-        with db.get_cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) as total FROM patients")
-            total = cursor.fetchone()['total']
+        fields = read_queries.patient_fields(request.args.get('fields'))
+        
+        with db.get_cursor(cursor_factory=TUPLE_CURSOR) as cursor:
+            statements.execute(cursor, read_queries.PATIENTS_COUNT)
+            total = cursor.fetchone()[0]
             
-            # Выбираем все поля включая зашифрованные
-            if TDE_ENABLED:
-                cursor.execute("""
-                    SELECT id, first_name, last_name, middle_name, 
-                           birth_date, gender, phone, email, address,
-                           phone_encrypted, phone_iv, 
-                           email_encrypted, email_iv,
-                           address_encrypted, address_iv
-                    FROM patients
-                    ORDER BY last_name, first_name
-                    LIMIT %s OFFSET %s
-                """, (per_page, offset))
-            else:
-                cursor.execute("""
-                    SELECT id, first_name, last_name, middle_name, 
-                           birth_date, gender, phone, email, address
-                    FROM patients
-                    ORDER BY last_name, first_name
-                    LIMIT %s OFFSET %s
-                """, (per_page, offset))
+            statements.execute(cursor, read_queries.patients_page_statement(TDE_ENABLED, fields), (per_page, offset))
             
-            patients = cursor.fetchall()
-            formatted_patients = [format_patient_data(patient) for patient in patients]
+            patients = patient_rows.fetchall(cursor, tde_manager)
+            formatted_patients = format_patient_rows(patients)
             
             return jsonify({
                 'patients': formatted_patients,
@@ -300,35 +409,27 @@ def get_patients():
                     'pages': (total + per_page - 1) // per_page
                 }
             })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Get patients error: {e}")
         return jsonify({'error': f'Ошибка получения пациентов: {str(e)}'}), 500
 
 @app.route('/api/patients/<int:patient_id>', methods=['GET'])
 def get_patient(patient_id):
-    """Получить данные пациента по ID"""
+    """
+    Получить данные пациента по ID
+    
+    fields= ограничивает поля, в том числе total_appointments и
+    last_appointment (без них приёмы не запрашиваются)
+    """
     try:
+        fields = read_queries.patient_fields(request.args.get('fields'), aggregates=True)
+        if fields is not None:
+            return get_patient_fields(patient_id, fields)
+        
         with db.get_cursor() as cursor:
-            if TDE_ENABLED:
-                cursor.execute("""
-                    SELECT p.*, 
-                           COUNT(DISTINCT a.id) as total_appointments,
-                           MAX(a.appointment_date) as last_appointment
-                    FROM patients p
-                    LEFT JOIN appointments a ON p.id = a.patient_id
-                    WHERE p.id = %s
-                    GROUP BY p.id
-                """, (patient_id,))
-            else:
-                cursor.execute("""
-                    SELECT p.*, 
-                           COUNT(DISTINCT a.id) as total_appointments,
-                           MAX(a.appointment_date) as last_appointment
-                    FROM patients p
-                    LEFT JOIN appointments a ON p.id = a.patient_id
-                    WHERE p.id = %s
-                    GROUP BY p.id
-                """, (patient_id,))
+            statements.execute(cursor, read_queries.PATIENT, (patient_id,))
             
             patient = cursor.fetchone()
             
@@ -345,10 +446,64 @@ def get_patient(patient_id):
                 formatted_patient['last_appointment'] = "нет"
                 
             return jsonify(formatted_patient)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Get patient error: {e}")
         return jsonify({'error': f'Ошибка получения пациента: {str(e)}'}), 500
 
+def get_patient_fields(patient_id, fields):
+    """Карточка пациента только с полями fields: расшифровываются только они"""
+    with db.get_cursor(cursor_factory=TUPLE_CURSOR) as cursor:
+        statements.execute(cursor, read_queries.patient_statement(TDE_ENABLED, fields), (patient_id,))
+        patient = patient_rows.fetchone(cursor, tde_manager)
+    
+    if patient is None:
+        return jsonify({'error': 'Пациент не найден'}), 404
+    
+    formatted_patient = format_patient_rows([patient])[0]
+    if 'last_appointment' in fields:
+        if formatted_patient.last_appointment:
+            formatted_patient.last_appointment = format_datetime_russian(formatted_patient.last_appointment)
+        else:
+            formatted_patient.last_appointment = "нет"
+    
+    return jsonify(formatted_patient)
+
+@app.route('/api/patients/<int:patient_id>/timeline', methods=['GET'])
+def get_patient_timeline(patient_id):
+    """
+    Лента пациента: приёмы с медкартами и назначениями, страница - один запрос
+    
+    limit - приёмов на странице (до 100); следующая страница -
+    before и before_id из поля next ответа
+    """
+    try:
+        limit = int(request.args.get('limit', timeline.DEFAULT_LIMIT))
+        before = None
+        if request.args.get('before'):
+            before = (datetime.fromisoformat(request.args['before']), int(request.args['before_id']))
+    except (ValueError, KeyError):
+        return jsonify({'error': 'Некорректные параметры страницы: limit, before=<дата ISO>, before_id=<id>'}), 400
+    
+    try:
+        page = timeline.get_patient_timeline(patient_id, limit, before, tde_manager)
+        if page is None:
+            return jsonify({'error': 'Пациент не найден'}), 404
+        
+        appointments = format_appointments(page['appointments'])
+        next_key = page['next']
+        
+        return jsonify({
+            'patient_id': patient_id,
+            'appointments': appointments,
+            'count': len(appointments),
+            'next': {'before': next_key[0].isoformat(), 'before_id': next_key[1]} if next_key else None
+        })
+    except Exception as e:
+        logger.error(f"Get patient timeline error: {e}")
+        return jsonify({'error': f'Ошибка получения ленты пациента: {str(e)}'}), 500
+
 @app.route('/api/patients', methods=['POST'])
 def create_patient():
     """Создать нового пациента с поддержкой TDE"""
@@ -368,17 +523,10 @@ def create_patient():
                 clean_data[key] = str(value).strip()
         
         if 'phone' in clean_data and clean_data['phone']:
-            phone = clean_data['phone']
-            digits = ''.join(filter(str.isdigit, phone))
-            if len(digits) < 10:
+            phone = normalize_phone(clean_data['phone'])
+            if phone is None:
                 return jsonify({'error': 'Неверный формат телефона'}), 400
-            
-            if len(digits) == 11 and digits.startswith('8'):
-                digits = '7' + digits[1:]
-            if len(digits) == 10:
-                digits = '7' + digits
-                
-            clean_data['phone'] = f"+{digits}"
+            clean_data['phone'] = phone
         
         logger.info(f"Creating patient with data: {clean_data}")
         
@@ -464,8 +612,42 @@ def create_patient():
         logger.error(f"Create patient error: {e}", exc_info=True)
         return jsonify({'error': f'Ошибка создания пациента: {str(e)}'}), 500
 
+# Форматы импорта по Content-Type, если не указан ?format=
+IMPORT_CONTENT_TYPES = {
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'text/csv': 'csv',
+}
+
+@app.route('/api/patients/import', methods=['POST'])
+def import_patients():
+    """Массовый импорт пациентов из NDJSON или CSV (тело запроса читается потоком)"""
+    try:
+        fmt = request.args.get('format') or IMPORT_CONTENT_TYPES.get(request.mimetype)
+        if fmt not in patient_import.IMPORT_FORMATS:
+            return jsonify({
+                'error': 'Укажите формат: ?format=ndjson|csv или Content-Type application/x-ndjson / text/csv'
+            }), 400
+        
+        batch_size = request.args.get('batch_size', patient_import.DEFAULT_BATCH_SIZE, type=int)
+        stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+        
+        report = patient_import.import_patients(stream, fmt, batch_size)
+        return jsonify(report)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Import patients error: {e}", exc_info=True)
+        return jsonify({'error': f'Ошибка импорта пациентов: {str(e)}'}), 500
+
 # === ПОИСК ===
+def _search_tables():
+    """Таблица, от которой зависит ответ поиска"""
+    return ('doctors',) if request.args.get('type') == 'doctors' else ('patients',)
+
 @app.route('/api/search')
+@conditional_get(_search_tables)
 def search():
     """Универсальный поиск с поддержкой TDE"""
     query = request.args.get('q', '').strip()
@@ -474,65 +656,22 @@ def search():
     try:
         if search_type == 'doctors':
             with db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT id, first_name, last_name, middle_name, 
-                           specialization, phone, email
-                    FROM doctors
-                    ORDER BY last_name, first_name
-                """)
+                statements.execute(cursor, read_queries.DOCTORS_SEARCH)
                 doctors = cursor.fetchall()
                 
-                formatted_doctors = []
-                for doctor in doctors:
-                    formatted = dict(doctor)
-                    if formatted['phone']:
-                        digits = ''.join(filter(str.isdigit, formatted['phone']))
-                        if len(digits) == 11:
-                            formatted['phone'] = f"+7 ({digits[1:4]}) {digits[4:7]}-{digits[7:9]}-{digits[9:11]}"
-                    else:
-                        formatted['phone'] = "не указан"
-                    
-                    if not formatted['email']:
-                        formatted['email'] = "не указан"
-                    
-                    formatted_doctors.append(formatted)
+                formatted_doctors = [format_doctor_contacts(doctor) for doctor in doctors]
                 
                 return jsonify({'doctors': formatted_doctors})
         
         if len(query) < 2:
             return jsonify({'error': 'Запрос слишком короткий', 'patients': []}), 200
         
-        with db.get_cursor() as cursor:
-            if TDE_ENABLED:
-                # При TDE поиск только по незашифрованным полям
-                cursor.execute("""
-                    SELECT id, first_name, last_name, middle_name, 
-                           birth_date, gender, phone, email, address,
-                           phone_encrypted, phone_iv, 
-                           email_encrypted, email_iv,
-                           address_encrypted, address_iv
-                    FROM patients
-                    WHERE last_name ILIKE %s 
-                       OR first_name ILIKE %s 
-                       OR middle_name ILIKE %s
-                    ORDER BY last_name, first_name
-                    LIMIT 50
-                """, (f'%{query}%', f'%{query}%', f'%{query}%'))
-            else:
-                cursor.execute("""
-                    SELECT id, first_name, last_name, middle_name, 
-                           birth_date, gender, phone, email
-                    FROM patients
-                    WHERE last_name ILIKE %s 
-                       OR first_name ILIKE %s 
-                       OR middle_name ILIKE %s
-                       OR phone LIKE %s
-                    ORDER BY last_name, first_name
-                    LIMIT 50
-                """, (f'%{query}%', f'%{query}%', f'%{query}%', f'%{query}%'))
+        fields = read_queries.patient_fields(request.args.get('fields'))
+        with db.get_cursor(cursor_factory=TUPLE_CURSOR) as cursor:
+            statements.execute(cursor, *read_queries.patient_search_statement(query, TDE_ENABLED, fields))
             
-            patients = cursor.fetchall()
-            formatted_patients = [format_patient_data(patient) for patient in patients]
+            patients = patient_rows.fetchall(cursor, tde_manager)
+            formatted_patients = format_patient_rows(patients)
             
         return jsonify({
             'patients': formatted_patients,
@@ -540,6 +679,8 @@ def search():
             'query': query
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Search error: {e}")
         return jsonify({'error': f'Ошибка поиска: {str(e)}'}), 500
@@ -555,57 +696,15 @@ def get_appointments():
     
     try:
         with db.get_cursor() as cursor:
-            where_clause = ""
-            params = []
-            
-            if status_filter:
-                where_clause = "WHERE a.status = %s"
-                params.append(status_filter)
+            count_statement, page_statement, params = read_queries.appointment_statements(status_filter)
             
-            count_query = f"""
-                SELECT COUNT(*) as total 
-                FROM appointments a
-                JOIN patients p ON a.patient_id = p.id
-                JOIN doctors d ON a.doctor_id = d.id
-                {where_clause}
-            """
-            cursor.execute(count_query, params)
+            statements.execute(cursor, count_statement, params)
             total = cursor.fetchone()['total']
             
-            main_query = f"""
-                SELECT a.*, 
-                       p.first_name || ' ' || p.last_name as patient_name,
-                       d.first_name || ' ' || d.last_name as doctor_name,
-                       d.specialization
-                FROM appointments a
-                JOIN patients p ON a.patient_id = p.id
-                JOIN doctors d ON a.doctor_id = d.id
-                {where_clause}
-                ORDER BY a.appointment_date DESC
-                LIMIT %s OFFSET %s
-            """
-            
-            cursor.execute(main_query, params + [per_page, offset])
+            statements.execute(cursor, page_statement, params + [per_page, offset])
             appointments = cursor.fetchall()
             
-            formatted_appointments = []
-            for appointment in appointments:
-                formatted = dict(appointment)
-                
-                formatted['appointment_date'] = format_datetime_russian(
-                    formatted['appointment_date']
-                )
-                
-                status_map = {
-                    'scheduled': 'запланирован',
-                    'completed': 'завершен', 
-                    'cancelled': 'отменен'
-                }
-                formatted['status'] = status_map.get(
-                    formatted['status'], formatted['status']
-                )
-                
-                formatted_appointments.append(formatted)
+            formatted_appointments = format_appointments(appointments)
             
             return jsonify({
                 'appointments': formatted_appointments,
@@ -634,16 +733,23 @@ def create_appointment():
             if field not in data:
                 return jsonify({'error': f'Отсутствует поле: {field}'}), 400
         
+        duration = data.get('duration_minutes', DEFAULT_APPOINTMENT_MINUTES)
+        if not isinstance(duration, int) or not 5 <= duration <= 480:
+            return jsonify({'error': 'duration_minutes должен быть целым числом от 5 до 480'}), 400
+        
         with db.get_cursor() as cursor:
+            # Пересечения с другими приемами врача и пациента проверяют
+            # ограничения исключения excl_appointments_*_overlap
             cursor.execute("""
                 INSERT INTO appointments 
-                (patient_id, doctor_id, appointment_date, status)
-                VALUES (%s, %s, %s, %s)
+                (patient_id, doctor_id, appointment_date, duration_minutes, status)
+                VALUES (%s, %s, %s, %s, %s)
                 RETURNING id, created_at
             """, (
                 data['patient_id'],
                 data['doctor_id'],
                 data['appointment_date'],
+                duration,
                 data.get('status', 'scheduled')
             ))
             
@@ -655,10 +761,77 @@ def create_appointment():
                 'message': 'Приём успешно создан'
             }), 201
             
+    except (pg_errors.ExclusionViolation, pg_errors.UniqueViolation) as e:
+        return appointment_conflict_response(e, data)
     except Exception as e:
         logger.error(f"Create appointment error: {e}")
         return jsonify({'error': f'Ошибка создания приёма: {str(e)}'}), 500
 
+def appointment_conflict_response(error, data):
+    """Ответ 409 на пересечение приемов с ближайшими свободными слотами врача"""
+    constraint = getattr(error.diag, 'constraint_name', None)
+    if constraint == 'excl_appointments_patient_overlap':
+        message = 'У пациента уже есть приём в это время'
+    elif constraint == 'unique_appointment':
+        message = 'Такой приём уже существует'
+    else:
+        message = 'Врач уже занят в это время'
+    
+    response = {'error': message, 'conflict': constraint}
+    
+    try:
+        requested = datetime.fromisoformat(str(data['appointment_date']).replace('Z', '+00:00'))
+        slots = find_free_slots(date_from=requested.date(), doctor_id=int(data['doctor_id']), limit=3)
+        response['suggestions'] = [slot['slot_start'].isoformat() for slot in slots]
+    except Exception as e:
+        logger.warning(f"Не удалось подобрать свободные слоты: {e}")
+    
+    return jsonify(response), 409
+
+@app.route('/api/appointments/free-slots', methods=['GET'])
+def get_free_slots():
+    """
+    Ближайшие свободные слоты приема
+    
+    Параметры: specialization, doctor_id, from (ГГГГ-ММ-ДД), days (по умолчанию 14), limit
+    """
+    try:
+        date_from = request.args.get('from')
+        try:
+            date_from = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+        except ValueError:
+            return jsonify({'error': 'Дата from должна быть в формате ГГГГ-ММ-ДД'}), 400
+        
+        slots = find_free_slots(
+            date_from=date_from,
+            days=request.args.get('days', DEFAULT_SEARCH_DAYS, type=int),
+            doctor_id=request.args.get('doctor_id', type=int),
+            specialization=request.args.get('specialization') or None,
+            limit=request.args.get('limit', 20, type=int)
+        )
+        
+        formatted_slots = []
+        for slot in slots:
+            formatted_slots.append({
+                'doctor_id': slot['doctor_id'],
+                'doctor_name': slot['doctor_name'],
+                'specialization': slot['specialization'],
+                'appointment_date': slot['slot_start'].isoformat(),
+                'end': slot['slot_end'].isoformat(),
+                'appointment_date_formatted': format_datetime_russian(slot['slot_start'])
+            })
+        
+        return jsonify({
+            'slots': formatted_slots,
+            'count': len(formatted_slots)
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Get free slots error: {e}")
+        return jsonify({'error': f'Ошибка поиска свободных слотов: {str(e)}'}), 500
+
 @app.route('/api/appointments-without-records', methods=['GET'])
 def get_appointments_without_records():
     """Получить завершённые приёмы без медицинских записей"""
@@ -701,38 +874,37 @@ def get_appointments_without_records():
 # === МЕДИЦИНСКИЕ ЗАПИСИ ===
 @app.route('/api/medical-records', methods=['GET'])
 def get_medical_records():
-    """Получить список медицинских записей"""
+    """
+    Получить список медицинских записей
+    
+    include=prescriptions добавляет назначения всех записей страницы
+    одним запросом
+    """
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
     offset = (page - 1) * per_page
+    include = set(filter(None, request.args.get('include', '').split(',')))
     
     try:
         with db.get_cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) as total FROM medical_records")
+            statements.execute(cursor, read_queries.MEDICAL_RECORDS_COUNT)
             total = cursor.fetchone()['total']
             
-            cursor.execute("""
-                SELECT mr.*, 
-                       a.appointment_date,
-                       p.first_name || ' ' || p.last_name as patient_name,
-                       d.first_name || ' ' || d.last_name as doctor_name
-                FROM medical_records mr
-                JOIN appointments a ON mr.appointment_id = a.id
-                JOIN patients p ON a.patient_id = p.id
-                JOIN doctors d ON a.doctor_id = d.id
-                ORDER BY mr.created_at DESC
-                LIMIT %s OFFSET %s
-            """, (per_page, offset))
+            statements.execute(cursor, read_queries.MEDICAL_RECORDS_PAGE, (per_page, offset))
             
             records = cursor.fetchall()
             
+            if 'prescriptions' in include:
+                loaders = LoaderSession(cursor, tde_manager)
+                prescriptions = loaders.loader(repositories.prescriptions, 'medical_record_id', many=True)
+                prescriptions.load_many(record['id'] for record in records)
+            
+            appointment_dates = format_datetime_column([record['appointment_date'] for record in records])
+            
             formatted_records = []
-            for record in records:
+            for record, appointment_date in zip(records, appointment_dates):
                 formatted = dict(record)
-                
-                formatted['appointment_date'] = format_datetime_russian(
-                    formatted['appointment_date']
-                )
+                formatted['appointment_date'] = appointment_date
                 
                 # Расшифровываем диагноз если он зашифрован
                 if TDE_ENABLED and formatted.get('diagnosis_encrypted') and formatted.get('diagnosis_iv'):
@@ -750,6 +922,9 @@ def get_medical_records():
                 if 'diagnosis_iv' in formatted:
                     del formatted['diagnosis_iv']
                 
+                if 'prescriptions' in include:
+                    formatted['prescriptions'] = prescriptions.get(formatted['id'])
+                
                 formatted_records.append(formatted)
             
             return jsonify({
@@ -771,53 +946,16 @@ def get_medical_record_with_decryption(record_id):
     """Получить медицинскую запись с расшифровкой диагноза"""
     try:
         with db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT mr.*, a.appointment_date,
-                       p.first_name || ' ' || p.last_name as patient_name,
-                       d.first_name || ' ' || d.last_name as doctor_name
-                FROM medical_records mr
-                JOIN appointments a ON mr.appointment_id = a.id
-                JOIN patients p ON a.patient_id = p.id
-                JOIN doctors d ON a.doctor_id = d.id
-                WHERE mr.id = %s
-            """, (record_id,))
+            statements.execute(cursor, read_queries.MEDICAL_RECORD, (record_id,))
             
             record = cursor.fetchone()
             
             if not record:
                 return jsonify({'error': 'Медицинская запись не найдена'}), 404
             
-            formatted_record = dict(record)
-            
-            # Расшифровываем диагноз
-            if record['diagnosis_encrypted'] and record['diagnosis_iv']:
-                try:
-                    decrypted = safe_decrypt_field('medical_records', 'diagnosis',
-                                                 bytes(record['diagnosis_encrypted']),
-                                                 bytes(record['diagnosis_iv']))
-                    formatted_record['diagnosis'] = decrypted or "Ошибка расшифровки"
-                except Exception as e:
-                    logger.error(f"Decryption error: {e}")
-                    formatted_record['diagnosis'] = f"Ошибка расшифровки: {e}"
-            else:
-                formatted_record['diagnosis'] = "Диагноз не зашифрован"
-            
-            if 'diagnosis_encrypted' in formatted_record:
-                del formatted_record['diagnosis_encrypted']
-            if 'diagnosis_iv' in formatted_record:
-                del formatted_record['diagnosis_iv']
-            
-            formatted_record['appointment_date'] = format_datetime_russian(
-                formatted_record['appointment_date']
-            )
-            
-            cursor.execute("""
-                SELECT * FROM prescriptions 
-                WHERE medical_record_id = %s
-                ORDER BY id
-            """, (record_id,))
-            
-            formatted_record['prescriptions'] = cursor.fetchall()
+            formatted_record = format_medical_record(record)
+            formatted_record['prescriptions'] = repositories.prescriptions.find_by(
+                cursor, 'medical_record_id', [record_id], tde_manager=tde_manager)
             
             return jsonify(formatted_record)
             
@@ -827,7 +965,7 @@ def get_medical_record_with_decryption(record_id):
 
 @app.route('/api/medical-records', methods=['POST'])
 def create_medical_record():
-    """Создать медицинскую запись с шифрованным диагнозом"""
+    """Создать медицинскую запись с шифрованным диагнозом (один запрос к БД)"""
     try:
         data = request.get_json()
         if not data:
@@ -838,134 +976,126 @@ def create_medical_record():
             if field not in data:
                 return jsonify({'error': f'Отсутствует поле: {field}'}), 400
         
-        diagnosis_encrypted = None
-        diagnosis_iv = None
+        result = medical_records.create_medical_record(data)
+        if 'error' in result:
+            return jsonify({'error': result['error']}), 400
         
-        if TDE_ENABLED and tde_manager:
-            try:
-                diagnosis_encrypted, diagnosis_iv = safe_encrypt_field('medical_records', 'diagnosis', data['diagnosis'])
-                logger.info("Диагноз зашифрован с TDE")
-            except Exception as e:
-                logger.error(f"Ошибка шифрования диагноза: {e}")
-        
-        with db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT id, status FROM appointments 
-                WHERE id = %s
-            """, (data['appointment_id'],))
-            
-            appointment = cursor.fetchone()
-            if not appointment:
-                return jsonify({'error': 'Приём не найден'}), 400
-            
-            cursor.execute("""
-                SELECT id FROM medical_records 
-                WHERE appointment_id = %s
-            """, (data['appointment_id'],))
-            
-            existing_record = cursor.fetchone()
-            if existing_record:
-                return jsonify({'error': 'Медицинская запись для этого приёма уже существует'}), 400
-            
-            cursor.execute("""
-                UPDATE appointments 
-                SET status = 'completed' 
-                WHERE id = %s
-            """, (data['appointment_id'],))
-            
-            if TDE_ENABLED:
-                # Вставка с зашифрованным диагнозом
-                cursor.execute("""
-                    INSERT INTO medical_records 
-                    (appointment_id, diagnosis_encrypted, diagnosis_iv, 
-                     complaints, examination_results)
-                    VALUES (%s, %s, %s, %s, %s)
-                    RETURNING id, created_at
-                """, (
-                    data['appointment_id'],
-                    diagnosis_encrypted,
-                    diagnosis_iv,
-                    data.get('complaints'),
-                    data.get('examination_results')
-                ))
-            else:
-                # Вставка без шифрования
-                cursor.execute("""
-                    INSERT INTO medical_records 
-                    (appointment_id, complaints, examination_results)
-                    VALUES (%s, %s, %s)
-                    RETURNING id, created_at
-                """, (
-                    data['appointment_id'],
-                    data.get('complaints'),
-                    data.get('examination_results')
-                ))
-            
-            result = cursor.fetchone()
-            record_id = result['id']
-            
-            if 'prescriptions' in data and data['prescriptions']:
-                for prescription in data['prescriptions']:
-                    if prescription.get('medication_name'):
-                        cursor.execute("""
-                            INSERT INTO prescriptions 
-                            (medical_record_id, medication_name, dosage, 
-                             frequency, duration, notes)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                        """, (
-                            record_id,
-                            prescription['medication_name'],
-                            prescription.get('dosage'),
-                            prescription.get('frequency'),
-                            prescription.get('duration'),
-                            prescription.get('notes')
-                        ))
-            
-            return jsonify({
-                'id': record_id,
-                'created_at': format_datetime_russian(result['created_at']),
-                'message': 'Медицинская запись успешно создана'
-            }), 201
+        return jsonify({
+            'id': result['id'],
+            'created_at': format_datetime_russian(result['created_at']),
+            'prescriptions_count': result['prescriptions_count'],
+            'message': 'Медицинская запись успешно создана'
+        }), 201
             
     except Exception as e:
         logger.error(f"Create medical record error: {e}")
         return jsonify({'error': f'Ошибка создания медкарты: {str(e)}'}), 500
 
+@app.route('/api/medical-records/batch', methods=['POST'])
+def create_medical_records_batch():
+    """Закрыть пакет приемов: медкарты и назначения одним запросом к БД"""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('records'), list):
+            return jsonify({'error': 'Ожидается {"records": [...]}'}), 400
+        
+        results = medical_records.create_medical_records(data['records'])
+        for result in results:
+            if 'created_at' in result:
+                result['created_at'] = format_datetime_russian(result['created_at'])
+        
+        created = sum(1 for result in results if 'error' not in result)
+        return jsonify({
+            'created': created,
+            'failed': len(results) - created,
+            'results': results
+        }), 201 if created else 400
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Create medical records batch error: {e}")
+        return jsonify({'error': f'Ошибка создания медкарт: {str(e)}'}), 500
+
 # === СТАТИСТИКА ===
 @app.route('/api/statistics', methods=['GET'])
+@conditional_get(('patients', 'doctors', 'appointments', 'medical_records'))
 def get_statistics():
-    """Получить статистику системы"""
+    """Получить статистику системы (из сводки; ?fresh=true - точный подсчет)"""
     try:
-        with db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    (SELECT COUNT(*) FROM patients) as total_patients,
-                    (SELECT COUNT(*) FROM doctors) as total_doctors,
-                    (SELECT COUNT(*) FROM appointments) as total_appointments,
-                    (SELECT COUNT(*) FROM appointments WHERE status = 'scheduled') as scheduled_appointments,
-                    (SELECT COUNT(*) FROM medical_records) as total_records
-            """)
-            general_stats = cursor.fetchone()
-            
-            cursor.execute("""
-                SELECT d.id, d.first_name, d.last_name, d.specialization,
-                       COUNT(a.id) as appointment_count
-                FROM doctors d
-                LEFT JOIN appointments a ON d.id = a.doctor_id
-                GROUP BY d.id, d.first_name, d.last_name, d.specialization
-                ORDER BY appointment_count DESC
-            """)
-            doctors_stats = cursor.fetchall()
-            
-            return jsonify({
-                'general': dict(general_stats),
-                'doctors': [dict(doc) for doc in doctors_stats]
-            })
+        fresh = request.args.get('fresh', 'false').lower() == 'true'
+        return jsonify(statistics_store.get_statistics(fresh=fresh))
             
     except Exception as e:
         logger.error(f"Get statistics error: {e}")
         return jsonify({'error': f'Ошибка получения статистики: {str(e)}'}), 500
 
+@app.route('/api/statistics/timeseries', methods=['GET'])
+def get_statistics_timeseries():
+    """
+    Количество приемов по дням/неделям/месяцам
+    
+    Параметры: granularity=day|week|month, from/to (ГГГГ-ММ-ДД),
+    group_by=status|doctor|specialization, doctor_id, specialization, status
+    """
+    try:
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        
+        try:
+            date_from = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+            date_to = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+        except ValueError:
+            return jsonify({'error': 'Даты from и to должны быть в формате ГГГГ-ММ-ДД'}), 400
+        
+        timeseries = statistics_store.get_appointment_timeseries(
+            granularity=request.args.get('granularity', 'day'),
+            date_from=date_from,
+            date_to=date_to,
+            group_by=request.args.get('group_by') or None,
+            doctor_id=request.args.get('doctor_id', type=int),
+            specialization=request.args.get('specialization') or None,
+            status=request.args.get('status') or None
+        )
+        return jsonify(timeseries)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Get statistics timeseries error: {e}")
+        return jsonify({'error': f'Ошибка получения временного ряда: {str(e)}'}), 500
+
+# === ВЫГРУЗКА ===
+@app.route('/api/export/<entity>', methods=['GET'])
+def export_entity(entity):
+    """
+    Потоковая выгрузка пациентов, приемов или медкарт
+    
+    Параметры: format=ndjson|csv, since (ГГГГ-ММ-ДД или ISO дата-время),
+    after_id - продолжить выгрузку после указанного id
+    """
+    try:
+        fmt = request.args.get('format', 'ndjson')
+        since = request.args.get('since')
+        after_id = request.args.get('after_id', 0, type=int)
+        
+        try:
+            since = datetime.fromisoformat(since) if since else None
+        except ValueError:
+            return jsonify({'error': 'since должен быть в формате ГГГГ-ММ-ДД или ГГГГ-ММ-ДДTЧЧ:ММ:СС'}), 400
+        
+        chunks = data_export.export_rows(entity, fmt, since=since, after_id=after_id)
+        
+        return Response(chunks, mimetype=data_export.EXPORT_CONTENT_TYPES[fmt], headers={
+            'Content-Disposition': f'attachment; filename={entity}.{fmt}'
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Export error: {e}")
+        return jsonify({'error': f'Ошибка выгрузки: {str(e)}'}), 500
+
 # === ДОПОЛНИТЕЛЬНЫЕ ФУНКЦИИ ===
 
 def clear_quick_search():
@@ -1001,25 +1131,7 @@ def get_doctors():
             """)
             doctors = cursor.fetchall()
             
-            formatted_doctors = []
-            for doctor in doctors:
-                formatted = dict(doctor)
-                
-                # Форматируем телефон
-                if formatted['phone']:
-                    digits = ''.join(filter(str.isdigit, formatted['phone']))
-                    if len(digits) == 11:
-                        formatted['phone'] = f"+7 ({digits[1:4]}) {digits[4:7]}-{digits[7:9]}-{digits[9:11]}"
-                else:
-                    formatted['phone'] = "не указан"
-                
-                # Форматируем email
-                if not formatted['email']:
-                    formatted['email'] = "не указан"
-                
-                formatted_doctors.append(formatted)
-            
-            return jsonify({'doctors': formatted_doctors})
+            return jsonify({'doctors': [format_doctor_contacts(doctor) for doctor in doctors]})
             
     except Exception as e:
         logger.error(f"Get doctors error: {e}")
@@ -1030,35 +1142,14 @@ def get_doctor(doctor_id):
     """Получить данные врача по ID"""
     try:
         with db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT d.*, 
-                       COUNT(DISTINCT a.id) as total_appointments
-                FROM doctors d
-                LEFT JOIN appointments a ON d.id = a.doctor_id
-                WHERE d.id = %s
-                GROUP BY d.id
-            """, (doctor_id,))
+            statements.execute(cursor, read_queries.DOCTOR, (doctor_id,))
             
             doctor = cursor.fetchone()
             
             if not doctor:
                 return jsonify({'error': 'Врач не найден'}), 404
             
-            formatted_doctor = dict(doctor)
-            
-            # Форматируем телефон
-            if formatted_doctor['phone']:
-                digits = ''.join(filter(str.isdigit, formatted_doctor['phone']))
-                if len(digits) == 11:
-                    formatted_doctor['phone'] = f"+7 ({digits[1:4]}) {digits[4:7]}-{digits[7:9]}-{digits[9:11]}"
-            else:
-                formatted_doctor['phone'] = "не указан"
-            
-            # Форматируем email
-            if not formatted_doctor['email']:
-                formatted_doctor['email'] = "не указан"
-                
-            return jsonify(formatted_doctor)
+            return jsonify(format_doctor_contacts(doctor))
             
     except Exception as e:
         logger.error(f"Get doctor error: {e}")
@@ -1067,9 +1158,26 @@ def get_doctor(doctor_id):
 # === ДОПОЛНИТЕЛЬНЫЕ API МАРШРУТЫ ===
 
 @app.route('/api/patients/list', methods=['GET'])
+@conditional_get(('patients',))
 def get_patients_list():
-    """Получить упрощенный список пациентов для выпадающих списков"""
+    """
+    Получить упрощенный список пациентов для выпадающих списков
+    
+    fields=id,last_name,first_name - только то, что показывает список,
+    без чтения и расшифровки контактов
+    """
     try:
+        fields = read_queries.patient_fields(request.args.get('fields'))
+        if fields is not None:
+            with db.get_cursor(cursor_factory=TUPLE_CURSOR) as cursor:
+                statements.execute(cursor, read_queries.patients_page_statement(TDE_ENABLED, fields), (1000, 0))
+                patients = patient_rows.fetchall(cursor, tde_manager)
+            
+            if patients:
+                for field in patients[0].__decrypted__:
+                    format_column(patients, field, lambda values: [value or "не указан" for value in values])
+            return jsonify({'patients': patients, 'count': len(patients)})
+        
         with db.get_cursor() as cursor:
             if TDE_ENABLED:
                 cursor.execute("""
@@ -1123,11 +1231,14 @@ def get_patients_list():
                 'count': len(formatted_patients)
             })
             
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Get patients list error: {e}")
         return jsonify({'error': f'Ошибка получения списка пациентов: {str(e)}'}), 500
 
 @app.route('/api/doctors/list', methods=['GET'])
+@conditional_get(('doctors',))
 def get_doctors_list():
     """Получить упрощенный список врачей для выпадающих списков"""
     try:
@@ -1223,29 +1334,6 @@ def method_not_allowed(error):
 
 # === ДОПОЛНИТЕЛЬНЫЕ УТИЛИТЫ ===
 
-def validate_patient_data(data):
-    """Валидация данных пациента"""
-    errors = []
-    
-    if not data.get('first_name'):
-        errors.append('Имя обязательно')
-    if not data.get('last_name'):
-        errors.append('Фамилия обязательна')
-    if not data.get('birth_date'):
-        errors.append('Дата рождения обязательна')
-    if not data.get('gender') or data['gender'] not in ['M', 'F']:
-        errors.append('Пол должен быть M или F')
-    
-    if data.get('email') and '@' not in data['email']:
-        errors.append('Неверный формат email')
-    
-    if data.get('phone'):
-        digits = ''.join(filter(str.isdigit, data['phone']))
-        if len(digits) < 10:
-            errors.append('Неверный формат телефона')
-    
-    return errors
-
 def format_validation_errors(errors):
     """Форматирование ошибок валидации"""
     if not errors:
@@ -1326,6 +1414,48 @@ def debug_database_structure():
         logger.error(f"Debug database structure error: {e}")
         return jsonify({'error': f'Ошибка проверки структуры БД: {str(e)}'}), 500
 
+@app.route('/api/debug/slow-queries', methods=['GET', 'DELETE'])
+def debug_slow_queries():
+    """Топ медленных SQL-запросов по отпечаткам (DELETE - очистить журнал)"""
+    from src.database.slow_query_log import slow_query_log
+    
+    if request.method == 'DELETE':
+        slow_query_log.reset()
+        return jsonify({'message': 'Журнал медленных запросов очищен'})
+    
+    try:
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        sort = request.args.get('sort', 'total')
+        if sort not in ('total', 'max', 'count'):
+            return jsonify({'error': 'sort должен быть total, max или count'}), 400
+        
+        return jsonify(slow_query_log.report(limit=limit, sort=sort))
+        
+    except Exception as e:
+        logger.error(f"Debug slow queries error: {e}")
+        return jsonify({'error': f'Ошибка получения журнала медленных запросов: {str(e)}'}), 500
+
+@app.route('/api/debug/prepared-statements', methods=['GET', 'DELETE'])
+def debug_prepared_statements():
+    """Статистика подготовленных запросов и кэш планов одного подключения (DELETE - обнулить счетчики)"""
+    from src.database.prepared_statements import PLAN_CACHE_QUERY
+    
+    if request.method == 'DELETE':
+        statements.reset()
+        return jsonify({'message': 'Счетчики подготовленных запросов обнулены'})
+    
+    try:
+        report = statements.report()
+        with db.get_cursor() as cursor:
+            cursor.execute(PLAN_CACHE_QUERY)
+            report['connection_plans'] = statements.plan_cache(cursor.fetchall())
+        
+        return jsonify(report)
+        
+    except Exception as e:
+        logger.error(f"Debug prepared statements error: {e}")
+        return jsonify({'error': f'Ошибка получения статистики подготовленных запросов: {str(e)}'}), 500
+
 # === ЗАПУСК ПРИЛОЖЕНИЯ ===
 
 if __name__ == '__main__':
@@ -0,0 +1,115 @@
+"""
+Статические файлы из памяти: web_interface.html и static/
+
+При запуске файлы читаются один раз, сжимаются gzip и получают имя с
+хешем содержимого (js/date-fix.js -> js/date-fix.<хеш>.js). Ссылки
+/static/... в HTML заменяются на имена с хешем. Файлы с хешем отдаются с
+Cache-Control на год (immutable), HTML и старые имена без хеша - с ETag и
+no-cache (повторная загрузка страницы - ответ 304). Во время работы
+файловая система не используется; после изменения файлов нужен перезапуск.
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+from pathlib import Path
+from typing import Dict, Optional
+
+from flask import request, Response
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_LENGTH = 10
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+GZIP_MIN_SIZE = 256  # Меньшие файлы не выигрывают от сжатия
+
+
+class StaticAsset:
+    """Файл в памяти: исходное и сжатое содержимое, ETag"""
+    
+    __slots__ = ('name', 'fingerprinted_name', 'mimetype', 'content', 'gzipped', 'etag')
+    
+    def __init__(self, name: str, content: bytes, mimetype: Optional[str] = None):
+        digest = hashlib.sha256(content).hexdigest()
+        path = Path(name)
+        
+        self.name = name
+        self.fingerprinted_name = str(path.with_name(
+            f"{path.stem}.{digest[:FINGERPRINT_LENGTH]}{path.suffix}")).replace('\\', '/')
+        self.mimetype = mimetype or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.content = content
+        self.etag = digest[:20]
+        
+        gzipped = gzip.compress(content, compresslevel=9, mtime=0) if len(content) >= GZIP_MIN_SIZE else None
+        self.gzipped = gzipped if gzipped and len(gzipped) < len(content) else None
+    
+    def response(self, immutable: bool = False) -> Response:
+        """Ответ с учетом If-None-Match и Accept-Encoding"""
+        use_gzip = self.gzipped is not None and bool(request.accept_encodings['gzip'])
+        etag = f'{self.etag}-gzip' if use_gzip else self.etag
+        
+        if request.if_none_match.contains(self.etag) or request.if_none_match.contains(f'{self.etag}-gzip'):
+            response = Response(status=304)
+        else:
+            response = Response(self.gzipped if use_gzip else self.content, mimetype=self.mimetype)
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+        
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+class StaticAssets:
+    """Реестр статических файлов, загруженных при запуске"""
+    
+    def __init__(self):
+        self.assets: Dict[str, StaticAsset] = {}
+        self.fingerprinted: Dict[str, StaticAsset] = {}
+        self.index: Optional[StaticAsset] = None
+    
+    def load(self, static_dir: Path, index_path: Path) -> 'StaticAssets':
+        """
+        Чтение static/ и главной страницы
+        
+        Args:
+            static_dir: Каталог статических файлов (URL /static/...)
+            index_path: HTML главной страницы
+        """
+        if static_dir.is_dir():
+            for path in sorted(static_dir.rglob('*')):
+                if path.is_file():
+                    name = path.relative_to(static_dir).as_posix()
+                    asset = StaticAsset(name, path.read_bytes())
+                    self.assets[name] = asset
+                    self.fingerprinted[asset.fingerprinted_name] = asset
+        
+        if index_path.is_file():
+            html = index_path.read_text(encoding='utf-8')
+            for name, asset in self.assets.items():
+                html = html.replace(f'/static/{name}', self.url_for(name))
+            self.index = StaticAsset(index_path.name, html.encode('utf-8'), 'text/html')
+        
+        total = sum(len(asset.content) for asset in self.assets.values())
+        logger.info(f"📦 Статика в памяти: {len(self.assets)} файлов ({total} байт), "
+                    f"главная страница: {'да' if self.index else 'нет'}")
+        return self
+    
+    def url_for(self, name: str) -> str:
+        """URL файла с хешем содержимого"""
+        asset = self.assets.get(name)
+        return f'/static/{asset.fingerprinted_name}' if asset else f'/static/{name}'
+    
+    def serve(self, filename: str) -> Optional[Response]:
+        """Ответ для /static/<filename> или None, если файла нет"""
+        asset = self.fingerprinted.get(filename)
+        if asset is not None:
+            return asset.response(immutable=True)
+        
+        asset = self.assets.get(filename)
+        if asset is not None:
+            return asset.response(immutable=False)
+        
+        return None
@@ -25,4 +25,47 @@ class Validators:
         if not input_str:
             return ""
         sanitized = re.sub(r'[<>&"\'`]', '', input_str)
-        return sanitized[:max_length].strip()
\ No newline at end of file
+        return sanitized[:max_length].strip()
+
+
+def normalize_phone(phone: str) -> Optional[str]:
+    """
+    Приведение российского номера к формату +7XXXXXXXXXX
+    
+    Returns:
+        Optional[str]: Нормализованный номер или None, если цифр меньше 10
+    """
+    digits = ''.join(filter(str.isdigit, phone))
+    if len(digits) < 10:
+        return None
+    
+    if len(digits) == 11 and digits.startswith('8'):
+        digits = '7' + digits[1:]
+    if len(digits) == 10:
+        digits = '7' + digits
+    
+    return f"+{digits}"
+
+
+def validate_patient_data(data):
+    """Валидация данных пациента"""
+    errors = []
+    
+    if not data.get('first_name'):
+        errors.append('Имя обязательно')
+    if not data.get('last_name'):
+        errors.append('Фамилия обязательна')
+    if not data.get('birth_date'):
+        errors.append('Дата рождения обязательна')
+    if not data.get('gender') or data['gender'] not in ['M', 'F']:
+        errors.append('Пол должен быть M или F')
+    
+    if data.get('email') and '@' not in data['email']:
+        errors.append('Неверный формат email')
+    
+    if data.get('phone'):
+        digits = ''.join(filter(str.isdigit, data['phone']))
+        if len(digits) < 10:
+            errors.append('Неверный формат телефона')
+    
+    return errors
@@ -1,25 +1,81 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+_env_loaded = False
 
-class Config:
-    # Database
-    DB_HOST = os.getenv('DB_HOST', 'localhost')
-    DB_PORT = int(os.getenv('DB_PORT', 5432))
-    DB_NAME = os.getenv('DB_NAME', 'medical_records')
-    DB_USER = os.getenv('DB_USER', 'postgres')
-    DB_PASSWORD = os.getenv('DB_PASSWORD', '')
+
+def load_env():
+    """
+    Загрузка .env в окружение процесса (один раз) и перечитывание config
+    
+    Импорт модулей src окружение не меняет: .env загружают точки входа
+    (run.py, src/server.py, модули приложений API) до импорта модулей,
+    читающих настройки при импорте, а также DatabaseConnection.initialize()
+    и менеджер ключей TDE. Переменные, уже заданные в окружении, не
+    перезаписываются.
     
-    # Security
-    SECRET_KEY = os.getenv('SECRET_KEY', 'dev-key-change-in-production')
-    ENCRYPTION_KEY_FILE = os.getenv('ENCRYPTION_KEY_FILE', '.encryption_key')
-    JWT_EXPIRATION_HOURS = int(os.getenv('JWT_EXPIRATION_HOURS', 24))
+    Returns:
+        Config: Перечитанные настройки
+    """
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+        config.reload()
+    return config
+
+
+class Config:
+    def __init__(self):
+        self.reload()
     
-    # API
-    API_HOST = os.getenv('API_HOST', '0.0.0.0')
-    API_PORT = int(os.getenv('API_PORT', 8000))
-    API_DEBUG = os.getenv('API_DEBUG', 'False').lower() == 'true'
+    def reload(self):
+        """Чтение настроек из окружения"""
+        # Database
+        self.DB_HOST = os.getenv('DB_HOST', 'localhost')
+        self.DB_PORT = int(os.getenv('DB_PORT', 5432))
+        self.DB_NAME = os.getenv('DB_NAME', 'medical_records')
+        self.DB_USER = os.getenv('DB_USER', 'postgres')
+        self.DB_PASSWORD = os.getenv('DB_PASSWORD', '')
+        self.DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 0))  # 0 - подключение на каждый запрос
+        self.DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10.0))
+        # Подготовленные запросы (PREPARE после N выполнений на одном подключении)
+        self.PREPARED_STATEMENTS_ENABLED = os.getenv('PREPARED_STATEMENTS_ENABLED', 'True').lower() == 'true'
+        self.PREPARE_THRESHOLD = int(os.getenv('PREPARE_THRESHOLD', 2))
+        
+        # Security
+        self.SECRET_KEY = os.getenv('SECRET_KEY', 'dev-key-change-in-production')
+        self.ENCRYPTION_KEY_FILE = os.getenv('ENCRYPTION_KEY_FILE', '.encryption_key')
+        self.JWT_EXPIRATION_HOURS = int(os.getenv('JWT_EXPIRATION_HOURS', 24))
+        self.TDE_ENABLED = os.getenv('TDE_ENABLED', 'False').lower() == 'true'
+        
+        # API
+        self.API_HOST = os.getenv('API_HOST', '0.0.0.0')
+        self.API_PORT = int(os.getenv('API_PORT', 8000))
+        self.API_DEBUG = os.getenv('API_DEBUG', 'False').lower() == 'true'
+        self.API_WORKERS = int(os.getenv('API_WORKERS', 0))  # 0 - по числу CPU (2 * CPU + 1)
+        self.API_THREADS = int(os.getenv('API_THREADS', 4))
+        # Асинхронный вариант API (python src/api/async_app.py)
+        self.ASYNC_API_PORT = int(os.getenv('ASYNC_API_PORT', 8001))
+        self.ASYNC_DB_POOL_MIN = int(os.getenv('ASYNC_DB_POOL_MIN', 2))
+        self.ASYNC_DB_POOL_MAX = int(os.getenv('ASYNC_DB_POOL_MAX', 20))
+        self.ASYNC_DB_POOL_TIMEOUT = float(os.getenv('ASYNC_DB_POOL_TIMEOUT', 10.0))
+        self.ASYNC_DECRYPT_THREADS = int(os.getenv('ASYNC_DECRYPT_THREADS', 4))
+        self.JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')  # auto | orjson | stdlib
+        
+        # Сжатие ответов и условные GET
+        self.COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True').lower() == 'true'
+        self.COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+        self.COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', 6))
+        self.ETAG_ENABLED = os.getenv('ETAG_ENABLED', 'True').lower() == 'true'
+        self.ETAG_WATERMARK_TTL = float(os.getenv('ETAG_WATERMARK_TTL', 1.0))
+        
+        # Мониторинг
+        self.METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+        self.SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'False').lower() == 'true'
+        self.SLOW_QUERY_LOG_ENABLED = os.getenv('SLOW_QUERY_LOG_ENABLED', 'True').lower() == 'true'
+        self.SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+        self.SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0))
     
     @property
     def database_url(self):
@@ -0,0 +1,47 @@
+"""
+Общие функции массовой загрузки: пакетное шифрование TDE и COPY
+"""
+import csv
+import io
+from datetime import date, datetime
+
+
+def encrypt_rows(tde_manager, table_name: str, rows: list, fields: list) -> None:
+    """
+    Пакетное шифрование полей: как в API, открытое значение не сохраняется.
+    Отсутствующее в строке поле шифруется как пустое (NULL).
+    """
+    for field in fields:
+        encrypted = tde_manager.encrypt_batch(table_name, field, [row.pop(field, None) for row in rows])
+        for row, (ciphertext, iv) in zip(rows, encrypted):
+            row[f'{field}_encrypted'] = ciphertext
+            row[f'{field}_iv'] = iv
+
+
+def _copy_value(value):
+    """Преобразование значения в текст для COPY CSV (None -> NULL)"""
+    if value is None:
+        return None
+    if isinstance(value, (bytes, memoryview)):
+        return '\\x' + bytes(value).hex()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def copy_rows(cursor, table_name: str, columns: list, rows: list) -> int:
+    """Загрузка строк через COPY ... FROM STDIN (CSV)"""
+    if not rows:
+        return 0
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row.get(column)) for column in columns])
+    buffer.seek(0)
+    
+    cursor.copy_expert(
+        f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+    return len(rows)
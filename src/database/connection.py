@@ -1,58 +1,87 @@
+"""
+Подключение к PostgreSQL (синглтон db) с поддержкой TDE
+
+Импорт модуля не выполняет подключений и не меняет окружение процесса:
+загрузка .env, настройка UTF-8 и логирования, загрузка модуля TDE и вывод
+ключей выполняются при первом использовании db (или явно через
+db.initialize()).
+
+По умолчанию на каждый get_connection/get_cursor открывается новое
+подключение. При DB_POOL_SIZE > 0 подключения берутся из пула процесса:
+они переиспользуются между запросами, поэтому на них окупаются
+подготовленные запросы (src/database/prepared_statements.py).
+"""
 import psycopg2
+from psycopg2 import pool as pg_pool
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
 import logging
 import os
 import sys
-
-from dotenv import load_dotenv
-load_dotenv()
-
-# Устанавливаем UTF-8 для всей системы
-if sys.platform.startswith('win'):
-    # Для Windows устанавливаем кодовую страницу UTF-8
-    os.system('chcp 65001 > nul')
-
-# Устанавливаем переменные окружения для UTF-8
-os.environ['PYTHONIOENCODING'] = 'utf-8'
-os.environ['LANG'] = 'en_US.UTF-8'
-os.environ['LC_ALL'] = 'en_US.UTF-8'
+import threading
 
 # Добавляем корневую папку проекта в sys.path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
 sys.path.insert(0, project_root)
 
-try:
-    from src.config import Config
-    config = Config()
-except ImportError:
-    from dotenv import load_dotenv
-    load_dotenv()
-    
-    class SimpleConfig:
-        DB_HOST = os.getenv('DB_HOST')
-        DB_PORT = os.getenv('DB_PORT')
-        DB_NAME = os.getenv('DB_NAME')
-        DB_USER = os.getenv('DB_USER')
-        DB_PASSWORD = os.getenv('DB_PASSWORD')
+from src.config import config, load_env
+from src.database.instrumentation import instrument_cursor
+
+
+def configure_utf8_environment():
+    """UTF-8 для процесса и дочерних процессов (backup, psql)"""
+    if sys.platform.startswith('win'):
+        # Для Windows устанавливаем кодовую страницу UTF-8
+        os.system('chcp 65001 > nul')
     
-    config = SimpleConfig()
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+    os.environ['LANG'] = 'en_US.UTF-8'
+    os.environ['LC_ALL'] = 'en_US.UTF-8'
 
-# Импортируем TDE только если включен
-TDE_ENABLED = os.getenv('TDE_ENABLED').lower() == 'true'
 
-if TDE_ENABLED:
-    try:
-        from src.security.tde import TDEDatabaseConnection, TDEManager
-        print("🔒 TDE модуль загружен")
-    except ImportError as e:
-        print(f"⚠️ TDE недоступен: {e}")
-        TDE_ENABLED = False
+def configure_logging():
+    """Настройка логирования с UTF-8 (если приложение не настроило его само)"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    
+    # Устанавливаем кодировку для логгера
+    for handler in logging.root.handlers:
+        if hasattr(handler, 'stream') and hasattr(handler.stream, 'reconfigure'):
+            try:
+                handler.stream.reconfigure(encoding='utf-8')
+            except:
+                pass
+
 
 class DatabaseConnection:
     def __init__(self):
-        self.connection_params = {
+        self.connection_params = self._read_connection_params()
+        
+        self.logger = logging.getLogger(__name__)
+        
+        # .env, TDE и настройка окружения - при первом использовании (initialize)
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._tde_enabled = False
+        self._tde_connection = None
+        self._tde_manager = None
+        
+        # Пул подключений (DB_POOL_SIZE > 0) создается при первом запросе в процессе
+        self._pool = None
+        self._pool_pid = None
+        self._pool_slots = None
+        self._inherited_pools = []
+    
+    @staticmethod
+    def _read_connection_params():
+        """Параметры подключения из config"""
+        return {
             'host': config.DB_HOST,
             'port': int(config.DB_PORT) if config.DB_PORT else 5432,
             'database': config.DB_NAME,
@@ -61,40 +90,141 @@ class DatabaseConnection:
             'client_encoding': 'UTF8',
             'options': '-c client_encoding=UTF8 -c timezone=UTC'
         }
+    
+    def initialize(self):
+        """
+        Загрузка .env, настройка UTF-8, логирования и TDE (вывод ключей)
         
-        # Настройка логирования с UTF-8
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        Вызывается автоматически при первом подключении или обращении к
+        tde_manager; явный вызов нужен, чтобы вывести ключи заранее (например,
+        в мастер-процессе сервера до fork воркеров).
+        """
+        if self._initialized:
+            return self
         
-        # Устанавливаем кодировку для логгера
-        for handler in logging.root.handlers:
-            if hasattr(handler, 'stream') and hasattr(handler.stream, 'reconfigure'):
+        with self._init_lock:
+            if self._initialized:
+                return self
+            
+            # Настройки подключения и TDE_ENABLED - с учетом .env
+            load_env()
+            self.connection_params = self._read_connection_params()
+            self._tde_enabled = config.TDE_ENABLED
+            
+            configure_utf8_environment()
+            configure_logging()
+            
+            if self._tde_enabled:
                 try:
-                    handler.stream.reconfigure(encoding='utf-8')
-                except:
-                    pass
+                    from src.security.tde import TDEDatabaseConnection, TDEManager
+                    self._tde_connection = TDEDatabaseConnection(self.connection_params)
+                    self._tde_manager = TDEManager()
+                    self.logger.info("🔒 TDE активирован для базы данных")
+                except ImportError as e:
+                    self.logger.warning(f"⚠️ TDE недоступен: {e}")
+            else:
+                self.logger.info("📖 TDE отключен, используется обычное подключение")
+            
+            self._initialized = True
         
-        self.logger = logging.getLogger(__name__)
+        return self
+    
+    @property
+    def tde_enabled(self) -> bool:
+        """Включен ли TDE (TDE_ENABLED из окружения или .env)"""
+        self.initialize()
+        return self._tde_enabled
+    
+    @property
+    def tde_connection(self):
+        self.initialize()
+        return self._tde_connection
+    
+    @tde_connection.setter
+    def tde_connection(self, value):
+        self._tde_connection = value
+    
+    @property
+    def tde_manager(self):
+        self.initialize()
+        return self._tde_manager
+    
+    @tde_manager.setter
+    def tde_manager(self, value):
+        self._tde_manager = value
+    
+    def _get_pool(self):
+        """
+        Пул подключений текущего процесса или None (DB_POOL_SIZE = 0)
         
-        # Инициализация TDE если включен
-        if TDE_ENABLED:
-            self.tde_connection = TDEDatabaseConnection(self.connection_params)
-            self.tde_manager = TDEManager()
-            self.logger.info("🔒 TDE активирован для базы данных")
-        else:
-            self.tde_connection = None
-            self.tde_manager = None
-            self.logger.info("📖 TDE отключен, используется обычное подключение")
+        После fork пул создается заново: подключения родителя принадлежат
+        ему, а их закрытие в дочернем процессе оборвало бы сессии родителя
+        (PQfinish отправляет Terminate в общий сокет), поэтому унаследованный
+        пул только удерживается от сборки мусора.
+        """
+        if config.DB_POOL_SIZE <= 0:
+            return None
+        
+        pid = os.getpid()
+        if self._pool is not None and self._pool_pid == pid:
+            return self._pool
+        
+        with self._init_lock:
+            if self._pool is None or self._pool_pid != pid:
+                if self._pool is not None:
+                    self._inherited_pools.append(self._pool)
+                # minconn = maxconn: psycopg2 закрывает возвращенные подключения сверх minconn
+                self._pool = pg_pool.ThreadedConnectionPool(config.DB_POOL_SIZE, config.DB_POOL_SIZE,
+                                                            **self.connection_params)
+                # ThreadedConnectionPool не ждет свободного подключения - ожидание через семафор
+                self._pool_slots = threading.BoundedSemaphore(config.DB_POOL_SIZE)
+                self._pool_pid = pid
+                self.logger.info(f"🔌 Пул подключений: {config.DB_POOL_SIZE} (PID {pid})")
+        return self._pool
+    
+    def close_pool(self):
+        """Закрытие подключений пула текущего процесса (например, в мастере до fork)"""
+        with self._init_lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.closeall()
+            self._pool = None
+            self._pool_pid = None
+    
+    @contextmanager
+    def _pooled_connection(self, pool):
+        """Подключение из пула: commit/rollback как у обычного, затем возврат в пул"""
+        if not self._pool_slots.acquire(timeout=config.DB_POOL_TIMEOUT):
+            raise pg_pool.PoolError(f"Нет свободного подключения за {config.DB_POOL_TIMEOUT} с")
+        
+        conn = None
+        try:
+            conn = pool.getconn()
+            yield conn
+            conn.commit()
+        except Exception as e:
+            if conn is not None and not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+            self.logger.error(f"Database error: {e}")
+            raise e
+        finally:
+            if conn is not None:
+                # Оборванное подключение не возвращаем в оборот
+                pool.putconn(conn, close=bool(conn.closed))
+            self._pool_slots.release()
     
     @contextmanager
     def get_connection(self):
         """Контекстный менеджер для подключения к БД с UTF-8"""
-        if TDE_ENABLED and self.tde_connection:
+        self.initialize()
+        pool = self._get_pool()
+        if pool is not None:
+            # UTF-8 и UTC уже заданы в options подключения
+            with self._pooled_connection(pool) as conn:
+                yield conn
+        elif self._tde_enabled and self.tde_connection:
             # Используем TDE подключение
             with self.tde_connection.get_connection() as conn:
                 yield conn
@@ -124,16 +254,21 @@ class DatabaseConnection:
     @contextmanager
     def get_cursor(self, cursor_factory=RealDictCursor):
         """Контекстный менеджер для курсора БД с UTF-8"""
-        if TDE_ENABLED and self.tde_connection:
+        self.initialize()
+        if self._tde_enabled and self.tde_connection and self._get_pool() is None:
             # Используем TDE курсор
             with self.tde_connection.get_cursor(cursor_factory) as cursor:
-                yield cursor
+                yield instrument_cursor(cursor)
         else:
-            # Обычный курсор с UTF-8
+            # Обычный курсор с UTF-8 (или TDE курсор на подключении из пула)
             with self.get_connection() as conn:
                 cursor = conn.cursor(cursor_factory=cursor_factory)
                 try:
-                    yield cursor
+                    if self._tde_enabled and self.tde_connection:
+                        from src.security.tde import TDECursor
+                        yield instrument_cursor(TDECursor(cursor, self.tde_connection.tde))
+                    else:
+                        yield instrument_cursor(cursor)
                 finally:
                     cursor.close()
     
@@ -168,7 +303,7 @@ class DatabaseConnection:
             'database': self.connection_params['database'],
             'user': self.connection_params['user'],
             'client_encoding': self.connection_params['client_encoding'],
-            'tde_enabled': TDE_ENABLED
+            'tde_enabled': self.tde_enabled
         }
         
         # Дополнительная информация о кодировке
@@ -186,7 +321,7 @@ class DatabaseConnection:
         except Exception as e:
             info['encoding_error'] = str(e)
         
-        if TDE_ENABLED and self.tde_manager:
+        if self._tde_enabled and self.tde_manager:
             info['tde_info'] = self.tde_manager.get_encryption_info()
         
         return info
@@ -221,7 +356,7 @@ class DatabaseConnection:
         Миграция существующих данных под TDE
         ВНИМАНИЕ: Эта операция изменит все существующие данные!
         """
-        if not TDE_ENABLED or not self.tde_manager:
+        if not self.tde_enabled or not self.tde_manager:
             raise ValueError("TDE не активирован")
         
         self.logger.warning("🚨 НАЧИНАЕТСЯ МИГРАЦИЯ ДАННЫХ ПОД TDE")
@@ -369,7 +504,7 @@ if __name__ == "__main__":
                                 print(f"     Пример: {sample['first_name']} {sample.get('last_name', '')}")
                     
                     # Тест TDE если включен
-                    if TDE_ENABLED and db.tde_manager:
+                    if db.tde_enabled and db.tde_manager:
                         print("\n🔒 Тест TDE с UTF-8...")
                         
                         # Создаем тестовую запись с кириллицей
@@ -0,0 +1,208 @@
+"""
+Потоковая выгрузка пациентов, приемов и медкарт в NDJSON или CSV
+
+Строки читаются серверным курсором порциями по EXPORT_BATCH_SIZE,
+зашифрованные поля каждой порции расшифровываются TDEManager.decrypt_batch,
+и порция сразу отдается клиенту. Память и время до первого байта не зависят
+от размера таблицы; COUNT(*) не выполняется. Для дозагрузки используются
+since= (изменения с момента) и after_id= (продолжение с последнего id).
+"""
+import csv
+import io
+import json
+import logging
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+
+from psycopg2.extras import RealDictCursor
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.database.connection import db
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_BATCH_SIZE = 2000
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# columns - порядок полей в выгрузке; encrypted - поля, которые при TDE
+# хранятся в <поле>_encrypted/<поле>_iv; since - столбец для фильтра since=
+EXPORT_ENTITIES = {
+    'patients': {
+        'table': 'patients',
+        'columns': ['id', 'first_name', 'last_name', 'middle_name', 'birth_date', 'gender',
+                    'phone', 'email', 'address', 'created_at', 'updated_at'],
+        'encrypted': ['phone', 'email', 'address'],
+        'since': 'updated_at',
+    },
+    'appointments': {
+        'table': 'appointments',
+        'columns': ['id', 'patient_id', 'doctor_id', 'appointment_date', 'duration_minutes',
+                    'status', 'created_at'],
+        'encrypted': [],
+        'since': 'created_at',
+    },
+    'medical-records': {
+        'table': 'medical_records',
+        'columns': ['id', 'appointment_id', 'diagnosis', 'complaints', 'examination_results',
+                    'created_at', 'prescriptions'],
+        'encrypted': ['diagnosis'],
+        'since': 'created_at',
+        # Назначения записи одним массивом (индекс idx_prescriptions_medical_record)
+        'computed': {
+            'prescriptions': """
+                COALESCE((
+                    SELECT json_agg(json_build_object(
+                        'medication_name', p.medication_name, 'dosage', p.dosage,
+                        'frequency', p.frequency, 'duration', p.duration, 'notes', p.notes
+                    ) ORDER BY p.id)
+                    FROM prescriptions p
+                    WHERE p.medical_record_id = t.id
+                ), '[]'::json)
+            """,
+        },
+        # Без TDE диагноз хранить негде (в схеме только diagnosis_encrypted)
+        'plain_missing': ['diagnosis'],
+    },
+}
+
+
+def _select_list(entity: dict) -> str:
+    """Список выражений SELECT с учетом TDE"""
+    expressions = []
+    for column in entity['columns']:
+        if column in entity.get('computed', {}):
+            expressions.append(f"{entity['computed'][column].strip()} AS {column}")
+        elif column in entity['encrypted'] and db.tde_enabled:
+            expressions.append(f"t.{column}_encrypted, t.{column}_iv")
+        elif column in entity.get('plain_missing', []):
+            expressions.append(f"NULL AS {column}")
+        else:
+            expressions.append(f"t.{column}")
+    return ',\n               '.join(expressions)
+
+
+def build_export_query(entity_name: str, since: Optional[datetime] = None) -> str:
+    """SQL выгрузки: порядок по id, фильтры since/after_id"""
+    entity = EXPORT_ENTITIES[entity_name]
+    conditions = ["t.id > %(after_id)s"]
+    if since is not None:
+        conditions.append(f"t.{entity['since']} >= %(since)s")
+    
+    return f"""
+        SELECT {_select_list(entity)}
+        FROM {entity['table']} t
+        WHERE {' AND '.join(conditions)}
+        ORDER BY t.id
+    """
+
+
+def _decrypt_rows(entity: dict, rows: list) -> list:
+    """Пакетная расшифровка полей порции строк"""
+    if not db.tde_enabled or not db.tde_manager or not entity['encrypted']:
+        return rows
+    
+    for field in entity['encrypted']:
+        encrypted_field = f'{field}_encrypted'
+        iv_field = f'{field}_iv'
+        pairs = [(row.pop(encrypted_field, None), row.pop(iv_field, None)) for row in rows]
+        values = db.tde_manager.decrypt_batch(entity['table'], field, pairs)
+        for row, value in zip(rows, values):
+            row[field] = value
+    return rows
+
+
+def _export_value(value):
+    """Значение в JSON-совместимый вид"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return value
+
+
+def _format_ndjson(rows: list, columns: list) -> str:
+    return ''.join(
+        json.dumps({column: _export_value(row.get(column)) for column in columns},
+                   ensure_ascii=False) + '\n'
+        for row in rows
+    )
+
+
+def _format_csv(rows: list, columns: list) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        values = []
+        for column in columns:
+            value = _export_value(row.get(column))
+            if isinstance(value, (list, dict)):
+                value = json.dumps(value, ensure_ascii=False)
+            values.append(value)
+        writer.writerow(values)
+    return buffer.getvalue()
+
+
+def export_rows(entity_name: str, fmt: str = 'ndjson', since: Optional[datetime] = None,
+                after_id: int = 0, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Потоковая выгрузка таблицы
+    
+    Параметры проверяются сразу, подключение к БД открывается только
+    при чтении первой порции генератора.
+    
+    Args:
+        entity_name: 'patients', 'appointments' или 'medical-records'
+        fmt: 'ndjson' или 'csv' (CSV начинается с заголовка)
+        since: Только строки, созданные/измененные с этого момента
+        after_id: Только строки с id больше указанного (продолжение выгрузки)
+        batch_size: Строк в порции
+    
+    Returns:
+        Generator[str]: Текстовые фрагменты выгрузки
+    
+    Raises:
+        ValueError: Неизвестная сущность или формат
+    """
+    if entity_name not in EXPORT_ENTITIES:
+        raise ValueError(f"Неизвестная сущность: {entity_name}. "
+                         f"Доступны: {', '.join(EXPORT_ENTITIES)}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format должен быть одним из: {', '.join(EXPORT_FORMATS)}")
+    
+    entity = EXPORT_ENTITIES[entity_name]
+    columns = entity['columns']
+    query = build_export_query(entity_name, since)
+    params = {'after_id': after_id, 'since': since}
+    formatter = _format_csv if fmt == 'csv' else _format_ndjson
+    
+    def generate():
+        if fmt == 'csv':
+            header = io.StringIO()
+            csv.writer(header).writerow(columns)
+            yield header.getvalue()
+        
+        exported = 0
+        with db.get_connection() as conn:
+            # Именованный курсор - серверный: строки не загружаются в память целиком
+            with conn.cursor(name=f"export_{entity['table']}", cursor_factory=RealDictCursor) as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    rows = _decrypt_rows(entity, [dict(row) for row in rows])
+                    exported += len(rows)
+                    yield formatter(rows, columns)
+        
+        logger.info(f"📤 Выгрузка {entity_name}: {exported} строк")
+    
+    return generate()
@@ -0,0 +1,479 @@
+"""
+Генератор большого синтетического набора данных для нагрузочного тестирования
+
+Создает пациентов с русскими ФИО, врачей по всем специализациям из
+DOCTOR_SPECIALIZATIONS, приемы по рабочему расписанию, медицинские записи
+и назначения. Данные шифруются через TDEManager пакетами и загружаются
+через COPY. Результат детерминирован по seed: пациенты делятся на чанки
+фиксированного размера, у каждого чанка свой генератор случайных чисел,
+поэтому набор данных не зависит от количества процессов.
+
+Пример:
+    python src/database/generate_data.py --patients 1000000 --seed 42 --workers 8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from multiprocessing import Pool
+from pathlib import Path
+
+# Добавляем корневую папку в path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.models import DOCTOR_SPECIALIZATIONS
+from src.database.bulk import encrypt_rows, copy_rows
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# === СПРАВОЧНИКИ ===
+
+MALE_FIRST_NAMES = [
+    'Александр', 'Алексей', 'Андрей', 'Антон', 'Артем', 'Борис', 'Вадим', 'Валерий',
+    'Виктор', 'Владимир', 'Дмитрий', 'Евгений', 'Егор', 'Иван', 'Игорь', 'Илья',
+    'Кирилл', 'Константин', 'Максим', 'Михаил', 'Николай', 'Олег', 'Павел', 'Петр',
+    'Роман', 'Сергей', 'Степан', 'Тимофей', 'Федор', 'Юрий'
+]
+
+FEMALE_FIRST_NAMES = [
+    'Александра', 'Алена', 'Алина', 'Анастасия', 'Анна', 'Валентина', 'Вера', 'Виктория',
+    'Галина', 'Дарья', 'Екатерина', 'Елена', 'Елизавета', 'Ирина', 'Ксения', 'Людмила',
+    'Марина', 'Мария', 'Надежда', 'Наталья', 'Ольга', 'Полина', 'Светлана', 'София',
+    'Татьяна', 'Юлия'
+]
+
+# Мужские формы фамилий; женская форма строится в female_last_name()
+LAST_NAMES = [
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов',
+    'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов', 'Егоров',
+    'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Орлов', 'Андреев', 'Макаров', 'Никитин',
+    'Захаров', 'Зайцев', 'Соловьев', 'Борисов', 'Яковлев', 'Григорьев', 'Романов', 'Воробьев',
+    'Сергеев', 'Фролов', 'Беляев', 'Ковалев', 'Ильин', 'Гусев', 'Титов', 'Кудрявцев',
+    'Баранов', 'Куликов', 'Белов', 'Комаров', 'Киселев', 'Медведев', 'Жуков', 'Тарасов',
+    'Вишневский', 'Ковальский', 'Островский', 'Покровский'
+]
+
+# Отчества от мужских имен: (мужское, женское)
+PATRONYMICS = [
+    ('Александрович', 'Александровна'), ('Алексеевич', 'Алексеевна'), ('Андреевич', 'Андреевна'),
+    ('Борисович', 'Борисовна'), ('Викторович', 'Викторовна'), ('Владимирович', 'Владимировна'),
+    ('Дмитриевич', 'Дмитриевна'), ('Евгеньевич', 'Евгеньевна'), ('Иванович', 'Ивановна'),
+    ('Игоревич', 'Игоревна'), ('Константинович', 'Константиновна'), ('Максимович', 'Максимовна'),
+    ('Михайлович', 'Михайловна'), ('Николаевич', 'Николаевна'), ('Олегович', 'Олеговна'),
+    ('Павлович', 'Павловна'), ('Петрович', 'Петровна'), ('Романович', 'Романовна'),
+    ('Сергеевич', 'Сергеевна'), ('Юрьевич', 'Юрьевна')
+]
+
+CITIES = ['Москва', 'Санкт-Петербург', 'Новосибирск', 'Екатеринбург', 'Казань',
+          'Нижний Новгород', 'Самара', 'Ростов-на-Дону', 'Уфа', 'Краснодар']
+
+STREETS = ['Ленина', 'Пушкина', 'Гагарина', 'Садовая', 'Мира', 'Советская', 'Лесная',
+           'Школьная', 'Молодежная', 'Центральная', 'Тверская', 'Невский пр.']
+
+EMAIL_DOMAINS = ['mail.ru', 'yandex.ru', 'gmail.com', 'bk.ru', 'rambler.ru']
+
+COMPLAINTS = [
+    'Головная боль, слабость', 'Кашель, температура 38°C', 'Боль в груди при нагрузке',
+    'Боль в спине', 'Головокружение', 'Боль в горле', 'Бессонница, тревожность',
+    'Боль в животе после еды', 'Сыпь на коже', 'Снижение зрения', 'Боль в суставах'
+]
+
+EXAMINATIONS = [
+    'Температура 36.6°C, давление 120/80', 'Температура 37.8°C, хрипы в легких',
+    'ЭКГ без патологий', 'Давление 145/95, пульс 88', 'Отечность слизистой',
+    'Болезненность при пальпации', 'Рефлексы сохранены', 'Кожные покровы чистые'
+]
+
+DIAGNOSES = [
+    'ОРВИ', 'Острый бронхит', 'Гипертоническая болезнь II ст.', 'Остеохондроз поясничного отдела',
+    'Мигрень', 'Острый фарингит', 'Гастрит', 'Атопический дерматит', 'Миопия',
+    'Артроз коленного сустава', 'Ишемическая болезнь сердца', 'Вегетососудистая дистония'
+]
+
+MEDICATIONS = [
+    ('Парацетамол', '500мг'), ('Ибупрофен', '400мг'), ('Амоксициллин', '500мг'),
+    ('Лизиноприл', '10мг'), ('Омепразол', '20мг'), ('Цетиризин', '10мг'),
+    ('Амброксол', '30мг'), ('Диклофенак', '50мг'), ('Аторвастатин', '20мг'),
+    ('Глицин', '100мг'), ('Мелоксикам', '15мг')
+]
+
+FREQUENCIES = ['1 раз в день', '2 раза в день', '3 раза в день', 'при болях']
+DURATIONS = ['3 дня', '5 дней', '7 дней', '10 дней', '14 дней', '1 месяц']
+
+# === ПАРАМЕТРЫ РАСПИСАНИЯ ===
+
+WORK_DAY_START_HOUR = 9
+WORK_DAY_END_HOUR = 18
+SLOT_MINUTES = 30                  # Совпадает с DEFAULT appointments.duration_minutes
+FUTURE_DAYS = 90                   # Горизонт будущих записей
+MAX_SLOT_ATTEMPTS = 50             # Попыток найти свободный слот для одного визита
+MAX_APPOINTMENTS_PER_PATIENT = 8   # Шаг ID приемов на одного пациента
+MAX_PRESCRIPTIONS_PER_RECORD = 4   # Шаг ID назначений на одну запись
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def female_last_name(last_name: str) -> str:
+    """Женская форма фамилии"""
+    if last_name.endswith('ский'):
+        return last_name[:-2] + 'ая'
+    if last_name.endswith(('ов', 'ев', 'ин')):
+        return last_name + 'а'
+    return last_name
+
+
+def random_person(rnd: random.Random, gender: str) -> tuple:
+    """(имя, фамилия, отчество) для указанного пола"""
+    last_name = rnd.choice(LAST_NAMES)
+    male_patronymic, female_patronymic = rnd.choice(PATRONYMICS)
+    
+    if gender == 'M':
+        return rnd.choice(MALE_FIRST_NAMES), last_name, male_patronymic
+    return rnd.choice(FEMALE_FIRST_NAMES), female_last_name(last_name), female_patronymic
+
+
+def random_phone(rnd: random.Random) -> str:
+    """Мобильный номер в формате +7XXXXXXXXXX"""
+    return f"+79{rnd.randint(0, 999999999):09d}"
+
+
+def random_owned_slot(rnd: random.Random, doctor_id: int, start: date, days: int,
+                     chunk_index: int, chunks: int) -> datetime:
+    """
+    Случайный слот приема врача в рабочий день, принадлежащий чанку
+    
+    Слот (врач, день, время) принадлежит чанку
+    (doctor_id + номер_слота_от_начала_эпохи) % chunks, поэтому чанки,
+    генерируемые параллельно, никогда не записывают врача на одно время
+    (ограничение excl_appointments_doctor_overlap). Возвращает None,
+    если у врача в периоде нет слотов этого чанка.
+    """
+    slots_per_day = (WORK_DAY_END_HOUR - WORK_DAY_START_HOUR) * 60 // SLOT_MINUTES
+    
+    for _ in range(MAX_SLOT_ATTEMPTS):
+        day = start + timedelta(days=rnd.randrange(days))
+        if day.weekday() >= 5:
+            continue
+        
+        first_slot = (chunk_index - doctor_id - day.toordinal() * slots_per_day) % chunks
+        if first_slot >= slots_per_day:
+            continue
+        
+        minutes = rnd.randrange(first_slot, slots_per_day, chunks) * SLOT_MINUTES
+        return datetime(day.year, day.month, day.day, WORK_DAY_START_HOUR) + timedelta(minutes=minutes)
+    
+    return None
+
+
+def generate_doctors(count: int, first_id: int, seed: int) -> list:
+    """Врачи равномерно по всем специализациям"""
+    rnd = random.Random(f"{seed}:doctors")
+    doctors = []
+    
+    for i in range(count):
+        doctor_id = first_id + i
+        gender = rnd.choice(['M', 'F'])
+        first_name, last_name, middle_name = random_person(rnd, gender)
+        doctors.append({
+            'id': doctor_id,
+            'first_name': first_name,
+            'last_name': last_name,
+            'middle_name': middle_name,
+            'specialization': DOCTOR_SPECIALIZATIONS[i % len(DOCTOR_SPECIALIZATIONS)],
+            # ЛИЦ-ГГГГ-NNNN: год сдвигается каждые 10000 врачей, чтобы номер был уникален
+            'license_number': f"ЛИЦ-{2000 + doctor_id // 10000:04d}-{doctor_id % 10000:04d}",
+            'phone': random_phone(rnd),
+            'email': f"doctor{doctor_id}@clinic.ru",
+        })
+    
+    return doctors
+
+
+def generate_chunk(chunk_index: int, chunk_size: int, total_patients: int, id_base: dict,
+                   doctor_ids: list, seed: int, today: date, years: int) -> dict:
+    """
+    Генерация одного чанка пациентов со всеми связанными строками
+    
+    ID вычисляются из номера пациента, поэтому чанки независимы:
+    прием и запись = номер * MAX_APPOINTMENTS_PER_PATIENT + визит,
+    назначение = (номер визита) * MAX_PRESCRIPTIONS_PER_RECORD + n.
+    Слоты врачей поделены между чанками (random_owned_slot), поэтому
+    и расписания врачей в разных чанках не пересекаются.
+    """
+    rnd = random.Random(f"{seed}:chunk:{chunk_index}")
+    history_start = today - timedelta(days=365 * years)
+    history_days = (today - history_start).days
+    chunks = (total_patients + chunk_size - 1) // chunk_size
+    booked_doctor_slots = set()
+    
+    patients, appointments, records, prescriptions = [], [], [], []
+    first = chunk_index * chunk_size
+    last = min(first + chunk_size, total_patients)
+    
+    for n in range(first, last):
+        patient_id = id_base['patients'] + n
+        gender = rnd.choice(['M', 'F'])
+        first_name, last_name, middle_name = random_person(rnd, gender)
+        birth_date = today - timedelta(days=rnd.randint(18 * 365, 90 * 365))
+        
+        patients.append({
+            'id': patient_id,
+            'first_name': first_name,
+            'last_name': last_name,
+            'middle_name': middle_name,
+            'birth_date': birth_date,
+            'gender': gender,
+            'phone': random_phone(rnd),
+            'email': f"patient{patient_id}@{rnd.choice(EMAIL_DOMAINS)}",
+            'address': (f"г. {rnd.choice(CITIES)}, ул. {rnd.choice(STREETS)}, "
+                        f"д. {rnd.randint(1, 150)}, кв. {rnd.randint(1, 300)}"),
+        })
+        
+        # Приемы: прошлые по истории и немного будущих записей
+        visits = min(MAX_APPOINTMENTS_PER_PATIENT, int(rnd.expovariate(1 / 4)))
+        used_slots = set()
+        
+        for visit in range(visits):
+            is_future = rnd.random() < 0.15
+            doctor_id = rnd.choice(doctor_ids)
+            if is_future:
+                slot = random_owned_slot(rnd, doctor_id, today + timedelta(days=1), FUTURE_DAYS,
+                                         chunk_index, chunks)
+            else:
+                slot = random_owned_slot(rnd, doctor_id, history_start, history_days,
+                                         chunk_index, chunks)
+            
+            # Ни пациент, ни врач не могут быть на двух приемах одновременно
+            if slot is None or slot in used_slots or (doctor_id, slot) in booked_doctor_slots:
+                continue
+            used_slots.add(slot)
+            booked_doctor_slots.add((doctor_id, slot))
+            
+            visit_number = n * MAX_APPOINTMENTS_PER_PATIENT + visit
+            appointment_id = id_base['appointments'] + visit_number
+            if is_future:
+                status = 'scheduled'
+            else:
+                status = 'cancelled' if rnd.random() < 0.1 else 'completed'
+            
+            appointments.append({
+                'id': appointment_id,
+                'patient_id': patient_id,
+                'doctor_id': doctor_id,
+                'appointment_date': slot,
+                'status': status,
+                'created_at': slot - timedelta(days=rnd.randint(1, 30)),
+            })
+            
+            if status != 'completed' or rnd.random() < 0.1:
+                continue
+            
+            record_id = id_base['medical_records'] + visit_number
+            records.append({
+                'id': record_id,
+                'appointment_id': appointment_id,
+                'diagnosis': rnd.choice(DIAGNOSES),
+                'complaints': rnd.choice(COMPLAINTS),
+                'examination_results': rnd.choice(EXAMINATIONS),
+                'created_at': slot + timedelta(minutes=SLOT_MINUTES),
+            })
+            
+            for k in range(rnd.randint(0, MAX_PRESCRIPTIONS_PER_RECORD - 1)):
+                medication_name, dosage = rnd.choice(MEDICATIONS)
+                prescriptions.append({
+                    'id': id_base['prescriptions'] + visit_number * MAX_PRESCRIPTIONS_PER_RECORD + k,
+                    'medical_record_id': record_id,
+                    'medication_name': medication_name,
+                    'dosage': dosage,
+                    'frequency': rnd.choice(FREQUENCIES),
+                    'duration': rnd.choice(DURATIONS),
+                    'notes': None,
+                })
+    
+    return {
+        'patients': patients,
+        'appointments': appointments,
+        'medical_records': records,
+        'prescriptions': prescriptions,
+    }
+
+
+# === СТОЛБЦЫ ДЛЯ COPY ===
+
+TABLE_COLUMNS = {
+    'doctors': ['id', 'first_name', 'last_name', 'middle_name', 'specialization',
+                'license_number', 'phone', 'email'],
+    'patients': ['id', 'first_name', 'last_name', 'middle_name', 'birth_date', 'gender',
+                 'phone', 'email', 'address'],
+    'patients_tde': ['id', 'first_name', 'last_name', 'middle_name', 'birth_date', 'gender',
+                     'phone_encrypted', 'phone_iv', 'email_encrypted', 'email_iv',
+                     'address_encrypted', 'address_iv'],
+    'appointments': ['id', 'patient_id', 'doctor_id', 'appointment_date', 'status', 'created_at'],
+    'medical_records': ['id', 'appointment_id', 'complaints', 'examination_results', 'created_at'],
+    'medical_records_tde': ['id', 'appointment_id', 'diagnosis_encrypted', 'diagnosis_iv',
+                            'complaints', 'examination_results', 'created_at'],
+    'prescriptions': ['id', 'medical_record_id', 'medication_name', 'dosage', 'frequency',
+                      'duration', 'notes'],
+}
+
+
+# Состояние процесса-воркера (инициализируется один раз на процесс)
+_worker_tde = None
+
+
+def _init_worker(tde_enabled: bool):
+    """Инициализация воркера: собственный TDEManager (PBKDF2 один раз на процесс)"""
+    global _worker_tde
+    if tde_enabled:
+        from src.security.tde import TDEManager
+        _worker_tde = TDEManager()
+
+
+def load_chunk(args: tuple) -> dict:
+    """Сгенерировать, зашифровать и загрузить один чанк (выполняется в воркере)"""
+    chunk_index, chunk_size, total_patients, id_base, doctor_ids, seed, today, years, dry_run = args
+    from src.database.connection import db
+    
+    data = generate_chunk(chunk_index, chunk_size, total_patients, id_base,
+                          doctor_ids, seed, today, years)
+    
+    if _worker_tde:
+        encrypt_rows(_worker_tde, 'patients', data['patients'], ['phone', 'email', 'address'])
+        encrypt_rows(_worker_tde, 'medical_records', data['medical_records'], ['diagnosis'])
+        patient_columns = TABLE_COLUMNS['patients_tde']
+        record_columns = TABLE_COLUMNS['medical_records_tde']
+    else:
+        # Без TDE диагноз хранить негде (в схеме только diagnosis_encrypted)
+        patient_columns = TABLE_COLUMNS['patients']
+        record_columns = TABLE_COLUMNS['medical_records']
+    
+    counts = {table: len(rows) for table, rows in data.items()}
+    if dry_run:
+        return counts
+    
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        copy_rows(cursor, 'patients', patient_columns, data['patients'])
+        copy_rows(cursor, 'appointments', TABLE_COLUMNS['appointments'], data['appointments'])
+        copy_rows(cursor, 'medical_records', record_columns, data['medical_records'])
+        copy_rows(cursor, 'prescriptions', TABLE_COLUMNS['prescriptions'], data['prescriptions'])
+        conn.commit()
+    
+    return counts
+
+
+def _next_ids(cursor) -> dict:
+    """Первые свободные ID в каждой таблице"""
+    id_base = {}
+    for table in ('patients', 'doctors', 'appointments', 'medical_records', 'prescriptions'):
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+        id_base[table] = cursor.fetchone()[0]
+    return id_base
+
+
+def _reset_sequences(cursor) -> None:
+    """Синхронизация SERIAL-последовательностей после загрузки с явными ID"""
+    for table in ('patients', 'doctors', 'appointments', 'medical_records', 'prescriptions'):
+        cursor.execute(f"""
+            SELECT setval(pg_get_serial_sequence('{table}', 'id'),
+                          COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)
+        """)
+
+
+def generate_dataset(patients: int, doctors: int = None, seed: int = 42, workers: int = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE, years: int = 3,
+                     dry_run: bool = False) -> dict:
+    """
+    Генерация и загрузка набора данных
+    
+    Args:
+        patients: Количество пациентов
+        doctors: Количество врачей (по умолчанию 1 на 500 пациентов)
+        seed: Seed генератора (одинаковый seed - одинаковые данные)
+        workers: Количество процессов (по умолчанию - число CPU)
+        chunk_size: Размер чанка пациентов
+        years: Глубина истории приемов в годах
+        dry_run: Только сгенерировать, не загружая в БД
+    
+    Returns:
+        dict: Количество строк по таблицам
+    """
+    from src.database.connection import db
+    
+    doctors = doctors or max(len(DOCTOR_SPECIALIZATIONS), patients // 500)
+    workers = workers or os.cpu_count() or 1
+    today = date.today()
+    start_time = time.time()
+    
+    logger.info(f"Генерация: {patients:,} пациентов, {doctors:,} врачей, seed={seed}, "
+                f"воркеров={workers}, TDE={'вкл' if db.tde_enabled else 'выкл'}")
+    
+    if dry_run:
+        id_base = {table: 1 for table in ('patients', 'doctors', 'appointments',
+                                           'medical_records', 'prescriptions')}
+    else:
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            id_base = _next_ids(cursor)
+    
+    # Врачи загружаются до пациентов: на них ссылаются приемы
+    doctor_rows = generate_doctors(doctors, id_base['doctors'], seed)
+    doctor_ids = [doctor['id'] for doctor in doctor_rows]
+    
+    if not dry_run:
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            copy_rows(cursor, 'doctors', TABLE_COLUMNS['doctors'], doctor_rows)
+            conn.commit()
+    
+    totals = {'doctors': len(doctor_rows), 'patients': 0, 'appointments': 0,
+              'medical_records': 0, 'prescriptions': 0}
+    
+    chunks = (patients + chunk_size - 1) // chunk_size
+    tasks = [(index, chunk_size, patients, id_base, doctor_ids, seed, today, years, dry_run)
+             for index in range(chunks)]
+    
+    with Pool(processes=workers, initializer=_init_worker, initargs=(db.tde_enabled,)) as pool:
+        for done, counts in enumerate(pool.imap_unordered(load_chunk, tasks), start=1):
+            for table, count in counts.items():
+                totals[table] += count
+            logger.info(f"Чанк {done}/{chunks}: {totals['patients']:,} пациентов, "
+                        f"{totals['appointments']:,} приемов")
+    
+    if not dry_run:
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            _reset_sequences(cursor)
+            for table in totals:
+                cursor.execute(f"ANALYZE {table}")
+            conn.commit()
+    
+    elapsed = time.time() - start_time
+    logger.info(f"✅ Готово за {elapsed:.1f}с: " +
+                ', '.join(f"{table}={count:,}" for table, count in totals.items()))
+    
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генератор синтетических данных медкарт')
+    parser.add_argument('--patients', type=int, default=100000, help='Количество пациентов')
+    parser.add_argument('--doctors', type=int, default=None, help='Количество врачей')
+    parser.add_argument('--seed', type=int, default=42, help='Seed генератора')
+    parser.add_argument('--workers', type=int, default=None, help='Количество процессов')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Размер чанка')
+    parser.add_argument('--years', type=int, default=3, help='Глубина истории приемов (лет)')
+    parser.add_argument('--dry-run', action='store_true', help='Сгенерировать без загрузки в БД')
+    args = parser.parse_args()
+    
+    generate_dataset(args.patients, args.doctors, args.seed, args.workers,
+                     args.chunk_size, args.years, args.dry_run)
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,79 @@
+"""
+Обертка курсора для учета времени SQL и количества строк в запросе API,
+а также для журнала медленных запросов
+"""
+import time
+
+from src.utils.metrics import current_request_stats, record_query, record_rows
+from src.database.slow_query_log import slow_query_log
+
+
+class InstrumentedCursor:
+    """
+    Курсор, замеряющий время execute и считающий строки fetch*
+    Работает поверх обычного курсора psycopg2 и поверх TDECursor
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def execute(self, query, params=None):
+        start_time = time.perf_counter()
+        succeeded = False
+        try:
+            result = self.cursor.execute(query, params)
+            succeeded = True
+            return result
+        finally:
+            # План снимаем только для успешно выполненных запросов
+            self._finish(query, params, time.perf_counter() - start_time, explain=succeeded)
+
+    def executemany(self, query, params_seq):
+        start_time = time.perf_counter()
+        try:
+            return self.cursor.executemany(query, params_seq)
+        finally:
+            self._finish(query, None, time.perf_counter() - start_time, explain=False)
+
+    def _finish(self, query, params, elapsed, explain=True):
+        """Учет выполненного запроса в метриках и журнале медленных запросов"""
+        record_query(elapsed)
+        if slow_query_log.is_slow(elapsed):
+            stats = current_request_stats.get()
+            slow_query_log.record(
+                query, params, elapsed,
+                endpoint=stats.endpoint if stats is not None else None,
+                cursor=self.cursor if explain else None
+            )
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is not None:
+            record_rows(1)
+        return row
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        record_rows(len(rows))
+        return rows
+
+    def fetchmany(self, size=None):
+        rows = self.cursor.fetchmany(size) if size is not None else self.cursor.fetchmany()
+        record_rows(len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self.cursor:
+            record_rows(1)
+            yield row
+
+    def __getattr__(self, name):
+        """Проксирование остальных методов к оригинальному курсору"""
+        return getattr(self.cursor, name)
+
+
+def instrument_cursor(cursor):
+    """Обернуть курсор, если идет учет метрик HTTP-запроса или включен журнал медленных запросов"""
+    if current_request_stats.get() is None and not slow_query_log.enabled:
+        return cursor
+    return InstrumentedCursor(cursor)
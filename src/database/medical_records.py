@@ -0,0 +1,232 @@
+"""
+Запись медицинских карт вместе с назначениями
+
+Прием, проверка существующей записи, смена статуса приема, вставка
+медкарты и всех назначений выполняются одним SQL-запросом (цепочка CTE),
+поэтому закрытие приема стоит один запрос к БД независимо от числа
+назначений. Пакетный вариант закрывает сразу много приемов тем же запросом.
+"""
+import logging
+import sys
+from pathlib import Path
+
+from psycopg2.extras import Json
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.database.connection import db
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_RECORDS = 500
+
+PRESCRIPTION_FIELDS = ['medication_name', 'dosage', 'frequency', 'duration', 'notes']
+
+ERROR_MESSAGES = {
+    'appointment_not_found': 'Приём не найден',
+    'record_exists': 'Медицинская запись для этого приёма уже существует',
+}
+
+# Блокировка приемов пакета до конца транзакции - та же, что берет триггер
+# уникальности check_medical_record_appointment (09_partitioning.sql).
+# Выполняется отдельным запросом до вставки: следующий запрос получает новый
+# снимок и видит медкарты, закоммиченные конкурентной транзакцией, пока
+# она держала блокировку. Порядок по id исключает взаимоблокировки пакетов.
+LOCK_APPOINTMENTS_QUERY = """
+    SELECT pg_advisory_xact_lock(hashtext('medical_records.appointment_id'), ids.id)
+    FROM (SELECT DISTINCT unnest(%s::int[]) AS id) ids
+    ORDER BY ids.id
+"""
+
+# Входные записи передаются одним JSONB-массивом; зашифрованный диагноз - в hex.
+# Приемы, у которых уже есть медкарта, отсеиваются в candidates: под
+# LOCK_APPOINTMENTS_QUERY конкурентная вставка для тех же приемов ждет
+# коммита и видит созданные записи. После 09_partitioning.sql ON CONFLICT
+# ничего не перехватывает - уникальность проверяет триггер, и он ошибся бы
+# на весь пакет без предварительной блокировки; у несекционированной
+# таблицы ON CONFLICT по индексу idx_medical_records_appointment страхует
+# от вставок в обход этой функции. Статус меняется только у приемов, для
+# которых запись действительно создана. Повтор приема внутри пакета
+# обрабатывается по первому вхождению.
+CREATE_RECORDS_QUERY = """
+    WITH input AS (
+        SELECT r.*
+        FROM jsonb_to_recordset(%s::jsonb) AS r(
+            idx INTEGER,
+            appointment_id INTEGER,
+            diagnosis_encrypted TEXT,
+            diagnosis_iv TEXT,
+            complaints TEXT,
+            examination_results TEXT,
+            prescriptions JSONB
+        )
+    ),
+    candidates AS (
+        SELECT DISTINCT ON (i.appointment_id) i.*
+        FROM input i
+        JOIN appointments a ON a.id = i.appointment_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM medical_records m WHERE m.appointment_id = i.appointment_id
+        )
+        ORDER BY i.appointment_id, i.idx
+    ),
+    records AS (
+        INSERT INTO medical_records
+            (appointment_id, diagnosis_encrypted, diagnosis_iv, complaints, examination_results)
+        SELECT c.appointment_id,
+               decode(c.diagnosis_encrypted, 'hex'),
+               decode(c.diagnosis_iv, 'hex'),
+               c.complaints,
+               c.examination_results
+        FROM candidates c
+        ORDER BY c.idx
+        ON CONFLICT DO NOTHING
+        RETURNING id, appointment_id, created_at
+    ),
+    completed AS (
+        UPDATE appointments a
+        SET status = 'completed'
+        FROM records r
+        WHERE a.id = r.appointment_id
+        RETURNING a.id
+    ),
+    prescribed AS (
+        INSERT INTO prescriptions
+            (medical_record_id, medication_name, dosage, frequency, duration, notes)
+        SELECT r.id, p.medication_name, p.dosage, p.frequency, p.duration, p.notes
+        FROM records r
+        JOIN candidates c ON c.appointment_id = r.appointment_id
+        CROSS JOIN jsonb_to_recordset(c.prescriptions) AS p(
+            medication_name TEXT, dosage TEXT, frequency TEXT, duration TEXT, notes TEXT
+        )
+        RETURNING medical_record_id
+    )
+    SELECT i.idx,
+           r.id,
+           r.created_at,
+           CASE
+               WHEN r.id IS NOT NULL THEN 'created'
+               WHEN a.id IS NULL THEN 'appointment_not_found'
+               ELSE 'record_exists'
+           END AS status,
+           COALESCE(pc.prescriptions_count, 0) AS prescriptions_count,
+           (SELECT COUNT(*) FROM completed) AS completed_count
+    FROM input i
+    LEFT JOIN appointments a ON a.id = i.appointment_id
+    LEFT JOIN candidates c ON c.idx = i.idx
+    LEFT JOIN records r ON r.appointment_id = c.appointment_id
+    LEFT JOIN (
+        SELECT medical_record_id, COUNT(*) AS prescriptions_count
+        FROM prescribed
+        GROUP BY medical_record_id
+    ) pc ON pc.medical_record_id = r.id
+    ORDER BY i.idx
+"""
+
+
+def _clean_prescriptions(prescriptions) -> list:
+    """Назначения без названия препарата пропускаются, как в POST /api/medical-records"""
+    if not isinstance(prescriptions, list):
+        return []
+    return [
+        {field: prescription.get(field) for field in PRESCRIPTION_FIELDS}
+        for prescription in prescriptions
+        if isinstance(prescription, dict) and prescription.get('medication_name')
+    ]
+
+
+def create_medical_records(records: list) -> list:
+    """
+    Создание медкарт с назначениями и закрытие приемов одним запросом
+    
+    Args:
+        records: Записи {'appointment_id', 'diagnosis', 'complaints',
+                 'examination_results', 'prescriptions': [...]}
+    
+    Returns:
+        list: Результат для каждой записи в исходном порядке:
+              {'appointment_id', 'id', 'created_at', 'prescriptions_count'}
+              или {'appointment_id', 'error'}
+    
+    Raises:
+        ValueError: Пустой или слишком большой пакет
+    """
+    if not records:
+        raise ValueError('Пакет записей пуст')
+    if len(records) > MAX_BATCH_RECORDS:
+        raise ValueError(f'В пакете не более {MAX_BATCH_RECORDS} записей')
+    
+    results = [None] * len(records)
+    payload = []
+    
+    for idx, record in enumerate(records):
+        if not isinstance(record, dict):
+            results[idx] = {'appointment_id': None, 'error': 'Ожидается объект записи'}
+            continue
+        
+        missing = [field for field in ('appointment_id', 'diagnosis') if field not in record]
+        if missing:
+            results[idx] = {'appointment_id': record.get('appointment_id'),
+                            'error': f'Отсутствует поле: {missing[0]}'}
+            continue
+        
+        try:
+            appointment_id = int(record['appointment_id'])
+        except (TypeError, ValueError):
+            results[idx] = {'appointment_id': record['appointment_id'],
+                            'error': 'appointment_id должен быть числом'}
+            continue
+        
+        payload.append({
+            'idx': idx,
+            'appointment_id': appointment_id,
+            'diagnosis': record['diagnosis'],
+            'complaints': record.get('complaints'),
+            'examination_results': record.get('examination_results'),
+            'prescriptions': _clean_prescriptions(record.get('prescriptions')),
+        })
+    
+    if payload:
+        # Без TDE диагноз хранить негде (в схеме только diagnosis_encrypted)
+        diagnoses = [item.pop('diagnosis') for item in payload]
+        diagnoses = [str(value) if value is not None else None for value in diagnoses]
+        if db.tde_enabled and db.tde_manager:
+            encrypted = db.tde_manager.encrypt_batch('medical_records', 'diagnosis', diagnoses)
+        else:
+            encrypted = [(None, None)] * len(payload)
+        
+        for item, (ciphertext, iv) in zip(payload, encrypted):
+            item['diagnosis_encrypted'] = ciphertext.hex() if ciphertext else None
+            item['diagnosis_iv'] = iv.hex() if iv else None
+        
+        with db.get_cursor() as cursor:
+            cursor.execute(LOCK_APPOINTMENTS_QUERY, ([item['appointment_id'] for item in payload],))
+            cursor.execute(CREATE_RECORDS_QUERY, (Json(payload),))
+            rows = cursor.fetchall()
+        
+        appointment_ids = {item['idx']: item['appointment_id'] for item in payload}
+        for row in rows:
+            idx = row['idx']
+            if row['status'] == 'created':
+                results[idx] = {
+                    'appointment_id': appointment_ids[idx],
+                    'id': row['id'],
+                    'created_at': row['created_at'],
+                    'prescriptions_count': row['prescriptions_count'],
+                }
+            else:
+                results[idx] = {
+                    'appointment_id': appointment_ids[idx],
+                    'error': ERROR_MESSAGES[row['status']],
+                }
+        
+        if rows:
+            logger.info(f"📝 Создано медкарт: {sum(1 for row in rows if row['status'] == 'created')} "
+                        f"из {len(records)}, закрыто приемов: {rows[0]['completed_count']}")
+    
+    return results
+
+
+def create_medical_record(record: dict) -> dict:
+    """Создание одной медкарты с назначениями (один запрос к БД)"""
+    return create_medical_records([record])[0]
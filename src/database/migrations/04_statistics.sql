@@ -0,0 +1,294 @@
+-- Материализованная статистика для /api/statistics
+-- =====================================================
+-- Счетчики хранятся в сводных таблицах и обновляются триггерами
+-- уровня оператора (FOR EACH STATEMENT) с transition-таблицами:
+-- одна операция UPDATE сводки на весь INSERT/COPY/DELETE, а не на каждую строку.
+-- Эндпоинт читает сводку за O(количество врачей).
+
+-- Общие счетчики системы
+CREATE TABLE IF NOT EXISTS statistics_counters (
+    name VARCHAR(50) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Количество приемов по врачам
+-- Без внешнего ключа: иначе TRUNCATE doctors без CASCADE перестал бы работать
+CREATE TABLE IF NOT EXISTS doctor_appointment_stats (
+    doctor_id INTEGER PRIMARY KEY,
+    appointment_count BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_doctor_appointment_stats_count
+ON doctor_appointment_stats(appointment_count DESC);
+
+
+-- Полный пересчет сводки (первичное заполнение, сверка, после TRUNCATE)
+-- =====================================================
+CREATE OR REPLACE FUNCTION refresh_statistics()
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO statistics_counters (name, value, updated_at)
+    VALUES
+        ('total_patients', (SELECT COUNT(*) FROM patients), CURRENT_TIMESTAMP),
+        ('total_doctors', (SELECT COUNT(*) FROM doctors), CURRENT_TIMESTAMP),
+        ('total_appointments', (SELECT COUNT(*) FROM appointments), CURRENT_TIMESTAMP),
+        ('scheduled_appointments', (SELECT COUNT(*) FROM appointments WHERE status = 'scheduled'), CURRENT_TIMESTAMP),
+        ('total_records', (SELECT COUNT(*) FROM medical_records), CURRENT_TIMESTAMP)
+    ON CONFLICT (name) DO UPDATE
+    SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at;
+
+    DELETE FROM doctor_appointment_stats;
+    INSERT INTO doctor_appointment_stats (doctor_id, appointment_count)
+    SELECT d.id, COUNT(a.id)
+    FROM doctors d
+    LEFT JOIN appointments a ON a.doctor_id = d.id
+    GROUP BY d.id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Изменение счетчика на delta
+CREATE OR REPLACE FUNCTION bump_statistics_counter(counter_name VARCHAR, delta BIGINT)
+RETURNS VOID AS $$
+BEGIN
+    IF delta <> 0 THEN
+        UPDATE statistics_counters
+        SET value = value + delta, updated_at = CURRENT_TIMESTAMP
+        WHERE name = counter_name;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Триггеры пациентов, врачей и медкарт: простое количество строк
+-- =====================================================
+CREATE OR REPLACE FUNCTION statistics_count_inserted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_statistics_counter(TG_ARGV[0], (SELECT COUNT(*) FROM new_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION statistics_count_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_statistics_counter(TG_ARGV[0], -(SELECT COUNT(*) FROM old_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION statistics_truncated()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM refresh_statistics();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_statistics_patients_insert ON patients;
+CREATE TRIGGER trg_statistics_patients_insert
+    AFTER INSERT ON patients
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_count_inserted('total_patients');
+
+DROP TRIGGER IF EXISTS trg_statistics_patients_delete ON patients;
+CREATE TRIGGER trg_statistics_patients_delete
+    AFTER DELETE ON patients
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_count_deleted('total_patients');
+
+DROP TRIGGER IF EXISTS trg_statistics_medical_records_insert ON medical_records;
+CREATE TRIGGER trg_statistics_medical_records_insert
+    AFTER INSERT ON medical_records
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_count_inserted('total_records');
+
+DROP TRIGGER IF EXISTS trg_statistics_medical_records_delete ON medical_records;
+CREATE TRIGGER trg_statistics_medical_records_delete
+    AFTER DELETE ON medical_records
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_count_deleted('total_records');
+
+
+-- Триггеры врачей: счетчик и строка в doctor_appointment_stats
+-- =====================================================
+CREATE OR REPLACE FUNCTION statistics_doctors_inserted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_statistics_counter('total_doctors', (SELECT COUNT(*) FROM new_rows));
+
+    INSERT INTO doctor_appointment_stats (doctor_id, appointment_count)
+    SELECT id, 0 FROM new_rows
+    ON CONFLICT (doctor_id) DO NOTHING;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_statistics_doctors_insert ON doctors;
+CREATE TRIGGER trg_statistics_doctors_insert
+    AFTER INSERT ON doctors
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_doctors_inserted();
+
+CREATE OR REPLACE FUNCTION statistics_doctors_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_statistics_counter('total_doctors', -(SELECT COUNT(*) FROM old_rows));
+
+    DELETE FROM doctor_appointment_stats s
+    USING old_rows o
+    WHERE s.doctor_id = o.id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_statistics_doctors_delete ON doctors;
+CREATE TRIGGER trg_statistics_doctors_delete
+    AFTER DELETE ON doctors
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_doctors_deleted();
+
+
+-- Триггеры приемов: общее количество, запланированные, по врачам
+-- =====================================================
+CREATE OR REPLACE FUNCTION statistics_apply_appointment_delta(direction INTEGER, changed_rows_count BIGINT, scheduled_count BIGINT)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM bump_statistics_counter('total_appointments', direction * changed_rows_count);
+    PERFORM bump_statistics_counter('scheduled_appointments', direction * scheduled_count);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION statistics_appointments_inserted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM statistics_apply_appointment_delta(
+        1,
+        (SELECT COUNT(*) FROM new_rows),
+        (SELECT COUNT(*) FROM new_rows WHERE status = 'scheduled')
+    );
+
+    -- Сортировка по doctor_id: одинаковый порядок блокировок исключает взаимоблокировки
+    INSERT INTO doctor_appointment_stats (doctor_id, appointment_count)
+    SELECT doctor_id, COUNT(*) FROM new_rows GROUP BY doctor_id ORDER BY doctor_id
+    ON CONFLICT (doctor_id) DO UPDATE
+    SET appointment_count = doctor_appointment_stats.appointment_count + EXCLUDED.appointment_count;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION statistics_appointments_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM statistics_apply_appointment_delta(
+        -1,
+        (SELECT COUNT(*) FROM old_rows),
+        (SELECT COUNT(*) FROM old_rows WHERE status = 'scheduled')
+    );
+
+    UPDATE doctor_appointment_stats s
+    SET appointment_count = s.appointment_count - o.removed
+    FROM (SELECT doctor_id, COUNT(*) AS removed FROM old_rows GROUP BY doctor_id) o
+    WHERE s.doctor_id = o.doctor_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION statistics_appointments_updated()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_statistics_counter(
+        'scheduled_appointments',
+        (SELECT COUNT(*) FROM new_rows WHERE status = 'scheduled')
+        - (SELECT COUNT(*) FROM old_rows WHERE status = 'scheduled')
+    );
+
+    -- Перенос приема к другому врачу
+    INSERT INTO doctor_appointment_stats (doctor_id, appointment_count)
+    SELECT doctor_id, SUM(delta) FROM (
+        SELECT doctor_id, 1 AS delta FROM new_rows
+        UNION ALL
+        SELECT doctor_id, -1 AS delta FROM old_rows
+    ) changes
+    GROUP BY doctor_id
+    HAVING SUM(delta) <> 0
+    ORDER BY doctor_id
+    ON CONFLICT (doctor_id) DO UPDATE
+    SET appointment_count = doctor_appointment_stats.appointment_count + EXCLUDED.appointment_count;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_statistics_appointments_insert ON appointments;
+CREATE TRIGGER trg_statistics_appointments_insert
+    AFTER INSERT ON appointments
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_appointments_inserted();
+
+DROP TRIGGER IF EXISTS trg_statistics_appointments_delete ON appointments;
+CREATE TRIGGER trg_statistics_appointments_delete
+    AFTER DELETE ON appointments
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_appointments_deleted();
+
+DROP TRIGGER IF EXISTS trg_statistics_appointments_update ON appointments;
+CREATE TRIGGER trg_statistics_appointments_update
+    AFTER UPDATE ON appointments
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_appointments_updated();
+
+
+-- TRUNCATE не дает transition-таблиц - пересчитываем сводку целиком
+-- =====================================================
+DROP TRIGGER IF EXISTS trg_statistics_patients_truncate ON patients;
+CREATE TRIGGER trg_statistics_patients_truncate
+    AFTER TRUNCATE ON patients
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_truncated();
+
+DROP TRIGGER IF EXISTS trg_statistics_doctors_truncate ON doctors;
+CREATE TRIGGER trg_statistics_doctors_truncate
+    AFTER TRUNCATE ON doctors
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_truncated();
+
+DROP TRIGGER IF EXISTS trg_statistics_appointments_truncate ON appointments;
+CREATE TRIGGER trg_statistics_appointments_truncate
+    AFTER TRUNCATE ON appointments
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_truncated();
+
+DROP TRIGGER IF EXISTS trg_statistics_medical_records_truncate ON medical_records;
+CREATE TRIGGER trg_statistics_medical_records_truncate
+    AFTER TRUNCATE ON medical_records
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION statistics_truncated();
+
+
+-- Первичное заполнение сводки
+-- =====================================================
+SELECT refresh_statistics();
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Материализованная статистика создана:';
+    RAISE NOTICE '  ✅ statistics_counters - общие счетчики';
+    RAISE NOTICE '  ✅ doctor_appointment_stats - приемы по врачам';
+    RAISE NOTICE '  ✅ Триггеры уровня оператора поддерживают сводку актуальной';
+    RAISE NOTICE '  ℹ️ Сверка: SELECT refresh_statistics();';
+END $$;
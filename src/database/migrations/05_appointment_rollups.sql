@@ -0,0 +1,173 @@
+-- Агрегаты приемов по дням, неделям и месяцам для /api/statistics/timeseries
+-- =====================================================
+-- Одна строка на (гранулярность, начало интервала, врач, статус).
+-- Поддерживается триггерами уровня оператора так же, как сводка
+-- 04_statistics.sql; исторические данные заполняются порционно:
+--     python src/database/statistics_store.py --backfill-rollups
+
+CREATE TABLE IF NOT EXISTS appointment_rollups (
+    granularity VARCHAR(5) NOT NULL CHECK (granularity IN ('day', 'week', 'month')),
+    bucket DATE NOT NULL,
+    doctor_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    appointment_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket, doctor_id, status)
+);
+
+-- Выборка ряда одного врача за период
+CREATE INDEX IF NOT EXISTS idx_appointment_rollups_doctor
+ON appointment_rollups(granularity, doctor_id, bucket);
+
+
+-- Новые приемы: +1 в корзины дня, недели и месяца
+-- =====================================================
+CREATE OR REPLACE FUNCTION appointment_rollups_inserted()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO appointment_rollups (granularity, bucket, doctor_id, status, appointment_count)
+    SELECT g.granularity, date_trunc(g.granularity, n.appointment_date)::date,
+           n.doctor_id, n.status, COUNT(*)
+    FROM new_rows n
+    CROSS JOIN (VALUES ('day'), ('week'), ('month')) AS g(granularity)
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (granularity, bucket, doctor_id, status) DO UPDATE
+    SET appointment_count = appointment_rollups.appointment_count + EXCLUDED.appointment_count;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION appointment_rollups_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE appointment_rollups r
+    SET appointment_count = r.appointment_count - o.removed
+    FROM (
+        SELECT g.granularity, date_trunc(g.granularity, o.appointment_date)::date AS bucket,
+               o.doctor_id, o.status, COUNT(*) AS removed
+        FROM old_rows o
+        CROSS JOIN (VALUES ('day'), ('week'), ('month')) AS g(granularity)
+        GROUP BY 1, 2, 3, 4
+    ) o
+    WHERE r.granularity = o.granularity
+    AND r.bucket = o.bucket
+    AND r.doctor_id = o.doctor_id
+    AND r.status = o.status;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Смена статуса, даты или врача: разница между новыми и старыми строками
+CREATE OR REPLACE FUNCTION appointment_rollups_updated()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO appointment_rollups (granularity, bucket, doctor_id, status, appointment_count)
+    SELECT g.granularity, date_trunc(g.granularity, c.appointment_date)::date,
+           c.doctor_id, c.status, SUM(c.delta)
+    FROM (
+        SELECT appointment_date, doctor_id, status, 1 AS delta FROM new_rows
+        UNION ALL
+        SELECT appointment_date, doctor_id, status, -1 AS delta FROM old_rows
+    ) c
+    CROSS JOIN (VALUES ('day'), ('week'), ('month')) AS g(granularity)
+    GROUP BY 1, 2, 3, 4
+    HAVING SUM(c.delta) <> 0
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (granularity, bucket, doctor_id, status) DO UPDATE
+    SET appointment_count = appointment_rollups.appointment_count + EXCLUDED.appointment_count;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_appointment_rollups_insert ON appointments;
+CREATE TRIGGER trg_appointment_rollups_insert
+    AFTER INSERT ON appointments
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION appointment_rollups_inserted();
+
+DROP TRIGGER IF EXISTS trg_appointment_rollups_delete ON appointments;
+CREATE TRIGGER trg_appointment_rollups_delete
+    AFTER DELETE ON appointments
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION appointment_rollups_deleted();
+
+DROP TRIGGER IF EXISTS trg_appointment_rollups_update ON appointments;
+CREATE TRIGGER trg_appointment_rollups_update
+    AFTER UPDATE ON appointments
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION appointment_rollups_updated();
+
+CREATE OR REPLACE FUNCTION appointment_rollups_truncated()
+RETURNS TRIGGER AS $$
+BEGIN
+    TRUNCATE appointment_rollups;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_appointment_rollups_truncate ON appointments;
+CREATE TRIGGER trg_appointment_rollups_truncate
+    AFTER TRUNCATE ON appointments
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION appointment_rollups_truncated();
+
+
+-- Пересчет агрегатов за период (одна порция backfill)
+-- =====================================================
+-- Дневные строки пересчитываются из appointments за [from_date, to_date),
+-- недельные и месячные, пересекающие период, - из дневных строк.
+-- Блокировка SHARE не дает триггерам изменить те же строки во время пересчета;
+-- держится только до конца транзакции порции. Возвращает число дневных строк.
+CREATE OR REPLACE FUNCTION backfill_appointment_rollups(from_date DATE, to_date DATE)
+RETURNS BIGINT AS $$
+DECLARE
+    processed BIGINT;
+BEGIN
+    LOCK TABLE appointments IN SHARE MODE;
+
+    DELETE FROM appointment_rollups
+    WHERE granularity = 'day' AND bucket >= from_date AND bucket < to_date;
+
+    INSERT INTO appointment_rollups (granularity, bucket, doctor_id, status, appointment_count)
+    SELECT 'day', appointment_date::date, doctor_id, status, COUNT(*)
+    FROM appointments
+    WHERE appointment_date >= from_date AND appointment_date < to_date
+    GROUP BY 2, 3, 4;
+
+    GET DIAGNOSTICS processed = ROW_COUNT;
+
+    DELETE FROM appointment_rollups
+    WHERE (granularity = 'week'
+           AND bucket >= date_trunc('week', from_date)::date AND bucket < to_date)
+       OR (granularity = 'month'
+           AND bucket >= date_trunc('month', from_date)::date AND bucket < to_date);
+
+    INSERT INTO appointment_rollups (granularity, bucket, doctor_id, status, appointment_count)
+    SELECT g.granularity, date_trunc(g.granularity, r.bucket)::date, r.doctor_id, r.status,
+           SUM(r.appointment_count)
+    FROM appointment_rollups r
+    CROSS JOIN (VALUES ('week'), ('month')) AS g(granularity)
+    WHERE r.granularity = 'day'
+    AND r.bucket >= date_trunc(g.granularity, from_date)::date
+    AND r.bucket < (date_trunc(g.granularity, (to_date - 1)::timestamp)
+                    + CASE g.granularity WHEN 'week' THEN INTERVAL '1 week' ELSE INTERVAL '1 month' END)::date
+    GROUP BY 1, 2, 3, 4;
+
+    RETURN processed;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Агрегаты приемов созданы:';
+    RAISE NOTICE '  ✅ appointment_rollups - день / неделя / месяц x врач x статус';
+    RAISE NOTICE '  ✅ Триггеры поддерживают агрегаты при вставке и смене статуса';
+    RAISE NOTICE '  ℹ️ Исторические данные: python src/database/statistics_store.py --backfill-rollups';
+END $$;
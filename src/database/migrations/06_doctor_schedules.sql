@@ -0,0 +1,64 @@
+-- Рабочие часы врачей для поиска свободных слотов
+-- =====================================================
+-- Несколько интервалов в день допускают перерыв (например, 09:00-13:00 и 14:00-18:00).
+-- Занятость слота проверяется по индексу idx_appointments_doctor_schedule
+-- (doctor_id, appointment_date) WHERE status != 'cancelled' из 02_create_index.sql.
+
+CREATE TABLE IF NOT EXISTS doctor_schedules (
+    doctor_id INTEGER NOT NULL REFERENCES doctors(id) ON DELETE CASCADE,
+    weekday SMALLINT NOT NULL CHECK (weekday BETWEEN 1 AND 7), -- ISO: 1 - понедельник
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL,
+    slot_minutes SMALLINT NOT NULL DEFAULT 30 CHECK (slot_minutes BETWEEN 5 AND 240),
+    PRIMARY KEY (doctor_id, weekday, start_time),
+    CONSTRAINT chk_doctor_schedules_interval CHECK (start_time < end_time)
+);
+
+-- Поиск расписаний на день недели по всем врачам
+CREATE INDEX IF NOT EXISTS idx_doctor_schedules_weekday
+ON doctor_schedules(weekday, doctor_id);
+
+-- Индекс занятости врача (на случай, если 02_create_index.sql не применялся)
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_schedule
+ON appointments(doctor_id, appointment_date)
+WHERE status != 'cancelled';
+
+
+-- Расписание по умолчанию: пн-пт 09:00-18:00, слоты по 30 минут
+-- (совпадает с проверкой validate_appointment_date из 03_create_constrains.sql)
+-- =====================================================
+INSERT INTO doctor_schedules (doctor_id, weekday, start_time, end_time, slot_minutes)
+SELECT d.id, wd, TIME '09:00', TIME '18:00', 30
+FROM doctors d
+CROSS JOIN generate_series(1, 5) AS wd
+ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION create_default_doctor_schedule()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO doctor_schedules (doctor_id, weekday, start_time, end_time, slot_minutes)
+    SELECT n.id, wd, TIME '09:00', TIME '18:00', 30
+    FROM new_rows n
+    CROSS JOIN generate_series(1, 5) AS wd
+    ON CONFLICT DO NOTHING;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_default_doctor_schedule ON doctors;
+CREATE TRIGGER trg_default_doctor_schedule
+    AFTER INSERT ON doctors
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION create_default_doctor_schedule();
+
+ANALYZE doctor_schedules;
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Расписания врачей созданы:';
+    RAISE NOTICE '  ✅ doctor_schedules - рабочие интервалы и длина слота';
+    RAISE NOTICE '  ✅ По умолчанию пн-пт 09:00-18:00, слоты 30 минут';
+    RAISE NOTICE '  ℹ️ Поиск: GET /api/appointments/free-slots?specialization=Терапевт&limit=10';
+END $$;
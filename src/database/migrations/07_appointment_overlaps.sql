@@ -0,0 +1,93 @@
+-- Запрет пересекающихся приемов врача и пациента
+-- =====================================================
+-- У приема появляется длительность, а интервал приема хранится в
+-- вычисляемом столбце appointment_period (tstzrange, время в UTC).
+-- GiST-ограничения исключения проверяют пересечения при вставке
+-- поиском по индексу, без сканирования приемов в приложении.
+-- Отмененные приемы в проверке не участвуют.
+--
+-- ВНИМАНИЕ: добавление вычисляемого столбца перезаписывает таблицу appointments.
+
+-- Оператор = для целочисленных столбцов в GiST-индексе
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE appointments
+ADD COLUMN IF NOT EXISTS duration_minutes SMALLINT NOT NULL DEFAULT 30;
+
+ALTER TABLE appointments
+DROP CONSTRAINT IF EXISTS chk_appointments_duration;
+
+ALTER TABLE appointments
+ADD CONSTRAINT chk_appointments_duration
+CHECK (duration_minutes BETWEEN 5 AND 480);
+
+-- appointment_date хранится без часового пояса в UTC (timezone=UTC в подключении)
+ALTER TABLE appointments
+ADD COLUMN IF NOT EXISTS appointment_period TSTZRANGE
+GENERATED ALWAYS AS (
+    tstzrange(
+        appointment_date AT TIME ZONE 'UTC',
+        (appointment_date + make_interval(mins => duration_minutes::int)) AT TIME ZONE 'UTC',
+        '[)'
+    )
+) STORED;
+
+
+-- Проверка существующих данных перед созданием ограничений
+-- =====================================================
+DO $$
+DECLARE
+    doctor_conflicts INTEGER;
+    patient_conflicts INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO doctor_conflicts
+    FROM appointments a
+    JOIN appointments b ON a.doctor_id = b.doctor_id AND a.id < b.id
+    WHERE a.status != 'cancelled' AND b.status != 'cancelled'
+    AND a.appointment_period && b.appointment_period;
+
+    SELECT COUNT(*) INTO patient_conflicts
+    FROM appointments a
+    JOIN appointments b ON a.patient_id = b.patient_id AND a.id < b.id
+    WHERE a.status != 'cancelled' AND b.status != 'cancelled'
+    AND a.appointment_period && b.appointment_period;
+
+    IF doctor_conflicts > 0 OR patient_conflicts > 0 THEN
+        RAISE EXCEPTION 'Найдены пересекающиеся приемы: врачи - %, пациенты - %', doctor_conflicts, patient_conflicts
+        USING HINT = 'Отмените дубли (status = ''cancelled'') и повторите миграцию. '
+                     'Поиск: SELECT a.id, b.id FROM appointments a JOIN appointments b '
+                     'ON a.doctor_id = b.doctor_id AND a.id < b.id '
+                     'WHERE a.status != ''cancelled'' AND b.status != ''cancelled'' '
+                     'AND a.appointment_period && b.appointment_period';
+    END IF;
+END $$;
+
+
+-- Ограничения исключения
+-- =====================================================
+ALTER TABLE appointments
+DROP CONSTRAINT IF EXISTS excl_appointments_doctor_overlap;
+
+ALTER TABLE appointments
+ADD CONSTRAINT excl_appointments_doctor_overlap
+EXCLUDE USING gist (doctor_id WITH =, appointment_period WITH &&)
+WHERE (status != 'cancelled');
+
+ALTER TABLE appointments
+DROP CONSTRAINT IF EXISTS excl_appointments_patient_overlap;
+
+ALTER TABLE appointments
+ADD CONSTRAINT excl_appointments_patient_overlap
+EXCLUDE USING gist (patient_id WITH =, appointment_period WITH &&)
+WHERE (status != 'cancelled');
+
+ANALYZE appointments;
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Проверка пересечений приемов включена:';
+    RAISE NOTICE '  ✅ duration_minutes - длительность приема (по умолчанию 30 минут)';
+    RAISE NOTICE '  ✅ appointment_period - интервал приема (tstzrange)';
+    RAISE NOTICE '  ✅ excl_appointments_doctor_overlap - врач не может вести два приема одновременно';
+    RAISE NOTICE '  ✅ excl_appointments_patient_overlap - пациент не может быть на двух приемах';
+END $$;
@@ -0,0 +1,54 @@
+-- Версии таблиц для ETag и условных GET (If-None-Match -> 304)
+-- =====================================================
+-- Каждый оператор INSERT/UPDATE/DELETE/TRUNCATE увеличивает версию таблицы
+-- в той же транзакции, поэтому новая версия становится видна ровно вместе
+-- с изменениями. Проверка "изменилось ли что-то" - чтение одной строки
+-- по первичному ключу вместо повторного запроса списка.
+-- В отличие от max(updated_at) и значений последовательностей учитываются
+-- удаления и изменения таблиц без updated_at (doctors, appointments).
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO table_versions (table_name)
+VALUES ('patients'), ('doctors'), ('appointments'), ('medical_records'), ('prescriptions')
+ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_table_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE table_versions
+    SET version = version + 1,
+        changed_at = CURRENT_TIMESTAMP
+    WHERE table_name = TG_TABLE_NAME;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['patients', 'doctors', 'appointments', 'medical_records', 'prescriptions']
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_version ON %I', tbl, tbl);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_version
+                 AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I
+                 FOR EACH STATEMENT
+                 EXECUTE FUNCTION bump_table_version()',
+            tbl, tbl
+        );
+    END LOOP;
+END $$;
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Версии таблиц созданы:';
+    RAISE NOTICE '  ✅ table_versions - счетчик изменений patients, doctors, appointments, medical_records, prescriptions';
+    RAISE NOTICE '  ℹ️ Используются для ETag: /api/patients/list, /api/doctors/list, /api/search?type=doctors, /api/statistics';
+END $$;
@@ -0,0 +1,533 @@
+-- Секционирование appointments и medical_records по месяцам
+-- =====================================================
+-- appointments секционируется по appointment_date, medical_records - по
+-- created_at: одна секция RANGE на месяц и секция DEFAULT для строк вне
+-- созданных месяцев. Запросы с условием по дате читают только свои секции
+-- (partition pruning), а VACUUM, переиндексация, резервные копии и
+-- архивирование выполняются по секциям, а не по всей таблице:
+--     python src/database/partitions.py --status
+--     python src/database/partitions.py --maintain     # секции на месяцы вперед (cron)
+--     python src/database/partitions.py --archive --keep-months 36 --tablespace cold
+--
+-- Ограничения секционированных таблиц PostgreSQL:
+--   * первичный и уникальные ключи включают столбец секционирования:
+--     PRIMARY KEY (id, appointment_date) и (id, created_at);
+--   * поэтому внешние ключи на appointments(id) и medical_records(id)
+--     невозможны - они заменены триггерами с той же семантикой (NO ACTION),
+--     а уникальность medical_records.appointment_id проверяет триггер;
+--   * ограничения исключения (07_appointment_overlaps.sql) создаются в каждой
+--     секции: пересечение приемов на границе двух месяцев не проверяется.
+--
+-- ВНИМАНИЕ: преобразование переписывает обе таблицы под эксклюзивной
+-- блокировкой. Повторный запуск миграции безопасен.
+
+-- Схема для отсоединенных (архивных) секций
+CREATE SCHEMA IF NOT EXISTS archive;
+
+-- Секционированные таблицы и параметры обслуживания секций
+CREATE TABLE IF NOT EXISTS partitioned_tables (
+    parent_table TEXT PRIMARY KEY,
+    partition_column TEXT NOT NULL,
+    premake_months INTEGER NOT NULL DEFAULT 3 CHECK (premake_months >= 0),
+    -- Ограничения, которые создаются в каждой секции (ограничения исключения)
+    partition_constraints TEXT[] NOT NULL DEFAULT '{}'
+);
+
+
+-- Создание секций
+-- =====================================================
+CREATE OR REPLACE FUNCTION month_partition_name(parent TEXT, month DATE)
+RETURNS TEXT AS $$
+    SELECT format('%s_y%sm%s', parent, to_char(month, 'YYYY'), to_char(month, 'MM'));
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION add_partition_constraints(parent TEXT, part TEXT)
+RETURNS VOID AS $$
+DECLARE
+    constraint_defs TEXT[];
+    n INTEGER;
+BEGIN
+    SELECT partition_constraints INTO constraint_defs
+    FROM partitioned_tables WHERE parent_table = parent;
+
+    FOR n IN 1 .. COALESCE(array_length(constraint_defs, 1), 0)
+    LOOP
+        EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I %s',
+                       part, left(format('%s_excl%s', part, n), 63), constraint_defs[n]);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Секция месяца; строки этого месяца из DEFAULT переносятся в нее.
+-- Возвращает false, если секция уже есть.
+CREATE OR REPLACE FUNCTION create_month_partition(parent TEXT, month DATE)
+RETURNS BOOLEAN AS $$
+DECLARE
+    partition_column TEXT;
+    part_start TIMESTAMP := date_trunc('month', month);
+    part_end TIMESTAMP := date_trunc('month', month) + INTERVAL '1 month';
+    part TEXT := month_partition_name(parent, month);
+    default_part TEXT := parent || '_default';
+    columns TEXT;
+    default_rows BIGINT := 0;
+BEGIN
+    SELECT p.partition_column INTO STRICT partition_column
+    FROM partitioned_tables p WHERE p.parent_table = parent;
+
+    IF to_regclass(quote_ident(part)) IS NOT NULL THEN
+        RETURN false;
+    END IF;
+
+    IF to_regclass(quote_ident(default_part)) IS NOT NULL THEN
+        EXECUTE format('SELECT COUNT(*) FROM %I WHERE %I >= $1 AND %I < $2',
+                       default_part, partition_column, partition_column)
+        INTO default_rows USING part_start, part_end;
+    END IF;
+
+    IF default_rows = 0 THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       part, parent, part_start, part_end);
+    ELSE
+        -- Секцию с пересекающимися строками в DEFAULT создать нельзя:
+        -- DEFAULT отсоединяется, строки месяца переносятся (вычисляемые
+        -- столбцы пересчитываются), обе таблицы присоединяются обратно.
+        -- Строчные триггеры на отсоединенной DEFAULT не срабатывают.
+        SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO columns
+        FROM pg_attribute
+        WHERE attrelid = parent::regclass AND attnum > 0
+        AND NOT attisdropped AND attgenerated = '';
+
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, default_part);
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS)',
+                       part, parent);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING %s)
+             INSERT INTO %I (%s) SELECT %s FROM moved',
+            default_part, partition_column, part_start, partition_column, part_end, columns,
+            part, columns, columns
+        );
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       parent, part, part_start, part_end);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I DEFAULT', parent, default_part);
+        RAISE NOTICE 'Перенесено строк из %: % -> %', default_part, default_rows, part;
+    END IF;
+
+    PERFORM add_partition_constraints(parent, part);
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Секции с текущего месяца на months_ahead (по умолчанию premake_months) вперед
+CREATE OR REPLACE FUNCTION create_future_partitions(parent TEXT DEFAULT NULL,
+                                                    months_ahead INTEGER DEFAULT NULL)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    cfg RECORD;
+    n INTEGER;
+    month DATE;
+BEGIN
+    FOR cfg IN
+        SELECT * FROM partitioned_tables
+        WHERE parent IS NULL OR parent_table = parent
+        ORDER BY parent_table
+    LOOP
+        FOR n IN 0 .. COALESCE(months_ahead, cfg.premake_months)
+        LOOP
+            month := (date_trunc('month', CURRENT_DATE) + make_interval(months => n))::date;
+            IF create_month_partition(cfg.parent_table, month) THEN
+                RETURN NEXT month_partition_name(cfg.parent_table, month);
+            END IF;
+        END LOOP;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Архивирование старых секций
+-- =====================================================
+-- Секции, закончившиеся раньше чем keep_months месяцев назад, переносятся
+-- в табличное пространство archive_tablespace (если указано) и при
+-- detach = true отсоединяются и переносятся в схему archive: данные
+-- остаются доступны (pg_dump -t 'archive.*'), но запросы к таблице их не читают.
+--
+-- Отсоединение не вызывает триггеры, поэтому ссылочная целостность и
+-- сводки поддерживаются здесь:
+--   * назначения на медкарты секции medical_records переносятся вместе с ней
+--     в archive.prescriptions_<секция>;
+--   * секция appointments, на приемы которой еще ссылаются медкарты, не
+--     отсоединяется (как и более новые секции) - сначала архивируется
+--     medical_records;
+--   * statistics_counters и appointment_rollups за архивные месяцы
+--     пересчитываются по оставшимся строкам.
+CREATE OR REPLACE FUNCTION archive_partitions(parent TEXT, keep_months INTEGER,
+                                              archive_tablespace TEXT DEFAULT NULL,
+                                              detach BOOLEAN DEFAULT true)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    cutoff TIMESTAMP := date_trunc('month', CURRENT_DATE) - make_interval(months => keep_months);
+    part RECORD;
+    index_oid OID;
+    referenced BOOLEAN;
+    archived INTEGER := 0;
+    archived_from TIMESTAMP;
+    archived_to TIMESTAMP;
+BEGIN
+    FOR part IN
+        SELECT c.oid, c.relname,
+               substring(pg_get_expr(c.relpartbound, c.oid) FROM 'FROM \(''([^'']+)''\)')::timestamp AS lower_bound,
+               substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''([^'']+)''\)')::timestamp AS upper_bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = parent::regclass
+        AND pg_get_expr(c.relpartbound, c.oid) <> 'DEFAULT'
+        ORDER BY upper_bound
+    LOOP
+        EXIT WHEN part.upper_bound > cutoff;
+
+        IF detach AND parent = 'appointments' THEN
+            EXECUTE format('SELECT EXISTS (SELECT 1 FROM medical_records m JOIN %s a ON a.id = m.appointment_id)',
+                           part.oid::regclass)
+            INTO referenced;
+            IF referenced THEN
+                RAISE WARNING 'Секция % не отсоединена: на ее приемы ссылаются медицинские записи', part.relname
+                    USING HINT = 'Сначала заархивируйте medical_records: SELECT * FROM archive_partitions(''medical_records'', ...)';
+                EXIT;
+            END IF;
+        END IF;
+
+        IF archive_tablespace IS NOT NULL THEN
+            EXECUTE format('ALTER TABLE %s SET TABLESPACE %I', part.oid::regclass, archive_tablespace);
+            FOR index_oid IN SELECT indexrelid FROM pg_index WHERE indrelid = part.oid
+            LOOP
+                EXECUTE format('ALTER INDEX %s SET TABLESPACE %I', index_oid::regclass, archive_tablespace);
+            END LOOP;
+        END IF;
+
+        IF detach THEN
+            IF parent = 'medical_records' THEN
+                EXECUTE format('CREATE TABLE IF NOT EXISTS archive.%I (LIKE prescriptions)',
+                               'prescriptions_' || part.relname);
+                EXECUTE format('WITH moved AS (
+                                    DELETE FROM prescriptions p USING %s m
+                                    WHERE p.medical_record_id = m.id
+                                    RETURNING p.*
+                                )
+                                INSERT INTO archive.%I SELECT * FROM moved',
+                               part.oid::regclass, 'prescriptions_' || part.relname);
+            END IF;
+
+            EXECUTE format('ALTER TABLE %I DETACH PARTITION %s', parent, part.oid::regclass);
+            EXECUTE format('ALTER TABLE %s SET SCHEMA archive', part.oid::regclass);
+        END IF;
+
+        archived := archived + 1;
+        archived_from := COALESCE(archived_from, part.lower_bound);
+        archived_to := part.upper_bound;
+        RETURN NEXT part.relname;
+    END LOOP;
+
+    IF NOT detach OR archived = 0 THEN
+        RETURN;
+    END IF;
+
+    -- Отсоединение не вызывает триггеры: ETag таблицы сбрасывается явно
+    IF to_regclass('table_versions') IS NOT NULL THEN
+        UPDATE table_versions
+        SET version = version + 1,
+            changed_at = CURRENT_TIMESTAMP
+        WHERE table_name = parent;
+    END IF;
+
+    -- ...и сводки пересчитываются без строк отсоединенных секций
+    IF to_regproc('refresh_statistics') IS NOT NULL THEN
+        PERFORM refresh_statistics();
+    END IF;
+
+    IF parent = 'appointments' AND to_regproc('backfill_appointment_rollups') IS NOT NULL THEN
+        PERFORM backfill_appointment_rollups(archived_from::date, archived_to::date);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Преобразование таблицы в секционированную
+-- =====================================================
+-- Столбцы, значения по умолчанию, вычисляемые столбцы и CHECK копируются
+-- (LIKE), данные переносятся одной вставкой, затем по сохраненным
+-- определениям создаются ключи (с добавленным столбцом секционирования),
+-- внешние ключи, индексы и триггеры. Уникальные индексы без столбца
+-- секционирования становятся обычными.
+CREATE OR REPLACE FUNCTION partition_by_month(parent TEXT, partition_column TEXT,
+                                              premake INTEGER DEFAULT 3)
+RETURNS VOID AS $$
+DECLARE
+    parent_oid OID := parent::regclass;
+    old_table TEXT := parent || '_unpartitioned';
+    partition_attnum SMALLINT;
+    key_defs TEXT[] := '{}';
+    index_defs TEXT[] := '{}';
+    trigger_defs TEXT[] := '{}';
+    exclusion_defs TEXT[] := '{}';
+    sequences TEXT[] := '{}';
+    sequence_columns TEXT[] := '{}';
+    rec RECORD;
+    def TEXT;
+    n INTEGER;
+    columns TEXT;
+    first_month DATE;
+    last_month DATE;
+    month DATE;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = parent_oid) = 'p' THEN
+        RAISE NOTICE 'ℹ️ % уже секционирована', parent;
+        RETURN;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM pg_constraint WHERE confrelid = parent_oid AND contype = 'f') THEN
+        RAISE EXCEPTION 'На % ссылаются внешние ключи: замените их перед секционированием', parent;
+    END IF;
+
+    SELECT attnum INTO STRICT partition_attnum
+    FROM pg_attribute WHERE attrelid = parent_oid AND attname = partition_column;
+
+    -- Ключи, внешние ключи и ограничения исключения
+    FOR rec IN
+        SELECT conname, contype, conkey, pg_get_constraintdef(oid) AS condef
+        FROM pg_constraint
+        WHERE conrelid = parent_oid AND contype IN ('p', 'u', 'f', 'x')
+        ORDER BY contype DESC, conname
+    LOOP
+        IF rec.contype = 'x' THEN
+            exclusion_defs := exclusion_defs || rec.condef;
+        ELSIF rec.contype = 'f' THEN
+            key_defs := key_defs || format('ALTER TABLE %I ADD CONSTRAINT %I %s', parent, rec.conname, rec.condef);
+        ELSE
+            SELECT string_agg(quote_ident(a.attname), ', ' ORDER BY k.n) INTO columns
+            FROM unnest(rec.conkey || CASE WHEN partition_attnum = ANY(rec.conkey)
+                                           THEN '{}'::SMALLINT[] ELSE ARRAY[partition_attnum] END)
+                 WITH ORDINALITY AS k(attnum, n)
+            JOIN pg_attribute a ON a.attrelid = parent_oid AND a.attnum = k.attnum;
+
+            key_defs := key_defs || format('ALTER TABLE %I ADD CONSTRAINT %I %s (%s)', parent, rec.conname,
+                                           CASE rec.contype WHEN 'p' THEN 'PRIMARY KEY' ELSE 'UNIQUE' END,
+                                           columns);
+        END IF;
+    END LOOP;
+
+    -- Индексы, не связанные с ограничениями
+    FOR rec IN
+        SELECT c.relname, i.indisunique, partition_attnum = ANY(i.indkey::SMALLINT[]) AS has_partition_column,
+               pg_get_indexdef(i.indexrelid) AS indexdef
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = parent_oid
+        AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = i.indexrelid AND conrelid = parent_oid)
+        ORDER BY c.relname
+    LOOP
+        def := rec.indexdef;
+        IF rec.indisunique AND NOT rec.has_partition_column THEN
+            def := regexp_replace(def, '^CREATE UNIQUE INDEX', 'CREATE INDEX');
+            RAISE NOTICE '⚠️ Индекс % больше не уникальный (нет столбца %)', rec.relname, partition_column;
+        END IF;
+        index_defs := index_defs || def;
+    END LOOP;
+
+    SELECT COALESCE(array_agg(pg_get_triggerdef(oid) ORDER BY tgname), '{}') INTO trigger_defs
+    FROM pg_trigger WHERE tgrelid = parent_oid AND NOT tgisinternal;
+
+    -- Последовательности serial-столбцов переходят к новой таблице
+    FOR rec IN
+        SELECT a.attname, pg_get_serial_sequence(quote_ident(parent), a.attname) AS seq
+        FROM pg_attribute a
+        WHERE a.attrelid = parent_oid AND a.attnum > 0 AND NOT a.attisdropped
+    LOOP
+        CONTINUE WHEN rec.seq IS NULL;
+        sequences := sequences || rec.seq;
+        sequence_columns := sequence_columns || rec.attname::TEXT;
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY NONE', rec.seq);
+    END LOOP;
+
+    INSERT INTO partitioned_tables (parent_table, partition_column, premake_months, partition_constraints)
+    VALUES (parent, partition_column, premake, exclusion_defs)
+    ON CONFLICT (parent_table) DO UPDATE
+    SET partition_column = EXCLUDED.partition_column,
+        premake_months = EXCLUDED.premake_months,
+        partition_constraints = EXCLUDED.partition_constraints;
+
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', parent, old_table);
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS
+                              INCLUDING STORAGE INCLUDING COMMENTS)
+         PARTITION BY RANGE (%I)',
+        parent, old_table, partition_column
+    );
+
+    -- Секции на весь диапазон данных и premake месяцев вперед
+    EXECUTE format('SELECT date_trunc(''month'', MIN(%I))::date, date_trunc(''month'', MAX(%I))::date FROM %I',
+                   partition_column, partition_column, old_table)
+    INTO first_month, last_month;
+    first_month := LEAST(COALESCE(first_month, CURRENT_DATE), CURRENT_DATE);
+    last_month := GREATEST(COALESCE(last_month, CURRENT_DATE),
+                           (CURRENT_DATE + make_interval(months => premake))::date);
+
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', parent || '_default', parent);
+    PERFORM add_partition_constraints(parent, parent || '_default');
+    month := date_trunc('month', first_month)::date;
+    WHILE month <= last_month
+    LOOP
+        PERFORM create_month_partition(parent, month);
+        month := (month + INTERVAL '1 month')::date;
+    END LOOP;
+
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO columns
+    FROM pg_attribute
+    WHERE attrelid = parent::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+    EXECUTE format('INSERT INTO %I (%s) SELECT %s FROM %I', parent, columns, columns, old_table);
+    GET DIAGNOSTICS n = ROW_COUNT;
+
+    EXECUTE format('DROP TABLE %I', old_table);
+
+    FOREACH def IN ARRAY key_defs || index_defs || trigger_defs
+    LOOP
+        EXECUTE def;
+    END LOOP;
+
+    FOR n IN 1 .. COALESCE(array_length(sequences, 1), 0)
+    LOOP
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.%I', sequences[n], parent, sequence_columns[n]);
+    END LOOP;
+
+    EXECUTE format('ANALYZE %I', parent);
+    RAISE NOTICE '✅ % секционирована по %: % секций', parent, partition_column,
+        (SELECT COUNT(*) FROM pg_inherits WHERE inhparent = parent::regclass);
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Ссылочная целостность вместо внешних ключей
+-- =====================================================
+-- Проверки выполняются после строки (как у внешних ключей) и блокируют
+-- строку, на которую ссылаются (FOR KEY SHARE), до конца транзакции.
+
+CREATE OR REPLACE FUNCTION check_medical_record_appointment()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM 1 FROM appointments WHERE id = NEW.appointment_id FOR KEY SHARE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Прием % не найден', NEW.appointment_id
+            USING ERRCODE = 'foreign_key_violation';
+    END IF;
+
+    -- Одна медкарта на прием: конкурентные вставки для одного приема
+    -- выполняются по очереди
+    PERFORM pg_advisory_xact_lock(hashtext('medical_records.appointment_id'), NEW.appointment_id);
+    IF EXISTS (SELECT 1 FROM medical_records
+               WHERE appointment_id = NEW.appointment_id AND id <> NEW.id) THEN
+        RAISE EXCEPTION 'Медицинская запись для приема % уже существует', NEW.appointment_id
+            USING ERRCODE = 'unique_violation';
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION check_prescription_medical_record()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM 1 FROM medical_records WHERE id = NEW.medical_record_id FOR KEY SHARE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Медицинская запись % не найдена', NEW.medical_record_id
+            USING ERRCODE = 'foreign_key_violation';
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Удаление строк, на которые ссылаются (ON DELETE NO ACTION)
+CREATE OR REPLACE FUNCTION check_appointments_unreferenced()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM medical_records m JOIN old_rows o ON m.appointment_id = o.id) THEN
+        RAISE EXCEPTION 'На удаляемые приемы ссылаются медицинские записи'
+            USING ERRCODE = 'foreign_key_violation';
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION check_medical_records_unreferenced()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM prescriptions p JOIN old_rows o ON p.medical_record_id = o.id) THEN
+        RAISE EXCEPTION 'На удаляемые медицинские записи ссылаются назначения'
+            USING ERRCODE = 'foreign_key_violation';
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Преобразование
+-- =====================================================
+-- Внешние ключи на appointments и medical_records
+DO $$
+DECLARE
+    fk RECORD;
+BEGIN
+    FOR fk IN
+        SELECT conname, conrelid::regclass AS tbl
+        FROM pg_constraint
+        WHERE contype = 'f'
+        AND confrelid IN ('appointments'::regclass, 'medical_records'::regclass)
+    LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', fk.tbl, fk.conname);
+    END LOOP;
+END $$;
+
+-- Столбец секционирования входит в первичный ключ (NOT NULL)
+UPDATE medical_records mr
+SET created_at = a.appointment_date
+FROM appointments a
+WHERE mr.created_at IS NULL
+AND a.id = mr.appointment_id;
+
+SELECT partition_by_month('appointments', 'appointment_date');
+SELECT partition_by_month('medical_records', 'created_at');
+
+DROP TRIGGER IF EXISTS trg_check_medical_record_appointment ON medical_records;
+CREATE TRIGGER trg_check_medical_record_appointment
+    AFTER INSERT OR UPDATE OF appointment_id ON medical_records
+    FOR EACH ROW
+    EXECUTE FUNCTION check_medical_record_appointment();
+
+DROP TRIGGER IF EXISTS trg_check_prescription_medical_record ON prescriptions;
+CREATE TRIGGER trg_check_prescription_medical_record
+    AFTER INSERT OR UPDATE OF medical_record_id ON prescriptions
+    FOR EACH ROW
+    EXECUTE FUNCTION check_prescription_medical_record();
+
+DROP TRIGGER IF EXISTS trg_check_appointments_unreferenced ON appointments;
+CREATE TRIGGER trg_check_appointments_unreferenced
+    AFTER DELETE ON appointments
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION check_appointments_unreferenced();
+
+DROP TRIGGER IF EXISTS trg_check_medical_records_unreferenced ON medical_records;
+CREATE TRIGGER trg_check_medical_records_unreferenced
+    AFTER DELETE ON medical_records
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION check_medical_records_unreferenced();
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Секционирование по месяцам:';
+    RAISE NOTICE '  ✅ appointments - по appointment_date, medical_records - по created_at';
+    RAISE NOTICE '  ✅ Внешние ключи на эти таблицы заменены триггерами проверки';
+    RAISE NOTICE '  ℹ️ Секции вперед: SELECT * FROM create_future_partitions() (cron)';
+    RAISE NOTICE '  ℹ️ Архив: SELECT * FROM archive_partitions(''appointments'', 36, ''cold'')';
+END $$;
@@ -0,0 +1,18 @@
+-- Индекс ленты пациента (GET /api/patients/<id>/timeline)
+-- =====================================================
+-- Лента листается по ключу (appointment_date, id) от новых приемов к старым:
+-- страница - чтение индекса пациента с нужной позиции, без OFFSET и сортировки.
+-- Применяется и к обычной, и к секционированной (09_partitioning.sql)
+-- таблице appointments: во втором случае индекс создается в каждой секции.
+
+CREATE INDEX IF NOT EXISTS idx_appointments_patient_timeline
+ON appointments(patient_id, appointment_date DESC, id DESC);
+
+ANALYZE appointments;
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Индекс ленты пациента создан:';
+    RAISE NOTICE '  ✅ idx_appointments_patient_timeline - (patient_id, appointment_date DESC, id DESC)';
+    RAISE NOTICE '  ℹ️ Лента: GET /api/patients/<id>/timeline?limit=20';
+END $$;
@@ -0,0 +1,225 @@
+"""
+Обслуживание секций appointments и medical_records
+
+Таблицы секционирует по месяцам миграция 09_partitioning.sql. Здесь -
+операции, которые выполняются по секциям, а не по всей таблице:
+
+    python src/database/partitions.py --status
+    python src/database/partitions.py --maintain                # секции вперед (cron, раз в день)
+    python src/database/partitions.py --archive --keep-months 36 --tablespace cold
+    python src/database/partitions.py --vacuum --months 2       # VACUUM ANALYZE свежих секций
+    python src/database/partitions.py --reindex --months 2      # REINDEX CONCURRENTLY свежих секций
+
+Отсоединенные секции лежат в схеме archive; их резервная копия снимается
+отдельно и один раз: pg_dump -t 'archive.appointments_y2023m*'.
+"""
+import logging
+import sys
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+
+from psycopg2 import errors as pg_errors
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.database.connection import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEEP_MONTHS = 36
+DEFAULT_RECENT_MONTHS = 2
+
+# Порядок архивирования: сначала таблицы, которые ссылаются на другие, -
+# секция appointments не отсоединяется, пока на ее приемы ссылаются медкарты
+ARCHIVE_ORDER = ('medical_records', 'appointments')
+
+# Секции настроенных таблиц: границы, размер, табличное пространство, VACUUM
+PARTITIONS_QUERY = """
+    SELECT p.parent_table,
+           c.oid::regclass::text as partition,
+           pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT' as is_default,
+           substring(pg_get_expr(c.relpartbound, c.oid) FROM 'FROM \\(''([^'']+)''\\)')::timestamp as lower_bound,
+           substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \\(''([^'']+)''\\)')::timestamp as upper_bound,
+           GREATEST(c.reltuples, 0)::bigint as estimated_rows,
+           pg_total_relation_size(c.oid) as total_bytes,
+           COALESCE(t.spcname, 'pg_default') as tablespace,
+           GREATEST(s.last_vacuum, s.last_autovacuum) as last_vacuum
+    FROM partitioned_tables p
+    JOIN pg_inherits i ON i.inhparent = p.parent_table::regclass
+    JOIN pg_class c ON c.oid = i.inhrelid
+    LEFT JOIN pg_tablespace t ON t.oid = c.reltablespace
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE %(parent)s::text IS NULL OR p.parent_table = %(parent)s
+    ORDER BY p.parent_table, lower_bound NULLS FIRST
+"""
+
+
+def list_partitions(parent: Optional[str] = None) -> List[dict]:
+    """
+    Секции секционированных таблиц (все или одной таблицы)
+    
+    Returns:
+        List[dict]: Секции по возрастанию границ, DEFAULT первой; пустой
+        список, если миграция 09_partitioning.sql не применена
+    """
+    try:
+        with db.get_cursor() as cursor:
+            cursor.execute(PARTITIONS_QUERY, {'parent': parent})
+            return cursor.fetchall()
+    except pg_errors.UndefinedTable:
+        logger.warning("⚠️ Таблицы не секционированы (примените migrations/09_partitioning.sql)")
+        return []
+
+
+def recent_partitions(parent: Optional[str] = None, months: int = DEFAULT_RECENT_MONTHS) -> List[dict]:
+    """
+    Секции, в которые еще пишут: последние months месяцев, будущие и DEFAULT
+    
+    Закрытые месяцы после VACUUM почти не меняются, поэтому регулярное
+    обслуживание таких секций не нужно.
+    """
+    today = date.today()
+    month_index = today.year * 12 + today.month - 1 - (months - 1)
+    cutoff = date(month_index // 12, month_index % 12 + 1, 1)
+    return [partition for partition in list_partitions(parent)
+            if partition['is_default'] or partition['upper_bound'].date() > cutoff]
+
+
+def create_future_partitions(months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Секции с текущего месяца на months_ahead вперед (по умолчанию -
+    premake_months из partitioned_tables). Запускается по расписанию.
+    
+    Returns:
+        List[str]: Созданные секции
+    """
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT create_future_partitions(NULL, %s) as partition", (months_ahead,))
+        created = [row['partition'] for row in cursor.fetchall()]
+    
+    for partition in created:
+        logger.info(f"   ✅ Создана секция {partition}")
+    logger.info(f"✅ Секции на будущие месяцы: создано {len(created)}")
+    return created
+
+
+def archive_partitions(keep_months: int = DEFAULT_KEEP_MONTHS, tablespace: Optional[str] = None,
+                       detach: bool = True, parent: Optional[str] = None) -> List[str]:
+    """
+    Архивирование секций старше keep_months месяцев
+    
+    Назначения переносятся в архив вместе с медкартами, счетчики сводки и
+    appointment_rollups пересчитывает archive_partitions() в той же транзакции.
+    
+    Args:
+        keep_months: Сколько последних месяцев остается в таблице
+        tablespace: Табличное пространство на дешевом хранилище (None - не переносить)
+        detach: Отсоединить секции и перенести в схему archive
+        parent: Таблица (None - все секционированные)
+    
+    Returns:
+        List[str]: Заархивированные секции
+    """
+    parents = [parent] if parent else sorted(
+        {p['parent_table'] for p in list_partitions()},
+        key=lambda table: ARCHIVE_ORDER.index(table) if table in ARCHIVE_ORDER else len(ARCHIVE_ORDER))
+    archived = []
+    
+    for table in parents:
+        with db.get_connection() as conn:
+            del conn.notices[:]
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT archive_partitions(%s, %s, %s, %s)",
+                               (table, keep_months, tablespace, detach))
+                names = [row[0] for row in cursor.fetchall()]
+            # Секции, на которые еще ссылаются медкарты, пропускаются с предупреждением
+            for notice in conn.notices:
+                if notice.startswith('WARNING'):
+                    logger.warning(f"⚠️ {table}: {notice.split(':', 1)[1].strip()}")
+        for name in names:
+            logger.info(f"   📦 {table}: {name}")
+        archived += names
+    
+    logger.info(f"✅ Заархивировано секций: {len(archived)}")
+    return archived
+
+
+def _run_per_partition(command: str, partitions: List[dict]) -> None:
+    """Команда обслуживания для каждой секции вне транзакции (VACUUM, REINDEX CONCURRENTLY)"""
+    with db.get_connection() as conn:
+        conn.rollback()
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                for partition in partitions:
+                    cursor.execute(command.format(partition=partition['partition']))
+                    logger.info(f"   ✅ {command.format(partition=partition['partition'])}")
+        finally:
+            conn.autocommit = False
+
+
+def vacuum_partitions(months: int = DEFAULT_RECENT_MONTHS, parent: Optional[str] = None) -> int:
+    """VACUUM ANALYZE секций последних months месяцев; возвращает число секций"""
+    partitions = recent_partitions(parent, months)
+    _run_per_partition("VACUUM (ANALYZE) {partition}", partitions)
+    logger.info(f"✅ VACUUM выполнен для {len(partitions)} секций")
+    return len(partitions)
+
+
+def reindex_partitions(months: int = DEFAULT_RECENT_MONTHS, parent: Optional[str] = None) -> int:
+    """Перестроение индексов секций последних months месяцев без блокировки записи"""
+    partitions = recent_partitions(parent, months)
+    _run_per_partition("REINDEX TABLE CONCURRENTLY {partition}", partitions)
+    logger.info(f"✅ Индексы перестроены для {len(partitions)} секций")
+    return len(partitions)
+
+
+def _format_size(size: int) -> str:
+    for unit in ('Б', 'КБ', 'МБ', 'ГБ'):
+        if size < 1024 or unit == 'ГБ':
+            return f"{size:.0f} {unit}" if unit == 'Б' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Обслуживание секций appointments и medical_records')
+    parser.add_argument('--status', action='store_true', help='Показать секции')
+    parser.add_argument('--maintain', action='store_true', help='Создать секции на будущие месяцы')
+    parser.add_argument('--months-ahead', type=int, default=None,
+                        help='На сколько месяцев вперед создавать секции (по умолчанию из настроек)')
+    parser.add_argument('--archive', action='store_true', help='Архивировать старые секции')
+    parser.add_argument('--keep-months', type=int, default=DEFAULT_KEEP_MONTHS,
+                        help='Сколько последних месяцев оставить в таблицах')
+    parser.add_argument('--tablespace', default=None, help='Табличное пространство для архива')
+    parser.add_argument('--keep-attached', action='store_true',
+                        help='Только перенести в табличное пространство, не отсоединяя')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM ANALYZE свежих секций')
+    parser.add_argument('--reindex', action='store_true', help='REINDEX CONCURRENTLY свежих секций')
+    parser.add_argument('--months', type=int, default=DEFAULT_RECENT_MONTHS,
+                        help='Сколько последних месяцев обслуживать (--vacuum, --reindex)')
+    parser.add_argument('--table', default=None, help='Только одна таблица')
+    args = parser.parse_args()
+    
+    if args.maintain:
+        create_future_partitions(args.months_ahead)
+    
+    if args.archive:
+        archive_partitions(args.keep_months, args.tablespace, detach=not args.keep_attached,
+                           parent=args.table)
+    
+    if args.vacuum:
+        vacuum_partitions(args.months, args.table)
+    
+    if args.reindex:
+        reindex_partitions(args.months, args.table)
+    
+    if args.status or not (args.maintain or args.archive or args.vacuum or args.reindex):
+        print("🗂️ Секции:")
+        for partition in list_partitions(args.table):
+            vacuumed = partition['last_vacuum'].strftime('%d.%m.%Y %H:%M') if partition['last_vacuum'] else '-'
+            print(f"   {partition['partition']:<32} ~{partition['estimated_rows']:>9} строк "
+                  f"{_format_size(partition['total_bytes']):>10}  {partition['tablespace']:<12} "
+                  f"VACUUM: {vacuumed}")
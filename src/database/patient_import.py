@@ -0,0 +1,318 @@
+"""
+Массовый импорт пациентов из NDJSON или CSV
+
+Записи читаются потоком и обрабатываются пакетами: проверка
+validate_patient_data, пакетное шифрование TDEManager, COPY во временную
+таблицу и перенос в patients одним INSERT ... SELECT. Ошибочные строки
+попадают в отчет с номером строки и не останавливают импорт; если перенос
+пакета отклонен базой, пакет переносится построчно под точками сохранения.
+
+Пример:
+    python src/database/patient_import.py registry.ndjson --format ndjson
+    python src/database/patient_import.py registry.csv --format csv --batch-size 10000
+"""
+import argparse
+import csv
+import json
+import logging
+import re
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import psycopg2
+
+# Добавляем корневую папку в path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.api.validators import validate_patient_data, normalize_phone
+from src.database.bulk import encrypt_rows, copy_rows
+from src.database.connection import db
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+DEFAULT_BATCH_SIZE = 5000
+MAX_BATCH_SIZE = 50000
+MAX_REPORTED_ERRORS = 1000
+
+PATIENT_FIELDS = ['first_name', 'last_name', 'middle_name', 'birth_date', 'gender',
+                  'phone', 'email', 'address']
+ENCRYPTED_FIELDS = ['phone', 'email', 'address']
+MAX_NAME_LENGTH = 100  # VARCHAR(100) в patients
+MIN_BIRTH_DATE = date(1900, 1, 1)
+
+# Те же выражения, что в chk_patients_phone_format и chk_patients_email_format
+PHONE_PATTERN = re.compile(r'^\+?[78][0-9\s\-\(\)]{10,15}$')
+EMAIL_PATTERN = re.compile(r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$')
+
+STAGING_TABLE = 'patients_import'
+
+PLAIN_COLUMNS = ['first_name', 'last_name', 'middle_name', 'birth_date', 'gender',
+                 'phone', 'email', 'address']
+TDE_COLUMNS = ['first_name', 'last_name', 'middle_name', 'birth_date', 'gender',
+               'phone_encrypted', 'phone_iv', 'email_encrypted', 'email_iv',
+               'address_encrypted', 'address_iv']
+
+# Временная таблица живет до конца транзакции пакета
+STAGING_TABLE_SQL = {
+    False: f"""
+        CREATE TEMP TABLE {STAGING_TABLE} (
+            line_no INTEGER PRIMARY KEY,
+            first_name TEXT, last_name TEXT, middle_name TEXT,
+            birth_date DATE, gender TEXT,
+            phone TEXT, email TEXT, address TEXT
+        ) ON COMMIT DROP
+    """,
+    True: f"""
+        CREATE TEMP TABLE {STAGING_TABLE} (
+            line_no INTEGER PRIMARY KEY,
+            first_name TEXT, last_name TEXT, middle_name TEXT,
+            birth_date DATE, gender TEXT,
+            phone_encrypted BYTEA, phone_iv BYTEA,
+            email_encrypted BYTEA, email_iv BYTEA,
+            address_encrypted BYTEA, address_iv BYTEA
+        ) ON COMMIT DROP
+    """,
+}
+
+# Email уже есть в patients или повторяется выше в файле (только без TDE:
+# зашифрованный email со случайным IV сравнить нельзя)
+DUPLICATE_EMAILS_SQL = f"""
+    DELETE FROM {STAGING_TABLE} s
+    WHERE s.email IS NOT NULL
+    AND (
+        EXISTS (SELECT 1 FROM patients p WHERE p.email = s.email)
+        OR EXISTS (SELECT 1 FROM {STAGING_TABLE} d
+                   WHERE d.email = s.email AND d.line_no < s.line_no)
+    )
+    RETURNING s.line_no
+"""
+
+
+def read_records(stream, fmt: str):
+    """
+    Чтение записей из текстового потока
+    
+    Yields:
+        tuple: (номер строки, запись или None, текст ошибки или None)
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+    
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f'Некорректный JSON: {e.msg}'
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, 'Ожидается JSON-объект'
+            continue
+        yield line_no, record, None
+
+
+def clean_patient(record: dict):
+    """
+    Очистка и проверка одной записи
+    
+    Returns:
+        tuple: (данные для вставки, список ошибок)
+    """
+    data = {}
+    for field in PATIENT_FIELDS:
+        value = record.get(field)
+        if value is not None and str(value).strip():
+            data[field] = str(value).strip()
+    
+    errors = validate_patient_data(data)
+    
+    for field in ('first_name', 'last_name', 'middle_name'):
+        if len(data.get(field, '')) > MAX_NAME_LENGTH:
+            errors.append(f'Поле {field} длиннее {MAX_NAME_LENGTH} символов')
+    
+    if data.get('birth_date'):
+        try:
+            birth_date = date.fromisoformat(data['birth_date'])
+        except ValueError:
+            errors.append('Дата рождения должна быть в формате ГГГГ-ММ-ДД')
+        else:
+            if not MIN_BIRTH_DATE <= birth_date <= date.today():
+                errors.append('Дата рождения вне допустимого диапазона')
+            data['birth_date'] = birth_date
+    
+    if data.get('phone'):
+        phone = normalize_phone(data['phone'])
+        if phone is not None and not PHONE_PATTERN.match(phone):
+            errors.append('Неверный формат телефона')
+        data['phone'] = phone
+    
+    if data.get('email') and '@' in data['email'] and not EMAIL_PATTERN.match(data['email']):
+        errors.append('Неверный формат email')
+    
+    return data, errors
+
+
+def _add_error(report: dict, line_no: int, errors: list) -> None:
+    """Учет ошибочной строки; в отчет попадают первые MAX_REPORTED_ERRORS"""
+    report['failed'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'line': line_no, 'errors': errors})
+    else:
+        report['errors_truncated'] = True
+
+
+def _insert_rows_one_by_one(cursor, columns: list, rows: list, report: dict) -> int:
+    """Построчный перенос пакета: ошибка строки откатывает только ее"""
+    column_list = ', '.join(columns)
+    inserted = 0
+    
+    for row in rows:
+        cursor.execute("SAVEPOINT patients_import_row")
+        try:
+            cursor.execute(
+                f"INSERT INTO patients ({column_list}) "
+                f"SELECT {column_list} FROM {STAGING_TABLE} WHERE line_no = %s",
+                (row['line_no'],)
+            )
+        except psycopg2.Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT patients_import_row")
+            message = e.diag.message_primary or str(e).strip()
+            _add_error(report, row['line_no'], [message])
+        else:
+            cursor.execute("RELEASE SAVEPOINT patients_import_row")
+            inserted += 1
+    
+    return inserted
+
+
+def _import_batch(rows: list, report: dict) -> None:
+    """Шифрование, COPY во временную таблицу и перенос пакета в patients"""
+    tde = db.tde_manager if db.tde_enabled else None
+    if tde:
+        encrypt_rows(tde, 'patients', rows, ENCRYPTED_FIELDS)
+    columns = TDE_COLUMNS if tde else PLAIN_COLUMNS
+    column_list = ', '.join(columns)
+    
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(STAGING_TABLE_SQL[bool(tde)])
+            copy_rows(cursor, STAGING_TABLE, ['line_no'] + columns, rows)
+            
+            if not tde:
+                cursor.execute(DUPLICATE_EMAILS_SQL)
+                duplicates = {line_no for (line_no,) in cursor.fetchall()}
+                for line_no in sorted(duplicates):
+                    _add_error(report, line_no, ['Пациент с таким email уже существует'])
+                rows = [row for row in rows if row['line_no'] not in duplicates]
+            
+            cursor.execute("SAVEPOINT patients_import_batch")
+            try:
+                cursor.execute(
+                    f"INSERT INTO patients ({column_list}) "
+                    f"SELECT {column_list} FROM {STAGING_TABLE} ORDER BY line_no"
+                )
+                inserted = cursor.rowcount
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT patients_import_batch")
+                logger.warning(f"⚠️ Пакет отклонен ({e.diag.message_primary}), построчный перенос")
+                inserted = _insert_rows_one_by_one(cursor, columns, rows, report)
+        finally:
+            cursor.close()
+    
+    report['imported'] += inserted
+
+
+def import_patients(stream, fmt: str = 'ndjson', batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    Импорт пациентов из текстового потока
+    
+    Каждый пакет фиксируется отдельной транзакцией: при обрыве загрузки
+    уже перенесенные пакеты остаются в базе.
+    
+    Args:
+        stream: Текстовый поток (файл, обертка над телом запроса)
+        fmt: 'ndjson' или 'csv' (первая строка CSV - заголовок с именами полей)
+        batch_size: Размер пакета
+    
+    Returns:
+        dict: {'received', 'imported', 'failed', 'errors': [{'line', 'errors'}],
+               'errors_truncated', 'elapsed_ms'}
+    
+    Raises:
+        ValueError: Некорректные параметры
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"format должен быть одним из: {', '.join(IMPORT_FORMATS)}")
+    if not 1 <= batch_size <= MAX_BATCH_SIZE:
+        raise ValueError(f"batch_size должен быть от 1 до {MAX_BATCH_SIZE}")
+    
+    report = {
+        'received': 0,
+        'imported': 0,
+        'failed': 0,
+        'errors': [],
+        'errors_truncated': False,
+    }
+    started = time.perf_counter()
+    batch = []
+    
+    for line_no, record, error in read_records(stream, fmt):
+        report['received'] += 1
+        if error:
+            _add_error(report, line_no, [error])
+            continue
+        
+        row, errors = clean_patient(record)
+        if errors:
+            _add_error(report, line_no, errors)
+            continue
+        
+        row['line_no'] = line_no
+        batch.append(row)
+        if len(batch) >= batch_size:
+            _import_batch(batch, report)
+            batch = []
+    
+    if batch:
+        _import_batch(batch, report)
+    
+    report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"📥 Импорт пациентов: получено {report['received']}, "
+                f"добавлено {report['imported']}, ошибок {report['failed']}")
+    return report
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    
+    parser = argparse.ArgumentParser(description='Массовый импорт пациентов')
+    parser.add_argument('path', help='Файл NDJSON или CSV')
+    parser.add_argument('--format', choices=IMPORT_FORMATS, default=None,
+                        help='Формат файла (по умолчанию по расширению)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Размер пакета')
+    args = parser.parse_args()
+    
+    fmt = args.format or ('csv' if args.path.lower().endswith('.csv') else 'ndjson')
+    with open(args.path, encoding='utf-8', newline='') as stream:
+        report = import_patients(stream, fmt, args.batch_size)
+    
+    print(f"✅ Добавлено: {report['imported']} из {report['received']}")
+    if report['failed']:
+        print(f"❌ Ошибок: {report['failed']}")
+        for item in report['errors'][:20]:
+            print(f"   строка {item['line']}: {'; '.join(item['errors'])}")
+    print(f"⏱️ Время: {report['elapsed_ms'] / 1000:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Реестр именованных подготовленных запросов (PREPARE / EXECUTE)
+
+Неизменяемые SQL запросов API объявляются один раз (statements.declare).
+На каждом подключении запрос подготавливается лениво: после
+PREPARE_THRESHOLD выполнений на одном подключении выполняется PREPARE,
+дальше - EXECUTE без повторного разбора и планирования. Выгода - на
+подключениях, которые живут дольше одного запроса (пул DB_POOL_SIZE,
+пул асинхронного API); подключение на один запрос закрывается раньше, чем
+запрос успеет повториться, и выполняет SQL как обычно.
+
+psycopg2 выполняет PREPARE и EXECUTE командами SQL (параметры EXECUTE
+подставляются на клиенте). psycopg 3 подготавливает запрос на уровне
+протокола (prepare=True): команда EXECUTE не принимает серверные параметры.
+"""
+import itertools
+import logging
+import re
+import threading
+import weakref
+from typing import Dict, List
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+_NAME_RE = re.compile(r'^[a-z_][a-z0-9_]*$')
+_NAMED_PLACEHOLDER_RE = re.compile(r'%\(\w+\)s')
+_PLACEHOLDER_RE = re.compile(r'%%|%s')
+
+# Подготовленные запросы подключения нужно сбросить: запроса нет на сервере
+# (DISCARD ALL, пулер в режиме транзакций) или после миграции изменились
+# столбцы SELECT * ("cached plan must not change result type")
+STALE_STATEMENT_SQLSTATES = ('26000', '0A000')
+DEALLOCATE_ALL_SQL = "DEALLOCATE ALL"
+
+# Шаги выполнения запроса на подключении
+PLAIN, PREPARE, EXECUTE = 'plain', 'prepare', 'execute'
+PREPARED = -1
+
+PLAN_CACHE_QUERY = "SELECT * FROM pg_prepared_statements ORDER BY name"
+
+
+class PreparedStatement:
+    """Объявленный запрос: имя, SQL с параметрами %s и SQL для сервера ($1, $2...)"""
+    
+    __slots__ = ('name', 'sql', 'server_sql', 'param_count', 'prepare_sql', 'execute_sql')
+    
+    def __init__(self, name: str, sql: str):
+        if not _NAME_RE.match(name):
+            raise ValueError(f"Некорректное имя подготовленного запроса: {name}")
+        if _NAMED_PLACEHOLDER_RE.search(sql):
+            raise ValueError(f"{name}: именованные параметры %(name)s не поддерживаются")
+        
+        numbers = itertools.count(1)
+        self.name = name
+        self.sql = sql
+        # Те же $n, что формирует psycopg 3 - по ним сопоставляется pg_prepared_statements
+        self.server_sql = _PLACEHOLDER_RE.sub(
+            lambda match: '%' if match.group() == '%%' else f'${next(numbers)}', sql)
+        self.param_count = next(numbers) - 1
+        self.prepare_sql = f"PREPARE {name} AS {self.server_sql}"
+        placeholders = ', '.join(['%s'] * self.param_count)
+        self.execute_sql = f"EXECUTE {name}({placeholders})" if self.param_count else f"EXECUTE {name}"
+
+
+class StatementRegistry:
+    """
+    Реестр подготовленных запросов процесса
+    
+    Состояние подключений (число выполнений, подготовлен ли запрос) хранится
+    по слабой ссылке на подключение и исчезает вместе с ним.
+    """
+    
+    def __init__(self, prepare_threshold: int = 2, enabled: bool = True):
+        self.prepare_threshold = max(1, prepare_threshold)
+        self.enabled = enabled
+        self.statements: Dict[str, PreparedStatement] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._connections = weakref.WeakKeyDictionary()
+        self._stale = weakref.WeakSet()
+        self._lock = threading.Lock()
+    
+    def declare(self, name: str, sql: str) -> PreparedStatement:
+        """Объявление запроса; повторное объявление с тем же SQL возвращает прежний"""
+        with self._lock:
+            existing = self.statements.get(name)
+            if existing is not None:
+                if existing.sql != sql:
+                    raise ValueError(f"Подготовленный запрос {name} уже объявлен с другим SQL")
+                return existing
+            
+            statement = PreparedStatement(name, sql)
+            self.statements[name] = statement
+            self._stats[name] = {'executions': 0, 'prepares': 0, 'prepared_executions': 0}
+            return statement
+    
+    def _next_step(self, conn, statement: PreparedStatement) -> str:
+        """Учет выполнения и выбор шага: обычный SQL, PREPARE или EXECUTE"""
+        with self._lock:
+            if self.statements.get(statement.name) is not statement:
+                # Не объявлен в реестре - выполняется обычным SQL
+                return PLAIN
+            stats = self._stats[statement.name]
+            stats['executions'] += 1
+            if not self.enabled:
+                return PLAIN
+            
+            state = self._connections.get(conn)
+            if state is None:
+                state = self._connections[conn] = {}
+            
+            count = state.get(statement.name, 0)
+            if count == PREPARED:
+                stats['prepared_executions'] += 1
+                return EXECUTE
+            
+            count += 1
+            state[statement.name] = count
+            if count < self.prepare_threshold:
+                return PLAIN
+            stats['prepared_executions'] += 1
+            return PREPARE
+    
+    def _mark_prepared(self, conn, statement: PreparedStatement) -> None:
+        with self._lock:
+            self._stats[statement.name]['prepares'] += 1
+            self._connections.setdefault(conn, {})[statement.name] = PREPARED
+    
+    def _mark_stale(self, conn, statement: PreparedStatement, sqlstate) -> None:
+        """
+        Подготовленные запросы подключения устарели: при следующем выполнении
+        будет DEALLOCATE ALL и подготовка заново (в прерванной ошибкой
+        транзакции psycopg2 выполнить его сразу нельзя)
+        """
+        if sqlstate not in STALE_STATEMENT_SQLSTATES:
+            return
+        logger.warning(f"⚠️ Подготовленный запрос {statement.name} устарел ({sqlstate}), подготовим заново")
+        with self._lock:
+            self._stale.add(conn)
+    
+    def _take_stale(self, conn) -> bool:
+        """Нужно ли сбросить подготовленные запросы подключения перед выполнением"""
+        with self._lock:
+            if conn not in self._stale:
+                return False
+            self._stale.discard(conn)
+            self._connections.pop(conn, None)
+            return True
+    
+    def execute(self, cursor, statement: PreparedStatement, params=None):
+        """Выполнение запроса курсором psycopg2 (также TDECursor и InstrumentedCursor)"""
+        conn = cursor.connection
+        try:
+            if self._take_stale(conn):
+                cursor.execute(DEALLOCATE_ALL_SQL)
+            
+            step = self._next_step(conn, statement)
+            if step == PLAIN:
+                return cursor.execute(statement.sql, params)
+            if step == PREPARE:
+                cursor.execute(statement.prepare_sql)
+                self._mark_prepared(conn, statement)
+            return cursor.execute(statement.execute_sql, params)
+        except Exception as e:
+            self._mark_stale(conn, statement, getattr(e, 'pgcode', None))
+            raise
+    
+    async def execute_async(self, conn, statement: PreparedStatement, params=None, row_factory=None):
+        """
+        Выполнение запроса на асинхронном подключении psycopg 3
+        
+        Флаг prepare передается явно, поэтому собственный порог psycopg
+        (prepare_threshold) на запросы реестра не влияет; отключать его
+        (prepare_threshold=None) нельзя - это запрещает подготовку совсем.
+        row_factory заменяет формат строк подключения для этого запроса.
+        
+        Returns:
+            AsyncCursor: курсор с результатом
+        """
+        try:
+            if self._take_stale(conn):
+                # psycopg 3 сам сбрасывает свой кэш подготовленных запросов после DEALLOCATE ALL
+                await conn.execute(DEALLOCATE_ALL_SQL)
+            
+            step = self._next_step(conn, statement)
+            cursor = conn.cursor(row_factory=row_factory) if row_factory else conn.cursor()
+            await cursor.execute(statement.sql, params, prepare=step != PLAIN)
+        except Exception as e:
+            self._mark_stale(conn, statement, getattr(e, 'sqlstate', None))
+            raise
+        if step == PREPARE:
+            self._mark_prepared(conn, statement)
+        return cursor
+    
+    def plan_cache(self, rows) -> List[dict]:
+        """
+        Строки pg_prepared_statements одного подключения с именами из реестра
+        
+        generic_plans/custom_plans (PostgreSQL 14+) показывают, переиспользует
+        ли сервер общий план или планирует запрос заново под параметры.
+        """
+        names_by_sql = {statement.server_sql: name for name, statement in self.statements.items()}
+        plans = []
+        for row in rows:
+            row = dict(row)
+            name = row['name'] if row.get('from_sql') else names_by_sql.get(row.get('statement'), row['name'])
+            plans.append({
+                'name': name,
+                'declared': name in self.statements,
+                'generic_plans': row.get('generic_plans'),
+                'custom_plans': row.get('custom_plans'),
+                'prepare_time': row.get('prepare_time'),
+            })
+        return plans
+    
+    def report(self) -> dict:
+        """Статистика реестра: выполнения, подготовки и доля выполнений через EXECUTE"""
+        with self._lock:
+            statements = []
+            for name, stats in self._stats.items():
+                executions = stats['executions']
+                statements.append({
+                    'name': name,
+                    **stats,
+                    'prepared_ratio': round(stats['prepared_executions'] / executions, 3) if executions else 0.0,
+                })
+            
+            return {
+                'enabled': self.enabled,
+                'prepare_threshold': self.prepare_threshold,
+                'tracked_connections': len(self._connections),
+                'statements': sorted(statements, key=lambda item: item['executions'], reverse=True),
+            }
+    
+    def reset(self) -> None:
+        """Обнуление счетчиков; подготовленные на подключениях запросы остаются"""
+        with self._lock:
+            for stats in self._stats.values():
+                for key in stats:
+                    stats[key] = 0
+
+
+# Глобальный реестр подготовленных запросов
+statements = StatementRegistry(
+    prepare_threshold=config.PREPARE_THRESHOLD,
+    enabled=config.PREPARED_STATEMENTS_ENABLED
+)
@@ -0,0 +1,320 @@
+"""
+SQL запросов чтения для API
+
+Используется синхронными маршрутами Flask (src/api/russian_routes.py) и
+асинхронным вариантом API (src/api/async_app.py), чтобы оба возвращали
+одинаковые данные. Параметры в стиле %s подходят и для psycopg2, и для
+psycopg 3.
+
+Каждый SQL объявлен в реестре подготовленных запросов
+(src/database/prepared_statements.py) и выполняется через
+statements.execute / statements.execute_async: на долгоживущих
+подключениях повторные запросы идут через EXECUTE без разбора и
+планирования.
+
+Параметр fields= (разреженный набор полей) заменяет список SELECT
+запросов пациентов: выбираются только запрошенные столбцы, а пары
+шифротекста TDE - только для запрошенных зашифрованных полей, поэтому
+остальные поля не читаются и не расшифровываются. SQL каждого набора
+полей объявляется отдельным подготовленным запросом.
+"""
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from src.database.prepared_statements import PreparedStatement, statements
+from src.database.repositories import patients as patients_repository
+
+PATIENTS_COUNT_QUERY = "SELECT COUNT(*) as total FROM patients"
+
+PATIENTS_PAGE_QUERY = """
+    SELECT id, first_name, last_name, middle_name,
+           birth_date, gender, phone, email, address
+    FROM patients
+    ORDER BY last_name, first_name
+    LIMIT %s OFFSET %s
+"""
+
+# При TDE выбираем все поля включая зашифрованные
+PATIENTS_PAGE_TDE_QUERY = """
+    SELECT id, first_name, last_name, middle_name,
+           birth_date, gender, phone, email, address,
+           phone_encrypted, phone_iv,
+           email_encrypted, email_iv,
+           address_encrypted, address_iv
+    FROM patients
+    ORDER BY last_name, first_name
+    LIMIT %s OFFSET %s
+"""
+
+PATIENTS_SEARCH_QUERY = """
+    SELECT id, first_name, last_name, middle_name,
+           birth_date, gender, phone, email
+    FROM patients
+    WHERE last_name ILIKE %s
+       OR first_name ILIKE %s
+       OR middle_name ILIKE %s
+       OR phone LIKE %s
+    ORDER BY last_name, first_name
+    LIMIT 50
+"""
+
+# При TDE поиск только по незашифрованным полям
+PATIENTS_SEARCH_TDE_QUERY = """
+    SELECT id, first_name, last_name, middle_name,
+           birth_date, gender, phone, email, address,
+           phone_encrypted, phone_iv,
+           email_encrypted, email_iv,
+           address_encrypted, address_iv
+    FROM patients
+    WHERE last_name ILIKE %s
+       OR first_name ILIKE %s
+       OR middle_name ILIKE %s
+    ORDER BY last_name, first_name
+    LIMIT 50
+"""
+
+DOCTORS_SEARCH_QUERY = """
+    SELECT id, first_name, last_name, middle_name,
+           specialization, phone, email
+    FROM doctors
+    ORDER BY last_name, first_name
+"""
+
+APPOINTMENTS_COUNT_QUERY = """
+    SELECT COUNT(*) as total
+    FROM appointments a
+    JOIN patients p ON a.patient_id = p.id
+    JOIN doctors d ON a.doctor_id = d.id
+    {where_clause}
+"""
+
+APPOINTMENTS_PAGE_QUERY = """
+    SELECT a.*,
+           p.first_name || ' ' || p.last_name as patient_name,
+           d.first_name || ' ' || d.last_name as doctor_name,
+           d.specialization
+    FROM appointments a
+    JOIN patients p ON a.patient_id = p.id
+    JOIN doctors d ON a.doctor_id = d.id
+    {where_clause}
+    ORDER BY a.appointment_date DESC, a.id
+    LIMIT %s OFFSET %s
+"""
+
+MEDICAL_RECORD_QUERY = """
+    SELECT mr.*, a.appointment_date,
+           p.first_name || ' ' || p.last_name as patient_name,
+           d.first_name || ' ' || d.last_name as doctor_name
+    FROM medical_records mr
+    JOIN appointments a ON mr.appointment_id = a.id
+    JOIN patients p ON a.patient_id = p.id
+    JOIN doctors d ON a.doctor_id = d.id
+    WHERE mr.id = %s
+"""
+
+MEDICAL_RECORDS_COUNT_QUERY = "SELECT COUNT(*) as total FROM medical_records"
+
+MEDICAL_RECORDS_PAGE_QUERY = """
+    SELECT mr.*,
+           a.appointment_date,
+           p.first_name || ' ' || p.last_name as patient_name,
+           d.first_name || ' ' || d.last_name as doctor_name
+    FROM medical_records mr
+    JOIN appointments a ON mr.appointment_id = a.id
+    JOIN patients p ON a.patient_id = p.id
+    JOIN doctors d ON a.doctor_id = d.id
+    ORDER BY mr.created_at DESC, mr.id
+    LIMIT %s OFFSET %s
+"""
+
+PATIENT_QUERY = """
+    SELECT p.*,
+           COUNT(DISTINCT a.id) as total_appointments,
+           MAX(a.appointment_date) as last_appointment
+    FROM patients p
+    LEFT JOIN appointments a ON p.id = a.patient_id
+    WHERE p.id = %s
+    GROUP BY p.id
+"""
+
+DOCTOR_QUERY = """
+    SELECT d.*,
+           COUNT(DISTINCT a.id) as total_appointments
+    FROM doctors d
+    LEFT JOIN appointments a ON d.id = a.doctor_id
+    WHERE d.id = %s
+    GROUP BY d.id
+"""
+
+# Запросы пациентов с выбранными полями: {columns} - список SELECT
+PATIENTS_PAGE_FIELDS_QUERY = """
+    SELECT {columns}
+    FROM patients
+    ORDER BY last_name, first_name
+    LIMIT %s OFFSET %s
+"""
+
+PATIENTS_SEARCH_FIELDS_QUERY = """
+    SELECT {columns}
+    FROM patients
+    WHERE last_name ILIKE %s
+       OR first_name ILIKE %s
+       OR middle_name ILIKE %s{phone_clause}
+    ORDER BY last_name, first_name
+    LIMIT 50
+"""
+
+PATIENT_FIELDS_QUERY = """
+    SELECT {columns}
+    FROM patients p
+    WHERE p.id = %s
+"""
+
+PATIENT_WITH_APPOINTMENTS_FIELDS_QUERY = """
+    SELECT {columns}
+    FROM patients p
+    LEFT JOIN appointments a ON p.id = a.patient_id
+    WHERE p.id = %s
+    GROUP BY p.id
+"""
+
+# Зашифрованные при TDE поля пациента и вычисляемые поля карточки пациента
+PATIENT_ENCRYPTED_FIELDS = ('phone', 'email', 'address')
+PATIENT_AGGREGATES = {
+    'total_appointments': 'COUNT(DISTINCT a.id) as total_appointments',
+    'last_appointment': 'MAX(a.appointment_date) as last_appointment',
+}
+
+# === ПОДГОТОВЛЕННЫЕ ЗАПРОСЫ ===
+PATIENTS_COUNT = statements.declare('api_patients_count', PATIENTS_COUNT_QUERY)
+PATIENTS_PAGE = statements.declare('api_patients_page', PATIENTS_PAGE_QUERY)
+PATIENTS_PAGE_TDE = statements.declare('api_patients_page_tde', PATIENTS_PAGE_TDE_QUERY)
+PATIENTS_SEARCH = statements.declare('api_patients_search', PATIENTS_SEARCH_QUERY)
+PATIENTS_SEARCH_TDE = statements.declare('api_patients_search_tde', PATIENTS_SEARCH_TDE_QUERY)
+PATIENT = statements.declare('api_patient', PATIENT_QUERY)
+DOCTORS_SEARCH = statements.declare('api_doctors_search', DOCTORS_SEARCH_QUERY)
+DOCTOR = statements.declare('api_doctor', DOCTOR_QUERY)
+MEDICAL_RECORD = statements.declare('api_medical_record', MEDICAL_RECORD_QUERY)
+MEDICAL_RECORDS_COUNT = statements.declare('api_medical_records_count', MEDICAL_RECORDS_COUNT_QUERY)
+MEDICAL_RECORDS_PAGE = statements.declare('api_medical_records_page', MEDICAL_RECORDS_PAGE_QUERY)
+
+# Фильтр по статусу меняет текст запроса - по отдельному запросу на вариант
+STATUS_WHERE_CLAUSE = "WHERE a.status = %s"
+APPOINTMENTS_COUNT = statements.declare(
+    'api_appointments_count', APPOINTMENTS_COUNT_QUERY.format(where_clause=""))
+APPOINTMENTS_PAGE = statements.declare(
+    'api_appointments_page', APPOINTMENTS_PAGE_QUERY.format(where_clause=""))
+APPOINTMENTS_BY_STATUS_COUNT = statements.declare(
+    'api_appointments_by_status_count', APPOINTMENTS_COUNT_QUERY.format(where_clause=STATUS_WHERE_CLAUSE))
+APPOINTMENTS_BY_STATUS_PAGE = statements.declare(
+    'api_appointments_by_status_page', APPOINTMENTS_PAGE_QUERY.format(where_clause=STATUS_WHERE_CLAUSE))
+
+
+# (вид запроса, поля, TDE) -> подготовленный запрос
+_field_statements: Dict[Tuple, PreparedStatement] = {}
+
+# Наборы полей задает клиент: сверх этого числа проекции не объявляются
+# в реестре и выполняются обычным SQL, без PREPARE на подключениях
+MAX_FIELD_STATEMENTS = 64
+
+
+def patient_fields(fields: Optional[str], aggregates: bool = False) -> Optional[Tuple[str, ...]]:
+    """
+    Поля из параметра fields=a,b,c (id - всегда) в порядке столбцов модели;
+    None - все поля ответа. Порядок в запросе клиента не важен: одни и те же
+    поля в любом порядке дают один подготовленный запрос.
+    
+    Args:
+        fields: значение параметра запроса
+        aggregates: разрешены вычисляемые поля карточки пациента
+    
+    Raises:
+        ValueError: неизвестное поле
+    """
+    if not fields:
+        return None
+    
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    extra = set(PATIENT_AGGREGATES) if aggregates else set()
+    unknown = [name for name in names if name not in patients_repository.columns and name not in extra]
+    if unknown:
+        raise ValueError(f"Неизвестные поля: {', '.join(unknown)}")
+    requested = set(names) | {'id'}
+    return tuple(name for name in patients_repository.columns + tuple(PATIENT_AGGREGATES) if name in requested)
+
+
+def _patient_columns(fields: Tuple[str, ...], tde_enabled: bool, prefix: str = '') -> List[str]:
+    """Столбцы SELECT для полей; при TDE - с парами шифротекста запрошенных полей"""
+    columns = [prefix + name for name in fields if name not in PATIENT_AGGREGATES]
+    if tde_enabled:
+        for name in PATIENT_ENCRYPTED_FIELDS:
+            if name in fields:
+                columns += [f'{prefix}{name}_encrypted', f'{prefix}{name}_iv']
+    return columns
+
+
+def _fields_statement(kind: str, sql: str, cache_key: Tuple) -> PreparedStatement:
+    statement = _field_statements.get(cache_key)
+    if statement is not None:
+        return statement
+    
+    name = f'api_{kind}_{hashlib.sha1(sql.encode()).hexdigest()[:10]}'
+    if len(_field_statements) >= MAX_FIELD_STATEMENTS:
+        return PreparedStatement(name, sql)
+    return _field_statements.setdefault(cache_key, statements.declare(name, sql))
+
+
+def patients_page_statement(tde_enabled: bool, fields: Optional[Tuple[str, ...]] = None) -> PreparedStatement:
+    """Страница списка пациентов (параметры: limit, offset)"""
+    if fields is None:
+        return PATIENTS_PAGE_TDE if tde_enabled else PATIENTS_PAGE
+    
+    sql = PATIENTS_PAGE_FIELDS_QUERY.format(columns=', '.join(_patient_columns(fields, tde_enabled)))
+    return _fields_statement('patients_page', sql, ('page', fields, tde_enabled))
+
+
+def patient_search_statement(query: str, tde_enabled: bool,
+                             fields: Optional[Tuple[str, ...]] = None) -> Tuple[PreparedStatement, tuple]:
+    """
+    Поиск пациентов по ФИО (без TDE - и по телефону)
+    
+    Returns:
+        Tuple[PreparedStatement, tuple]: запрос и параметры
+    """
+    pattern = f'%{query}%'
+    params = (pattern, pattern, pattern) if tde_enabled else (pattern, pattern, pattern, pattern)
+    if fields is None:
+        return (PATIENTS_SEARCH_TDE if tde_enabled else PATIENTS_SEARCH), params
+    
+    sql = PATIENTS_SEARCH_FIELDS_QUERY.format(
+        columns=', '.join(_patient_columns(fields, tde_enabled)),
+        phone_clause='' if tde_enabled else '\n       OR phone LIKE %s')
+    return _fields_statement('patients_search', sql, ('search', fields, tde_enabled)), params
+
+
+def patient_statement(tde_enabled: bool, fields: Optional[Tuple[str, ...]] = None) -> PreparedStatement:
+    """
+    Карточка пациента (параметр: id); без fields - все столбцы и число
+    приёмов, с fields - только запрошенное (без JOIN, если не нужны приёмы)
+    """
+    if fields is None:
+        return PATIENT
+    
+    columns = _patient_columns(fields, tde_enabled, prefix='p.')
+    aggregates = [PATIENT_AGGREGATES[name] for name in fields if name in PATIENT_AGGREGATES]
+    template = PATIENT_WITH_APPOINTMENTS_FIELDS_QUERY if aggregates else PATIENT_FIELDS_QUERY
+    sql = template.format(columns=', '.join(columns + aggregates))
+    return _fields_statement('patient', sql, ('patient', fields, tde_enabled))
+
+
+def appointment_statements(status: Optional[str] = None) -> Tuple[PreparedStatement, PreparedStatement, List]:
+    """
+    Подсчет и страница списка приемов с фильтром по статусу
+    
+    Returns:
+        Tuple[PreparedStatement, PreparedStatement, List]: запрос подсчета,
+        запрос страницы (дополнительно limit и offset) и параметры фильтра
+    """
+    if status:
+        return APPOINTMENTS_BY_STATUS_COUNT, APPOINTMENTS_BY_STATUS_PAGE, [status]
+    return APPOINTMENTS_COUNT, APPOINTMENTS_PAGE, []
@@ -0,0 +1,238 @@
+"""
+Репозитории моделей src/models и пакетная загрузка связанных строк
+
+Repository знает таблицу модели и выбирает строки только пакетом ключей:
+"WHERE <ключ> = ANY(%s)" - один запрос на любое число id. Запроса "по
+одному id" у репозитория нет, поэтому цикл с запросом на каждую строку
+(N+1) написать нельзя: связанные строки страницы собирает BatchLoader.
+
+    session = LoaderSession(cursor, tde_manager)
+    loader = session.loader(repositories.prescriptions, 'medical_record_id', many=True)
+    loader.load_many(record['id'] for record in records)
+    for record in records:
+        record['prescriptions'] = loader.get(record['id'])  # один запрос на все записи
+
+Проекция (fields) ограничивает выбираемые столбцы полями модели; ключ
+выбирается всегда. Строки - slotted-классы RowMapper: при TDE к полю
+добавляется пара <поле>_encrypted/<поле>_iv, а в строке остается
+расшифрованное значение (без шифротекста - открытый столбец, как в
+TDECursor). SQL каждой проекции объявляется в реестре подготовленных
+запросов.
+"""
+import dataclasses
+import hashlib
+import threading
+import typing
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.database.instrumentation import instrument_cursor
+from src.database.prepared_statements import PreparedStatement, statements
+from src.database.row_mapping import ENCRYPTED_SUFFIX, IV_SUFFIX, RowMapper, TUPLE_CURSOR, column_names
+from src.models import Appointment, Doctor, MedicalRecord, Patient, Prescription
+
+
+def _model_columns(model) -> Tuple[str, ...]:
+    """Столбцы таблицы модели: поля dataclass без связей (списков моделей)"""
+    hints = typing.get_type_hints(model)
+    columns = []
+    for field in dataclasses.fields(model):
+        hint = hints.get(field.name)
+        if typing.get_origin(hint) is typing.Union:
+            hint = next(arg for arg in typing.get_args(hint) if arg is not type(None))
+        if typing.get_origin(hint) in (list, List):
+            continue
+        columns.append(field.name)
+    return tuple(columns)
+
+
+class Repository:
+    """
+    Доступ к таблице модели пакетами ключей
+    
+    Все методы принимают курсор psycopg2 любого типа (RealDictCursor,
+    TDECursor): запрос выполняется отдельным курсором кортежей на том же
+    подключении, в той же транзакции.
+    """
+    
+    def __init__(self, model, table: str, order_by: str = 'id'):
+        self.model = model
+        self.table = table
+        self.order_by = order_by
+        self.columns = _model_columns(model)
+        self.mapper = RowMapper(model, table, plaintext_fallback=True)
+        # (ключ, проекция, поля TDE) -> подготовленный запрос
+        self._statements: Dict[Tuple, PreparedStatement] = {}
+        self._lock = threading.Lock()
+    
+    def projection(self, fields: Optional[Iterable[str]] = None, key: str = 'id') -> Tuple[str, ...]:
+        """
+        Поля проекции в порядке столбцов модели (ключ добавляется всегда)
+        
+        Raises:
+            ValueError: поле не является столбцом модели
+        """
+        if fields is None:
+            return self.columns
+        
+        requested = set(fields) | {key}
+        unknown = requested.difference(self.columns)
+        if unknown:
+            raise ValueError(f"Неизвестные поля {self.table}: {', '.join(sorted(unknown))}")
+        return tuple(column for column in self.columns if column in requested)
+    
+    def _encrypted_fields(self, tde_manager) -> List[str]:
+        if tde_manager is None:
+            return []
+        return tde_manager.encryption_config.get(self.table, {}).get('fields', [])
+    
+    def statement(self, key: str = 'id', fields: Optional[Iterable[str]] = None,
+                  tde_manager=None) -> PreparedStatement:
+        """Запрос строк по массиву значений ключа для проекции (кэшируется)"""
+        projection = self.projection(fields, key)
+        encrypted = tuple(field for field in self._encrypted_fields(tde_manager)
+                          if field in projection or field + ENCRYPTED_SUFFIX in projection)
+        cache_key = (key, projection, encrypted)
+        statement = self._statements.get(cache_key)
+        if statement is not None:
+            return statement
+        
+        columns = list(projection)
+        for field in encrypted:
+            columns += [field + suffix for suffix in (ENCRYPTED_SUFFIX, IV_SUFFIX)
+                        if field + suffix not in columns]
+        sql = (f"SELECT {', '.join(columns)} FROM {self.table} "
+               f"WHERE {key} = ANY(%s) ORDER BY {self.order_by}")
+        
+        # Имя по тексту запроса: одна проекция - один подготовленный запрос
+        digest = hashlib.sha1(sql.encode()).hexdigest()[:10]
+        statement = statements.declare(f"repo_{self.table}_{digest}", sql)
+        with self._lock:
+            return self._statements.setdefault(cache_key, statement)
+    
+    def find_by(self, cursor, key: str, values: Iterable, fields: Optional[Iterable[str]] = None,
+                tde_manager=None) -> list:
+        """Строки, у которых значение key входит в values, одним запросом"""
+        values = list(dict.fromkeys(values))
+        if not values:
+            return []
+        
+        statement = self.statement(key, fields, tde_manager)
+        tuple_cursor = instrument_cursor(cursor.connection.cursor(cursor_factory=TUPLE_CURSOR))
+        try:
+            statements.execute(tuple_cursor, statement, (values,))
+            return self.mapper.fetchall(tuple_cursor, tde_manager)
+        finally:
+            tuple_cursor.close()
+    
+    def get_many(self, cursor, ids: Iterable, fields: Optional[Iterable[str]] = None,
+                 tde_manager=None) -> Dict[Any, Any]:
+        """Строки по первичному ключу: {id: строка}"""
+        return {row.id: row for row in self.find_by(cursor, 'id', ids, fields, tde_manager)}
+    
+    async def find_by_async(self, conn, key: str, values: Iterable, fields: Optional[Iterable[str]] = None,
+                            tde_manager=None) -> Callable[[], list]:
+        """
+        То же на асинхронном подключении psycopg 3
+        
+        Строки не расшифровываются в цикле событий: возвращается функция,
+        которая строит (и расшифровывает) строки - ее вызывают в пуле потоков.
+        """
+        from psycopg.rows import tuple_row
+        
+        values = list(dict.fromkeys(values))
+        if not values:
+            return list
+        
+        cursor = await statements.execute_async(conn, self.statement(key, fields, tde_manager),
+                                                (values,), row_factory=tuple_row)
+        rows = await cursor.fetchall()
+        constructor = self.mapper.constructor(column_names(cursor), tde_manager)
+        return lambda: list(map(constructor, rows))
+
+
+class BatchLoader:
+    """
+    Загрузчик в стиле DataLoader: ключи копятся через load(), первый get()
+    выбирает все накопленные ключи одним запросом
+    
+    get() ключа, который не был передан в load(), - ошибка: иначе каждый
+    такой вызов стал бы отдельным запросом.
+    """
+    
+    def __init__(self, fetch: Callable[[List], list], key: str, many: bool = False):
+        self.fetch = fetch
+        self.key = key
+        self.many = many
+        self.queries = 0
+        self._pending: Dict[Any, None] = {}
+        self._results: Dict[Any, Any] = {}
+    
+    def load(self, value) -> None:
+        if value is not None and value not in self._results:
+            self._pending[value] = None
+    
+    def load_many(self, values: Iterable) -> None:
+        for value in values:
+            self.load(value)
+    
+    def dispatch(self) -> None:
+        """Выборка всех накопленных ключей"""
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        self._pending.clear()
+        
+        rows = self.fetch(keys)
+        self.queries += 1
+        for value in keys:
+            self._results[value] = [] if self.many else None
+        for row in rows:
+            value = getattr(row, self.key)
+            if self.many:
+                self._results[value].append(row)
+            else:
+                self._results[value] = row
+    
+    def get(self, value):
+        """Строка (many=True - список строк) по значению ключа"""
+        if value is None:
+            return [] if self.many else None
+        if value in self._pending:
+            self.dispatch()
+        try:
+            return self._results[value]
+        except KeyError:
+            raise LookupError(f"Ключ {self.key}={value!r} не передан в load() до get()") from None
+
+
+class LoaderSession:
+    """Загрузчики одного HTTP-запроса на одном курсоре"""
+    
+    def __init__(self, cursor, tde_manager=None):
+        self.cursor = cursor
+        self.tde_manager = tde_manager
+        self._loaders: Dict[Tuple, BatchLoader] = {}
+    
+    def loader(self, repository: Repository, key: str = 'id', fields: Optional[Iterable[str]] = None,
+               many: bool = False) -> BatchLoader:
+        """Загрузчик строк repository по key (many=True - несколько строк на значение)"""
+        projection = repository.projection(fields, key)
+        loader_key = (repository.table, key, projection, many)
+        loader = self._loaders.get(loader_key)
+        if loader is None:
+            fetch = lambda values: repository.find_by(self.cursor, key, values, projection, self.tde_manager)
+            loader = self._loaders[loader_key] = BatchLoader(fetch, key, many)
+        return loader
+    
+    @property
+    def queries(self) -> int:
+        """Число выполненных запросов загрузчиков"""
+        return sum(loader.queries for loader in self._loaders.values())
+
+
+# Репозитории моделей
+patients = Repository(Patient, 'patients', order_by='last_name, first_name, id')
+doctors = Repository(Doctor, 'doctors', order_by='last_name, first_name, id')
+appointments = Repository(Appointment, 'appointments', order_by='appointment_date, id')
+medical_records = Repository(MedicalRecord, 'medical_records')
+prescriptions = Repository(Prescription, 'prescriptions')
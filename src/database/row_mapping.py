@@ -0,0 +1,153 @@
+"""
+Компактные строки результата: slotted-классы моделей из кортежей курсора
+
+RealDictCursor создает словарь на каждую строку, затем dict(row) в
+форматировании и copy() в decrypt_record - до трех словарей на строку.
+RowMapper читает кортежи обычного курсора: по cursor.description один раз
+компилируются класс строки (dataclass со __slots__ по выбранным столбцам,
+типы и методы - из модели src/models) и конструктор, который берет
+значения из кортежа по индексу.
+
+Зашифрованные TDE столбцы (<поле>_encrypted, <поле>_iv) в класс не
+попадают: конструктор сразу записывает в поле расшифрованное значение
+(без шифротекста - None, как в format_patient_data; с plaintext_fallback -
+открытый столбец <поле>, если он выбран, как в TDECursor). Поля класса
+упорядочены по имени, как ключи jsonify (sort_keys), поэтому orjson кодирует
+строки напрямую, без промежуточных словарей, в тот же JSON.
+"""
+import dataclasses
+import keyword
+import threading
+import typing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psycopg2.extensions
+
+# Курсор с кортежами вместо RealDictCursor: db.get_cursor(cursor_factory=TUPLE_CURSOR)
+TUPLE_CURSOR = psycopg2.extensions.cursor
+
+ENCRYPTED_SUFFIX = '_encrypted'
+IV_SUFFIX = '_iv'
+
+
+def column_names(cursor) -> Tuple[str, ...]:
+    """Имена столбцов результата из cursor.description"""
+    return tuple(column[0] for column in cursor.description)
+
+
+def _check_column(name: str) -> None:
+    if not name.isidentifier() or keyword.iskeyword(name):
+        raise ValueError(f"Столбец {name!r} нельзя отобразить в поле, задайте псевдоним в SQL")
+
+
+class RowMapper:
+    """
+    Отображение строк запроса на slotted-класс модели
+    
+    Пример:
+        patients = RowMapper(Patient, table='patients')
+        with db.get_cursor(cursor_factory=TUPLE_CURSOR) as cursor:
+            cursor.execute(...)
+            rows = patients.fetchall(cursor, tde_manager)
+    """
+    
+    def __init__(self, model, table: Optional[str] = None, plaintext_fallback: bool = False):
+        self.model = model
+        self.table = table
+        self.plaintext_fallback = plaintext_fallback
+        self._hints = typing.get_type_hints(model) if dataclasses.is_dataclass(model) else {}
+        # (столбцы, менеджер TDE) -> конструктор строки
+        self._constructors: Dict[Tuple, Callable[[tuple], Any]] = {}
+        self._lock = threading.Lock()
+    
+    def _encrypted_fields(self, columns: Tuple[str, ...], tde_manager) -> List[str]:
+        """Поля, для которых в результате есть пара <поле>_encrypted/<поле>_iv"""
+        if tde_manager is None or self.table is None:
+            return []
+        fields = tde_manager.encryption_config.get(self.table, {}).get('fields', [])
+        return [field for field in fields
+                if field + ENCRYPTED_SUFFIX in columns and field + IV_SUFFIX in columns]
+    
+    def _row_class(self, field_names: List[str], decrypted: List[str]):
+        """Dataclass со __slots__ по полям результата и методами модели"""
+        namespace = {
+            name: value for name, value in vars(self.model).items()
+            if callable(value) and not name.startswith('__')
+        }
+        if '__str__' in vars(self.model):
+            namespace['__str__'] = vars(self.model)['__str__']
+        namespace['__model__'] = self.model
+        namespace['__decrypted__'] = tuple(decrypted)
+        
+        fields = [(name, self._hints.get(name, Any)) for name in field_names]
+        return dataclasses.make_dataclass(f'{self.model.__name__}Row', fields,
+                                          namespace=namespace, slots=True)
+    
+    def constructor(self, columns: Tuple[str, ...], tde_manager=None) -> Callable[[tuple], Any]:
+        """
+        Конструктор строки для набора столбцов (кэшируется)
+        
+        Returns:
+            Callable[[tuple], Any]: кортеж курсора -> экземпляр класса строки
+        """
+        key = (columns, tde_manager)
+        constructor = self._constructors.get(key)
+        if constructor is not None:
+            return constructor
+        
+        decrypted = self._encrypted_fields(columns, tde_manager)
+        hidden = {field + suffix for field in decrypted for suffix in (ENCRYPTED_SUFFIX, IV_SUFFIX)}
+        
+        # Как в RealDictCursor: при повторе имени берется последний столбец
+        positions = {}
+        for index, name in enumerate(columns):
+            if name not in hidden:
+                _check_column(name)
+                positions[name] = index
+        for field in decrypted:
+            positions.setdefault(field, None)
+        
+        field_names = sorted(positions)
+        row_class = self._row_class(field_names, decrypted)
+        
+        arguments = []
+        for name in field_names:
+            if name in decrypted:
+                ciphertext = columns.index(name + ENCRYPTED_SUFFIX)
+                iv = columns.index(name + IV_SUFFIX)
+                plaintext = positions[name] if self.plaintext_fallback else None
+                if plaintext is None:
+                    arguments.append(f"_decrypt({name!r}, row[{ciphertext}], row[{iv}])")
+                else:
+                    arguments.append(f"(_decrypt({name!r}, row[{ciphertext}], row[{iv}]) "
+                                     f"if row[{ciphertext}] else row[{plaintext}])")
+            else:
+                arguments.append(f"row[{positions[name]}]")
+        
+        def _decrypt(field, ciphertext, iv):
+            if not ciphertext or not iv:
+                return None
+            return tde_manager.decrypt_field(self.table, field, bytes(ciphertext), bytes(iv))
+        
+        source = f"def build(row):\n    return _cls({', '.join(arguments)})\n"
+        scope = {'_cls': row_class, '_decrypt': _decrypt}
+        exec(compile(source, f'<row {row_class.__name__}>', 'exec'), scope)
+        constructor = scope['build']
+        
+        with self._lock:
+            return self._constructors.setdefault(key, constructor)
+    
+    def map_rows(self, cursor, rows, tde_manager=None) -> list:
+        """Строки, уже полученные из cursor, в экземпляры класса строки"""
+        if not rows:
+            return []
+        return list(map(self.constructor(column_names(cursor), tde_manager), rows))
+    
+    def fetchall(self, cursor, tde_manager=None) -> list:
+        return self.map_rows(cursor, cursor.fetchall(), tde_manager)
+    
+    def fetchone(self, cursor, tde_manager=None):
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return self.constructor(column_names(cursor), tde_manager)(row)
@@ -0,0 +1,116 @@
+"""
+Поиск свободных слотов приема
+
+Слоты строятся из рабочих интервалов doctor_schedules (миграция
+06_doctor_schedules.sql) и проверяются на занятость одним SQL-запросом
+по GiST-индексу ограничения excl_appointments_doctor_overlap
+(07_appointment_overlaps.sql): ответ на "ближайшие N свободных слотов
+по специализации" - один запрос к БД вместо перебора страниц приемов.
+"""
+import logging
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.database.connection import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_DAYS = 14
+DEFAULT_APPOINTMENT_MINUTES = 30  # Совпадает с DEFAULT столбца appointments.duration_minutes
+MAX_SEARCH_DAYS = 62
+MAX_SLOTS = 200
+
+# Слот занят, если с ним пересекается интервал любого не отмененного приема врача
+FREE_SLOTS_QUERY = """
+    WITH days AS (
+        SELECT day::date AS day
+        FROM generate_series(%(date_from)s::date, %(date_to)s::date, INTERVAL '1 day') AS day
+    ),
+    candidate_slots AS (
+        SELECT s.doctor_id,
+               s.slot_minutes,
+               days.day + s.start_time + make_interval(mins => s.slot_minutes * n) AS slot_start
+        FROM days
+        JOIN doctor_schedules s ON s.weekday = EXTRACT(ISODOW FROM days.day)
+        JOIN doctors d ON d.id = s.doctor_id
+        CROSS JOIN LATERAL generate_series(
+            0,
+            FLOOR(EXTRACT(EPOCH FROM (s.end_time - s.start_time)) / 60 / s.slot_minutes)::int - 1
+        ) AS n
+        WHERE {doctor_filter}
+    )
+    SELECT c.doctor_id,
+           d.first_name || ' ' || d.last_name as doctor_name,
+           d.specialization,
+           c.slot_start,
+           c.slot_start + make_interval(mins => c.slot_minutes) AS slot_end
+    FROM candidate_slots c
+    JOIN doctors d ON d.id = c.doctor_id
+    WHERE c.slot_start > LOCALTIMESTAMP
+    AND NOT EXISTS (
+        SELECT 1
+        FROM appointments a
+        WHERE a.doctor_id = c.doctor_id
+        AND a.status != 'cancelled'
+        AND a.appointment_period && tstzrange(
+            c.slot_start AT TIME ZONE 'UTC',
+            (c.slot_start + make_interval(mins => c.slot_minutes)) AT TIME ZONE 'UTC',
+            '[)'
+        )
+    )
+    ORDER BY c.slot_start, c.doctor_id
+    LIMIT %(limit)s
+"""
+
+
+def find_free_slots(date_from: Optional[date] = None,
+                    days: int = DEFAULT_SEARCH_DAYS,
+                    doctor_id: Optional[int] = None,
+                    specialization: Optional[str] = None,
+                    limit: int = 20) -> list:
+    """
+    Ближайшие свободные слоты
+    
+    Args:
+        date_from: Первый день поиска (по умолчанию сегодня)
+        days: Длина периода поиска в днях
+        doctor_id: Только указанный врач
+        specialization: Только врачи этой специализации
+        limit: Максимум слотов в ответе
+    
+    Returns:
+        list: Слоты {'doctor_id', 'doctor_name', 'specialization', 'slot_start', 'slot_end'}
+              в порядке времени
+    
+    Raises:
+        ValueError: Некорректные параметры
+    """
+    if not 1 <= days <= MAX_SEARCH_DAYS:
+        raise ValueError(f"days должен быть от 1 до {MAX_SEARCH_DAYS}")
+    if not 1 <= limit <= MAX_SLOTS:
+        raise ValueError(f"limit должен быть от 1 до {MAX_SLOTS}")
+    
+    date_from = date_from or date.today()
+    params = {
+        'date_from': date_from,
+        'date_to': date_from + timedelta(days=days - 1),
+        'limit': limit,
+    }
+    
+    conditions = []
+    if doctor_id is not None:
+        conditions.append("s.doctor_id = %(doctor_id)s")
+        params['doctor_id'] = doctor_id
+    if specialization:
+        conditions.append("d.specialization = %(specialization)s")
+        params['specialization'] = specialization
+    
+    query = FREE_SLOTS_QUERY.format(doctor_filter=' AND '.join(conditions) or 'TRUE')
+    
+    with db.get_cursor() as cursor:
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
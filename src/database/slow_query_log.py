@@ -0,0 +1,291 @@
+"""
+Журнал медленных SQL-запросов
+
+Запросы дольше порога логируются с нормализованным SQL, параметрами
+(персональные данные скрыты), длительностью и эндпоинтом API.
+Статистика агрегируется по отпечатку (fingerprint) запроса; часть
+медленных SELECT может сопровождаться планом EXPLAIN (ANALYZE, BUFFERS).
+"""
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Optional, List
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+# Ограничение числа отпечатков, чтобы журнал не рос бесконечно
+MAX_FINGERPRINTS = 500
+MAX_ENDPOINTS_PER_FINGERPRINT = 20
+
+_COMMENT_RE = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER_RE = re.compile(r'%\(\w+\)s|%s')
+_NUMBER_RE = re.compile(r'(?<![\w$])-?\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+_READ_ONLY_RE = re.compile(r'^\s*(SELECT|WITH)\b', re.I)
+_WRITE_RE = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|FOR\s+UPDATE)\b', re.I)
+# Строки условий плана (Index Cond, Filter, Hash Cond, Join Filter...): в них
+# подставлены значения параметров запроса (Rows Removed by Filter - счетчик)
+_PLAN_CONDITION_RE = re.compile(r'^(?![ \t]*Rows Removed)([ \t]*[\w -]*(?:Cond|Filter): )(.*)$', re.M)
+
+
+def normalize_sql(query) -> str:
+    """
+    Нормализация SQL для группировки: без комментариев, литералов и лишних пробелов
+    
+    Example:
+        "SELECT * FROM patients WHERE id = %s LIMIT 10"
+        -> "SELECT * FROM patients WHERE id = ? LIMIT ?"
+    """
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', errors='replace')
+    query = str(query)
+    
+    query = _COMMENT_RE.sub(' ', query)
+    query = _STRING_RE.sub('?', query)
+    query = _PLACEHOLDER_RE.sub('?', query)
+    query = _NUMBER_RE.sub('?', query)
+    query = _IN_LIST_RE.sub('(...)', query)
+    return _WHITESPACE_RE.sub(' ', query).strip().rstrip(';')
+
+
+def redact_plan(plan: str) -> str:
+    """
+    План EXPLAIN без значений параметров
+    
+    Строковые литералы заменяются везде, числа - только в условиях:
+    стоимость, число строк и время узлов остаются.
+    
+    Example:
+        "Index Cond: ((last_name)::text = 'Иванов'::text)"
+        -> "Index Cond: ((last_name)::text = '?'::text)"
+    """
+    plan = _STRING_RE.sub("'?'", plan)
+    return _PLAN_CONDITION_RE.sub(
+        lambda match: match.group(1) + _NUMBER_RE.sub('?', match.group(2)), plan)
+
+
+def fingerprint_sql(normalized_query: str) -> str:
+    """Короткий отпечаток нормализованного запроса"""
+    return hashlib.sha1(normalized_query.encode('utf-8')).hexdigest()[:16]
+
+
+def _redact_value(value):
+    """Числа и флаги оставляем, остальное (ФИО, контакты, даты) скрываем"""
+    if value is None or isinstance(value, (bool, int, float, Decimal)):
+        return value
+    if isinstance(value, str):
+        return f'<str:{len(value)}>'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f'<bytes:{len(value)}>'
+    if isinstance(value, (datetime, date)):
+        return f'<{type(value).__name__}>'
+    if isinstance(value, (list, tuple)):
+        return [_redact_value(item) for item in value]
+    return f'<{type(value).__name__}>'
+
+
+def redact_params(params):
+    """Параметры запроса без персональных данных пациентов"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: _redact_value(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [_redact_value(value) for value in params]
+    return _redact_value(params)
+
+
+def is_explainable(query) -> bool:
+    """EXPLAIN ANALYZE выполняет запрос повторно - только для чтения"""
+    query = query.decode('utf-8', errors='replace') if isinstance(query, bytes) else str(query)
+    query = _COMMENT_RE.sub(' ', query)
+    return bool(_READ_ONLY_RE.match(query)) and not _WRITE_RE.search(query)
+
+
+class SlowQueryStats:
+    """Накопленная статистика одного отпечатка"""
+    
+    def __init__(self, fingerprint: str, normalized_query: str):
+        self.fingerprint = fingerprint
+        self.query = normalized_query
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.endpoints: Dict[str, int] = {}
+        self.last_params = None
+        self.last_seen = None
+        self.plan: Optional[str] = None
+        self.plan_captured_at = None
+        self.plan_duration_ms = None
+    
+    def to_dict(self) -> dict:
+        return {
+            'fingerprint': self.fingerprint,
+            'query': self.query,
+            'count': self.count,
+            'total_ms': round(self.total_time * 1000, 2),
+            'mean_ms': round(self.total_time / self.count * 1000, 2) if self.count else 0,
+            'max_ms': round(self.max_time * 1000, 2),
+            'endpoints': dict(sorted(self.endpoints.items(), key=lambda item: -item[1])),
+            'last_params': self.last_params,
+            'last_seen': self.last_seen,
+            'plan': self.plan,
+            'plan_captured_at': self.plan_captured_at,
+            'plan_duration_ms': self.plan_duration_ms,
+        }
+
+
+class SlowQueryLog:
+    """
+    Журнал медленных запросов с агрегацией по отпечаткам
+    
+    Args:
+        threshold_ms: Порог длительности, с которого запрос считается медленным
+        explain_sample_rate: Доля медленных SELECT, для которых снимается план (0..1)
+        enabled: Включен ли журнал
+    """
+    
+    def __init__(self, threshold_ms: float = 200, explain_sample_rate: float = 0.0, enabled: bool = True):
+        self.threshold = threshold_ms / 1000
+        self.explain_sample_rate = explain_sample_rate
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.entries: Dict[str, SlowQueryStats] = {}
+        self.dropped = 0
+        self.started_at = time.time()
+    
+    def is_slow(self, elapsed: float) -> bool:
+        return self.enabled and elapsed >= self.threshold
+    
+    def record(self, query, params, elapsed: float, endpoint: Optional[str] = None, cursor=None) -> None:
+        """
+        Учесть медленный запрос
+        
+        Args:
+            query: SQL как был передан в execute
+            params: Параметры запроса (будут скрыты)
+            elapsed: Длительность в секундах
+            endpoint: Эндпоинт API, вызвавший запрос
+            cursor: Курсор, на соединении которого можно снять EXPLAIN
+        """
+        normalized = normalize_sql(query)
+        fingerprint = fingerprint_sql(normalized)
+        redacted = redact_params(params)
+        endpoint = endpoint or 'вне запроса API'
+        
+        logger.warning(
+            f"🐢 Медленный запрос {elapsed * 1000:.1f} мс [{endpoint}] "
+            f"{fingerprint}: {normalized[:500]} params={redacted}"
+        )
+        
+        with self._lock:
+            stats = self.entries.get(fingerprint)
+            if stats is None:
+                if len(self.entries) >= MAX_FINGERPRINTS:
+                    self.dropped += 1
+                    return
+                stats = self.entries[fingerprint] = SlowQueryStats(fingerprint, normalized)
+            
+            stats.count += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.last_params = redacted
+            stats.last_seen = datetime.now().isoformat(timespec='seconds')
+            if endpoint in stats.endpoints or len(stats.endpoints) < MAX_ENDPOINTS_PER_FINGERPRINT:
+                stats.endpoints[endpoint] = stats.endpoints.get(endpoint, 0) + 1
+        
+        if cursor is not None and self._should_explain(query):
+            plan = self.capture_plan(cursor, query, params)
+            if plan is not None:
+                with self._lock:
+                    stats.plan = plan
+                    stats.plan_captured_at = datetime.now().isoformat(timespec='seconds')
+                    stats.plan_duration_ms = round(elapsed * 1000, 2)
+    
+    def _should_explain(self, query) -> bool:
+        return (self.explain_sample_rate > 0
+                and random.random() < self.explain_sample_rate
+                and is_explainable(query))
+    
+    def capture_plan(self, cursor, query, params) -> Optional[str]:
+        """
+        EXPLAIN (ANALYZE, BUFFERS) на том же соединении
+        
+        Выполняется в отдельном курсоре внутри SAVEPOINT, чтобы ошибка плана
+        не прервала транзакцию вызывающего кода и не сбила его результаты.
+        Значения параметров в плане скрываются (redact_plan).
+        """
+        try:
+            conn = cursor.connection
+        except Exception:
+            return None
+        
+        use_savepoint = not getattr(conn, 'autocommit', False)
+        try:
+            with conn.cursor() as explain_cursor:
+                if use_savepoint:
+                    explain_cursor.execute("SAVEPOINT slow_query_explain")
+                try:
+                    explain_cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query}", params)
+                    plan = redact_plan('\n'.join(row[0] for row in explain_cursor.fetchall()))
+                except Exception:
+                    if use_savepoint:
+                        explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                    raise
+                if use_savepoint:
+                    explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+                return plan
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось получить план медленного запроса: {e}")
+            return None
+    
+    def top(self, limit: int = 20, sort: str = 'total') -> List[dict]:
+        """Топ отпечатков по суммарному (total), максимальному (max) времени или числу (count)"""
+        sort_keys = {
+            'total': lambda stats: stats.total_time,
+            'max': lambda stats: stats.max_time,
+            'count': lambda stats: stats.count,
+        }
+        key = sort_keys.get(sort, sort_keys['total'])
+        
+        with self._lock:
+            ranked = sorted(self.entries.values(), key=key, reverse=True)[:limit]
+            return [stats.to_dict() for stats in ranked]
+    
+    def report(self, limit: int = 20, sort: str = 'total') -> dict:
+        """Отчет для /api/debug/slow-queries"""
+        queries = self.top(limit, sort)
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'threshold_ms': self.threshold * 1000,
+                'explain_sample_rate': self.explain_sample_rate,
+                'since': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+                'fingerprints': len(self.entries),
+                'dropped': self.dropped,
+                'sort': sort,
+                'queries': queries,
+            }
+    
+    def reset(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self.dropped = 0
+            self.started_at = time.time()
+
+
+# Глобальный журнал медленных запросов
+slow_query_log = SlowQueryLog(
+    threshold_ms=config.SLOW_QUERY_THRESHOLD_MS,
+    explain_sample_rate=config.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    enabled=config.SLOW_QUERY_LOG_ENABLED
+)
@@ -0,0 +1,364 @@
+"""
+Статистика системы для /api/statistics
+
+По умолчанию читается сводка из statistics_counters и doctor_appointment_stats
+(миграция 04_statistics.sql), которую поддерживают триггеры. Точный подсчет
+по исходным таблицам доступен через fresh=True.
+
+Временные ряды приемов читаются из appointment_rollups
+(миграция 05_appointment_rollups.sql).
+"""
+import logging
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+import psycopg2
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.database.connection import db
+from src.database.prepared_statements import statements
+
+logger = logging.getLogger(__name__)
+
+GENERAL_COUNTERS = (
+    'total_patients',
+    'total_doctors',
+    'total_appointments',
+    'scheduled_appointments',
+    'total_records',
+)
+
+LIVE_GENERAL_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM patients) as total_patients,
+        (SELECT COUNT(*) FROM doctors) as total_doctors,
+        (SELECT COUNT(*) FROM appointments) as total_appointments,
+        (SELECT COUNT(*) FROM appointments WHERE status = 'scheduled') as scheduled_appointments,
+        (SELECT COUNT(*) FROM medical_records) as total_records
+"""
+
+LIVE_DOCTORS_QUERY = """
+    SELECT d.id, d.first_name, d.last_name, d.specialization,
+           COUNT(a.id) as appointment_count
+    FROM doctors d
+    LEFT JOIN appointments a ON d.id = a.doctor_id
+    GROUP BY d.id, d.first_name, d.last_name, d.specialization
+    ORDER BY appointment_count DESC
+"""
+
+SUMMARY_GENERAL_QUERY = """
+    SELECT name, value FROM statistics_counters
+"""
+
+SUMMARY_DOCTORS_QUERY = """
+    SELECT d.id, d.first_name, d.last_name, d.specialization,
+           COALESCE(s.appointment_count, 0) as appointment_count
+    FROM doctors d
+    LEFT JOIN doctor_appointment_stats s ON s.doctor_id = d.id
+    ORDER BY appointment_count DESC
+"""
+
+LIVE_GENERAL = statements.declare('stats_live_general', LIVE_GENERAL_QUERY)
+LIVE_DOCTORS = statements.declare('stats_live_doctors', LIVE_DOCTORS_QUERY)
+SUMMARY_GENERAL = statements.declare('stats_summary_general', SUMMARY_GENERAL_QUERY)
+SUMMARY_DOCTORS = statements.declare('stats_summary_doctors', SUMMARY_DOCTORS_QUERY)
+
+UNDEFINED_TABLE_SQLSTATE = '42P01'
+
+# Сбрасывается, если миграция 04_statistics.sql не применена
+_summary_available = True
+
+
+def _live_result(general_stats, doctors_stats) -> dict:
+    return {
+        'general': dict(general_stats),
+        'doctors': [dict(doc) for doc in doctors_stats],
+        'source': 'live'
+    }
+
+
+def _summary_result(counter_rows, doctors_stats) -> dict:
+    counters = {row['name']: row['value'] for row in counter_rows}
+    return {
+        'general': {name: counters.get(name, 0) for name in GENERAL_COUNTERS},
+        'doctors': [dict(doc) for doc in doctors_stats],
+        'source': 'summary'
+    }
+
+
+def _live_statistics() -> dict:
+    """Точный подсчет по исходным таблицам"""
+    with db.get_cursor() as cursor:
+        statements.execute(cursor, LIVE_GENERAL)
+        general_stats = cursor.fetchone()
+        
+        statements.execute(cursor, LIVE_DOCTORS)
+        doctors_stats = cursor.fetchall()
+    
+    return _live_result(general_stats, doctors_stats)
+
+
+def _summary_statistics() -> dict:
+    """Чтение материализованной сводки"""
+    with db.get_cursor() as cursor:
+        statements.execute(cursor, SUMMARY_GENERAL)
+        counter_rows = cursor.fetchall()
+        
+        statements.execute(cursor, SUMMARY_DOCTORS)
+        doctors_stats = cursor.fetchall()
+    
+    return _summary_result(counter_rows, doctors_stats)
+
+
+def get_statistics(fresh: bool = False) -> dict:
+    """
+    Статистика системы
+    
+    Args:
+        fresh: Точный подсчет по исходным таблицам вместо сводки
+    
+    Returns:
+        dict: {'general': {...}, 'doctors': [...], 'source': 'summary' | 'live'}
+    """
+    global _summary_available
+    
+    if fresh or not _summary_available:
+        return _live_statistics()
+    
+    try:
+        return _summary_statistics()
+    except psycopg2.errors.UndefinedTable:
+        _summary_available = False
+        logger.warning("⚠️ Сводка статистики не найдена, примените migrations/04_statistics.sql")
+        return _live_statistics()
+
+
+async def get_statistics_async(conn, fresh: bool = False) -> dict:
+    """
+    Статистика системы через асинхронное подключение psycopg 3
+    (src/api/async_app.py); результат тот же, что у get_statistics
+    
+    Args:
+        conn: psycopg.AsyncConnection со строками-словарями
+        fresh: Точный подсчет по исходным таблицам вместо сводки
+    """
+    global _summary_available
+    
+    if not fresh and _summary_available:
+        try:
+            counter_rows = await (await statements.execute_async(conn, SUMMARY_GENERAL)).fetchall()
+            doctors_stats = await (await statements.execute_async(conn, SUMMARY_DOCTORS)).fetchall()
+            return _summary_result(counter_rows, doctors_stats)
+        except Exception as e:
+            if getattr(e, 'sqlstate', None) != UNDEFINED_TABLE_SQLSTATE:
+                raise
+            _summary_available = False
+            logger.warning("⚠️ Сводка статистики не найдена, примените migrations/04_statistics.sql")
+    
+    general_stats = await (await statements.execute_async(conn, LIVE_GENERAL)).fetchone()
+    doctors_stats = await (await statements.execute_async(conn, LIVE_DOCTORS)).fetchall()
+    return _live_result(general_stats, doctors_stats)
+
+
+def refresh_statistics():
+    """Полный пересчет сводки (сверка со значениями в исходных таблицах)"""
+    global _summary_available
+    
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT refresh_statistics()")
+    
+    _summary_available = True
+    logger.info("✅ Сводка статистики пересчитана")
+
+
+# === ВРЕМЕННЫЕ РЯДЫ ПРИЕМОВ ===
+
+# Гранулярность -> период по умолчанию и максимальная длина запроса (дней)
+TIMESERIES_GRANULARITIES = {
+    'day': {'default_days': 90, 'max_days': 3 * 366},
+    'week': {'default_days': 366, 'max_days': 10 * 366},
+    'month': {'default_days': 3 * 366, 'max_days': 50 * 366},
+}
+
+# Группировка -> (столбцы SELECT, столбцы GROUP BY)
+TIMESERIES_GROUPS = {
+    None: ([], []),
+    'status': (['r.status'], ['r.status']),
+    'doctor': (
+        ['r.doctor_id', 'd.last_name', 'd.first_name', 'd.specialization'],
+        ['r.doctor_id', 'd.last_name', 'd.first_name', 'd.specialization'],
+    ),
+    'specialization': (['d.specialization'], ['d.specialization']),
+}
+
+BACKFILL_CHUNK_DAYS = 31
+
+
+def get_appointment_timeseries(granularity: str = 'day',
+                               date_from: Optional[date] = None,
+                               date_to: Optional[date] = None,
+                               group_by: Optional[str] = None,
+                               doctor_id: Optional[int] = None,
+                               specialization: Optional[str] = None,
+                               status: Optional[str] = None) -> dict:
+    """
+    Количество приемов по интервалам из appointment_rollups
+    
+    Args:
+        granularity: day, week или month
+        date_from: Начало периода (включительно), по умолчанию зависит от гранулярности
+        date_to: Конец периода (включительно), по умолчанию сегодня
+        group_by: None, status, doctor или specialization
+        doctor_id, specialization, status: Фильтры
+    
+    Returns:
+        dict: Параметры запроса и список точек {'bucket', ..., 'count'}
+    
+    Raises:
+        ValueError: Некорректные параметры
+    """
+    if granularity not in TIMESERIES_GRANULARITIES:
+        raise ValueError(f"granularity должен быть одним из: {', '.join(TIMESERIES_GRANULARITIES)}")
+    if group_by not in TIMESERIES_GROUPS:
+        raise ValueError(f"group_by должен быть одним из: {', '.join(g for g in TIMESERIES_GROUPS if g)}")
+    
+    limits = TIMESERIES_GRANULARITIES[granularity]
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=limits['default_days'])
+    
+    if date_from > date_to:
+        raise ValueError("Начало периода позже конца")
+    if (date_to - date_from).days > limits['max_days']:
+        raise ValueError(f"Период для granularity={granularity} не более {limits['max_days']} дней")
+    
+    select_columns, group_columns = TIMESERIES_GROUPS[group_by]
+    needs_doctors = group_by in ('doctor', 'specialization') or specialization is not None
+    
+    conditions = [
+        "r.granularity = %(granularity)s",
+        "r.bucket >= date_trunc(%(granularity)s, %(date_from)s::date)::date",
+        "r.bucket <= %(date_to)s",
+    ]
+    params = {'granularity': granularity, 'date_from': date_from, 'date_to': date_to}
+    
+    if doctor_id is not None:
+        conditions.append("r.doctor_id = %(doctor_id)s")
+        params['doctor_id'] = doctor_id
+    if status is not None:
+        conditions.append("r.status = %(status)s")
+        params['status'] = status
+    if specialization is not None:
+        conditions.append("d.specialization = %(specialization)s")
+        params['specialization'] = specialization
+    
+    query = f"""
+        SELECT {', '.join(['r.bucket'] + select_columns)},
+               SUM(r.appointment_count) as count
+        FROM appointment_rollups r
+        {'JOIN doctors d ON d.id = r.doctor_id' if needs_doctors else ''}
+        WHERE {' AND '.join(conditions)}
+        GROUP BY {', '.join(['r.bucket'] + group_columns)}
+        HAVING SUM(r.appointment_count) > 0
+        ORDER BY {', '.join(['r.bucket'] + group_columns)}
+    """
+    
+    with db.get_cursor() as cursor:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    
+    points = []
+    for row in rows:
+        point = dict(row)
+        point['bucket'] = point['bucket'].isoformat()
+        point['count'] = int(point['count'])
+        points.append(point)
+    
+    return {
+        'granularity': granularity,
+        'from': date_from.isoformat(),
+        'to': date_to.isoformat(),
+        'group_by': group_by,
+        'points': points,
+        'total': sum(point['count'] for point in points)
+    }
+
+
+def backfill_appointment_rollups(date_from: Optional[date] = None,
+                                 date_to: Optional[date] = None,
+                                 chunk_days: int = BACKFILL_CHUNK_DAYS) -> int:
+    """
+    Порционное заполнение appointment_rollups по историческим приемам
+    
+    Каждая порция - отдельная транзакция с короткой блокировкой appointments,
+    поэтому заполнение можно запускать на работающей системе и прерывать:
+    повторный запуск пересчитывает порции заново.
+    
+    Returns:
+        int: Количество записанных дневных строк агрегатов
+    """
+    if date_from is None or date_to is None:
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT MIN(appointment_date)::date as first_date,
+                       MAX(appointment_date)::date as last_date
+                FROM appointments
+            """)
+            bounds = cursor.fetchone()
+        
+        if not bounds or bounds['first_date'] is None:
+            logger.info("ℹ️ Приемов нет, заполнять нечего")
+            return 0
+        
+        date_from = date_from or bounds['first_date']
+        date_to = date_to or bounds['last_date']
+    
+    total_rows = 0
+    chunk_start = date_from
+    
+    logger.info(f"📈 Заполнение агрегатов приемов {date_from} - {date_to} порциями по {chunk_days} дн.")
+    
+    while chunk_start <= date_to:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days), date_to + timedelta(days=1))
+        
+        with db.get_cursor() as cursor:
+            cursor.execute(
+                "SELECT backfill_appointment_rollups(%s, %s) as day_rows",
+                (chunk_start, chunk_end)
+            )
+            day_rows = cursor.fetchone()['day_rows']
+        
+        total_rows += day_rows
+        logger.info(f"   ✅ {chunk_start} - {chunk_end - timedelta(days=1)}: {day_rows} строк")
+        chunk_start = chunk_end
+    
+    logger.info(f"✅ Агрегаты приемов заполнены: {total_rows} дневных строк")
+    return total_rows
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Материализованная статистика')
+    parser.add_argument('--refresh', action='store_true', help='Пересчитать сводку')
+    parser.add_argument('--backfill-rollups', action='store_true',
+                        help='Заполнить агрегаты приемов по историческим данным')
+    parser.add_argument('--chunk-days', type=int, default=BACKFILL_CHUNK_DAYS,
+                        help='Размер порции заполнения агрегатов (дней)')
+    args = parser.parse_args()
+    
+    if args.refresh:
+        refresh_statistics()
+    
+    if args.backfill_rollups:
+        backfill_appointment_rollups(chunk_days=args.chunk_days)
+    
+    summary = get_statistics()
+    live = get_statistics(fresh=True)
+    
+    print("📊 Общая статистика (сводка / точно):")
+    for name in GENERAL_COUNTERS:
+        mark = '✅' if summary['general'][name] == live['general'][name] else '❌'
+        print(f"   {mark} {name}: {summary['general'][name]} / {live['general'][name]}")
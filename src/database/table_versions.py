@@ -0,0 +1,79 @@
+"""
+Версии таблиц (миграция 08_table_versions.sql) для ETag ответов API
+
+Версии читаются одним запросом по первичному ключу и кэшируются в процессе
+на ETAG_WATERMARK_TTL секунд: повторные условные GET в пределах TTL не
+обращаются к БД. Изменения через этот же процесс сбрасывают кэш сразу.
+"""
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from psycopg2 import errors as pg_errors
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.database.connection import db
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+TABLE_VERSIONS_QUERY = """
+    SELECT table_name, version
+    FROM table_versions
+    WHERE table_name = ANY(%s)
+"""
+
+
+class TableVersions:
+    """Кэш версий таблиц с ограниченным временем жизни"""
+    
+    def __init__(self, ttl: float = 1.0):
+        self.ttl = ttl
+        self._cache = {}  # table_name -> (время чтения monotonic, версия)
+        self._lock = threading.Lock()
+        self.available = True
+    
+    def get(self, tables) -> Optional[Dict[str, int]]:
+        """
+        Текущие версии таблиц
+        
+        Returns:
+            Optional[Dict[str, int]]: Версии или None, если миграция не применена
+        """
+        if not self.available:
+            return None
+        
+        now = time.monotonic()
+        with self._lock:
+            cached = {table: self._cache.get(table) for table in tables}
+        if all(entry and now - entry[0] < self.ttl for entry in cached.values()):
+            return {table: entry[1] for table, entry in cached.items()}
+        
+        try:
+            with db.get_cursor() as cursor:
+                cursor.execute(TABLE_VERSIONS_QUERY, (list(tables),))
+                versions = {row['table_name']: row['version'] for row in cursor.fetchall()}
+        except pg_errors.UndefinedTable:
+            logger.warning("⚠️ Таблица table_versions не найдена, ETag отключены "
+                           "(примените migrations/08_table_versions.sql)")
+            self.available = False
+            return None
+        
+        versions = {table: versions.get(table, 0) for table in tables}
+        with self._lock:
+            for table, version in versions.items():
+                self._cache[table] = (now, version)
+        return versions
+    
+    def invalidate(self) -> None:
+        """Сброс кэша после изменения данных"""
+        with self._lock:
+            self._cache.clear()
+
+
+# Глобальный кэш версий
+table_versions = TableVersions(ttl=config.ETAG_WATERMARK_TTL)
@@ -0,0 +1,185 @@
+"""
+Лента пациента: приемы, медкарты и назначения одним запросом
+
+Страница ленты - один SQL: приемы пациента (новые сверху) с врачом,
+медкартой приема и ее назначениями, собранными в JSON на сервере
+(json_build_object / json_agg). Страницы листаются по ключу
+(appointment_date, id) - без OFFSET, по индексу
+idx_appointments_patient_timeline (10_patient_timeline.sql).
+
+Шифротекст попадает в JSON в hex (encode(..., 'hex')) и расшифровывается
+пакетом по полю на всю страницу (TDEManager.decrypt_batch).
+"""
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.database.connection import db
+from src.database.prepared_statements import statements
+from src.database.row_mapping import TUPLE_CURSOR, column_names
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+TIMELINE_QUERY = """
+    SELECT a.id,
+           a.appointment_date,
+           a.status,
+           a.duration_minutes,
+           a.doctor_id,
+           d.first_name || ' ' || d.last_name as doctor_name,
+           d.specialization,
+           CASE WHEN mr.id IS NULL THEN NULL ELSE json_build_object(
+               'id', mr.id,
+               'created_at', mr.created_at,
+               'complaints', mr.complaints,
+               'examination_results', mr.examination_results,
+               'diagnosis_encrypted', encode(mr.diagnosis_encrypted, 'hex'),
+               'diagnosis_iv', encode(mr.diagnosis_iv, 'hex'),{record_tde_fields}
+               'prescriptions', COALESCE(pr.items, '[]'::json)
+           ) END as record
+    FROM appointments a
+    JOIN doctors d ON d.id = a.doctor_id
+    LEFT JOIN medical_records mr ON mr.appointment_id = a.id
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+                   'id', p.id,
+                   'medical_record_id', p.medical_record_id,
+                   'medication_name', p.medication_name,
+                   'dosage', p.dosage,
+                   'frequency', p.frequency,
+                   'duration', p.duration,
+                   'notes', p.notes{prescription_tde_fields}
+               ) ORDER BY p.id) as items
+        FROM prescriptions p
+        WHERE p.medical_record_id = mr.id
+    ) pr ON true
+    WHERE a.patient_id = %s{keyset}
+    ORDER BY a.appointment_date DESC, a.id DESC
+    LIMIT %s
+"""
+
+# Условие на appointment_date отдельно от сравнения кортежей - для отсечения
+# секций appointments (09_partitioning.sql)
+KEYSET_CLAUSE = "\n      AND a.appointment_date <= %s AND (a.appointment_date, a.id) < (%s, %s)"
+
+PATIENT_EXISTS_QUERY = "SELECT 1 FROM patients WHERE id = %s"
+
+# Поля, зашифрованные при TDE (кроме диагноза, который хранится только зашифрованным)
+RECORD_TDE_FIELDS = ('complaints', 'examination_results')
+PRESCRIPTION_TDE_FIELDS = ('notes',)
+
+
+def _tde_json_fields(alias: str, fields: Tuple[str, ...], indent: str) -> str:
+    return ''.join(
+        f"\n{indent}'{field}{suffix}', encode({alias}.{field}{suffix}, 'hex'),"
+        for field in fields for suffix in ('_encrypted', '_iv'))
+
+
+def _declare(name: str, tde: bool, keyset: bool):
+    record_fields = _tde_json_fields('mr', RECORD_TDE_FIELDS, ' ' * 15) if tde else ''
+    prescription_fields = _tde_json_fields('p', PRESCRIPTION_TDE_FIELDS, ' ' * 19).rstrip(',') if tde else ''
+    sql = TIMELINE_QUERY.format(
+        record_tde_fields=record_fields,
+        prescription_tde_fields=',' + prescription_fields if prescription_fields else '',
+        keyset=KEYSET_CLAUSE if keyset else '')
+    return statements.declare(name, sql)
+
+
+# (TDE, есть ключ предыдущей страницы) -> запрос
+TIMELINE = {
+    (False, False): _declare('api_patient_timeline', tde=False, keyset=False),
+    (False, True): _declare('api_patient_timeline_before', tde=False, keyset=True),
+    (True, False): _declare('api_patient_timeline_tde', tde=True, keyset=False),
+    (True, True): _declare('api_patient_timeline_tde_before', tde=True, keyset=True),
+}
+PATIENT_EXISTS = statements.declare('api_patient_exists', PATIENT_EXISTS_QUERY)
+
+
+def _unhex(value: Optional[str]) -> Optional[bytes]:
+    return bytes.fromhex(value) if value else None
+
+
+def _decrypt_column(items: List[dict], table: str, field: str, tde_manager) -> List[Optional[str]]:
+    """Расшифровка поля во всех элементах страницы одним пакетом"""
+    pairs = [(_unhex(item.pop(f'{field}_encrypted', None)), _unhex(item.pop(f'{field}_iv', None)))
+             for item in items]
+    if tde_manager is None:
+        return [None] * len(items)
+    return tde_manager.decrypt_batch(table, field, pairs)
+
+
+def _decrypt_page(appointments: List[dict], tde_manager, tde: bool) -> None:
+    """
+    Расшифровка медкарт и назначений страницы на месте
+    
+    Диагноз - как в format_medical_record; остальные поля при TDE - из
+    шифротекста, без него - открытое значение (как TDECursor).
+    """
+    records = [appointment['record'] for appointment in appointments if appointment['record']]
+    prescriptions = [item for record in records for item in record['prescriptions']]
+    
+    has_diagnosis = [bool(record.get('diagnosis_encrypted') and record.get('diagnosis_iv')) for record in records]
+    diagnoses = _decrypt_column(records, 'medical_records', 'diagnosis', tde_manager)
+    for record, encrypted, diagnosis in zip(records, has_diagnosis, diagnoses):
+        record['diagnosis'] = (diagnosis or "Ошибка расшифровки") if encrypted else "Диагноз не зашифрован"
+    
+    if not tde:
+        return
+    for table, items, fields in (('medical_records', records, RECORD_TDE_FIELDS),
+                                 ('prescriptions', prescriptions, PRESCRIPTION_TDE_FIELDS)):
+        for field in fields:
+            for item, value in zip(items, _decrypt_column(items, table, field, tde_manager)):
+                if value is not None:
+                    item[field] = value
+
+
+def get_patient_timeline(patient_id: int, limit: int = DEFAULT_LIMIT,
+                         before: Optional[Tuple[datetime, int]] = None,
+                         tde_manager=None) -> Optional[Dict]:
+    """
+    Страница ленты пациента
+    
+    Args:
+        patient_id: ID пациента
+        limit: Число приемов на странице (не больше MAX_LIMIT)
+        before: Ключ (appointment_date, id) последнего приема предыдущей страницы
+        tde_manager: Менеджер TDE (None - без расшифровки полей TDE)
+    
+    Returns:
+        Optional[Dict]: приемы страницы (даты - datetime, медкарта
+        расшифрована) и ключ следующей страницы; None - пациента нет
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    tde = tde_manager is not None
+    
+    params = [patient_id]
+    if before is not None:
+        params += [before[0], *before]
+    params.append(limit + 1)
+    
+    with db.get_cursor(cursor_factory=TUPLE_CURSOR) as cursor:
+        statements.execute(cursor, TIMELINE[(tde, before is not None)], params)
+        columns = column_names(cursor)
+        appointments = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        
+        if not appointments and before is None:
+            statements.execute(cursor, PATIENT_EXISTS, (patient_id,))
+            if cursor.fetchone() is None:
+                return None
+    
+    has_more = len(appointments) > limit
+    appointments = appointments[:limit]
+    _decrypt_page(appointments, tde_manager, tde)
+    
+    last = appointments[-1] if has_more else None
+    return {
+        'appointments': appointments,
+        'next': (last['appointment_date'], last['id']) if last else None,
+    }
@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, List
 
-@dataclass
+@dataclass(slots=True)
 class MedicalRecord:
     id: Optional[int] = None
     appointment_id: Optional[int] = None
@@ -13,7 +13,7 @@ class MedicalRecord:
     created_at: Optional[datetime] = None
     prescriptions: Optional[List['Prescription']] = None
 
-@dataclass
+@dataclass(slots=True)
 class Prescription:
     id: Optional[int] = None
     medical_record_id: Optional[int] = None
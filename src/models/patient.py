@@ -2,7 +2,7 @@ from dataclasses import dataclass  # Для создания класса-кар
 from datetime import date, datetime  # Для работы с датами
 from typing import Optional  # Для необязательных полей
 
-@dataclass
+@dataclass(slots=True)
 class Patient:  # Название нашей "карточки"
     # Поля карточки (как строки в бумажной карточке)
     id: Optional[int] = None  # Номер карточки (может не быть сначала)
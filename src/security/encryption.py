@@ -1,20 +1,127 @@
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.backends import default_backend
+from functools import lru_cache
 import os
 import logging
+import threading
 from typing import Tuple
 
+BLOCK_SIZE = 16  # Размер блока AES в байтах
+
+# До какого размера выгоднее собирать CBC вручную поверх одного ECB-контекста
+ECB_ENCRYPT_MAX_BLOCKS = 2
+ECB_DECRYPT_MAX_BYTES = 1024
+
+
+def pkcs7_pad(data: bytes) -> bytes:
+    """Быстрое PKCS7 дополнение без создания padder-объекта"""
+    pad_len = BLOCK_SIZE - len(data) % BLOCK_SIZE
+    return data + bytes((pad_len,)) * pad_len
+
+
+def pkcs7_unpad(data: bytes) -> bytes:
+    """Быстрое снятие PKCS7 дополнения с проверкой корректности"""
+    if not data or len(data) % BLOCK_SIZE:
+        raise ValueError("Invalid padding bytes.")
+
+    pad_len = data[-1]
+    if pad_len < 1 or pad_len > BLOCK_SIZE or data[-pad_len:] != bytes((pad_len,)) * pad_len:
+        raise ValueError("Invalid padding bytes.")
+
+    return data[:-pad_len]
+
+
+class AESCipher:
+    """
+    Фабрика AES-256-CBC операций для одного ключа
+    Хранит развернутый ключ и переиспользует ECB-контексты (по одному на поток),
+    чтобы не создавать Cipher и padder на каждое значение
+    """
+
+    def __init__(self, key: bytes):
+        self.algorithm = algorithms.AES(key)
+        self.backend = default_backend()
+        self._local = threading.local()
+
+    def _ecb_encryptor(self):
+        encryptor = getattr(self._local, 'encryptor', None)
+        if encryptor is None:
+            encryptor = Cipher(self.algorithm, modes.ECB(), backend=self.backend).encryptor()
+            self._local.encryptor = encryptor
+        return encryptor
+
+    def _ecb_decryptor(self):
+        decryptor = getattr(self._local, 'decryptor', None)
+        if decryptor is None:
+            decryptor = Cipher(self.algorithm, modes.ECB(), backend=self.backend).decryptor()
+            self._local.decryptor = decryptor
+        return decryptor
+
+    def encrypt(self, data: bytes, iv: bytes = None) -> Tuple[bytes, bytes]:
+        """Шифрование байтов, возвращает (ciphertext, iv)"""
+        if iv is None:
+            iv = os.urandom(BLOCK_SIZE)
+        padded = pkcs7_pad(data)
+
+        if len(padded) <= ECB_ENCRYPT_MAX_BLOCKS * BLOCK_SIZE:
+            # Короткие значения (телефоны, email): цепочка CBC на общем ECB-контексте
+            encryptor = self._ecb_encryptor()
+            previous = int.from_bytes(iv, 'big')
+            blocks = []
+            for offset in range(0, len(padded), BLOCK_SIZE):
+                block = int.from_bytes(padded[offset:offset + BLOCK_SIZE], 'big') ^ previous
+                encrypted_block = encryptor.update(block.to_bytes(BLOCK_SIZE, 'big'))
+                blocks.append(encrypted_block)
+                previous = int.from_bytes(encrypted_block, 'big')
+            return b''.join(blocks), iv
+
+        encryptor = Cipher(self.algorithm, modes.CBC(iv), backend=self.backend).encryptor()
+        return encryptor.update(padded) + encryptor.finalize(), iv
+
+    def decrypt(self, ciphertext: bytes, iv: bytes) -> bytes:
+        """Расшифровка байтов с проверкой PKCS7 дополнения"""
+        ciphertext = bytes(ciphertext)
+        iv = bytes(iv)
+        if not ciphertext or len(ciphertext) % BLOCK_SIZE or len(iv) != BLOCK_SIZE:
+            raise ValueError("Invalid ciphertext or IV length.")
+
+        if len(ciphertext) <= ECB_DECRYPT_MAX_BYTES:
+            # CBC: P_i = D(C_i) XOR C_{i-1}, все блоки расшифровываются одним вызовом
+            raw = self._ecb_decryptor().update(ciphertext)
+            chain = iv + ciphertext[:-BLOCK_SIZE]
+            padded = (int.from_bytes(raw, 'big') ^ int.from_bytes(chain, 'big')).to_bytes(len(raw), 'big')
+        else:
+            decryptor = Cipher(self.algorithm, modes.CBC(iv), backend=self.backend).decryptor()
+            padded = decryptor.update(ciphertext) + decryptor.finalize()
+
+        return pkcs7_unpad(padded)
+
+    def encrypt_text(self, plaintext: str) -> Tuple[bytes, bytes]:
+        """Шифрование строки в UTF-8"""
+        return self.encrypt(plaintext.encode('utf-8'))
+
+    def decrypt_text(self, ciphertext: bytes, iv: bytes) -> str:
+        """Расшифровка в строку UTF-8"""
+        return self.decrypt(ciphertext, iv).decode('utf-8')
+
+
+@lru_cache(maxsize=32)
+def get_cipher(key: bytes) -> AESCipher:
+    """Получить (закэшированную) фабрику шифрования для ключа"""
+    return AESCipher(key)
+
+
 class AESEncryption:
     def __init__(self, key: bytes = None):
         self.key = key or self._load_or_generate_key()
         self.backend = default_backend()
         self.logger = logging.getLogger(__name__)
-    
+        self.cipher = get_cipher(self.key)
+
     def _load_or_generate_key(self) -> bytes:
         """Загрузка или генерация ключа шифрования"""
         key_file = os.getenv('ENCRYPTION_KEY_FILE', '.encryption_key')
-        
+
         if os.path.exists(key_file):
             # Загружаем существующий ключ
             with open(key_file, 'rb') as f:
@@ -27,29 +134,11 @@ class AESEncryption:
                 f.write(key)
             os.chmod(key_file, 0o600)  # Права доступа только для владельца
             return key
-    
+
     def encrypt(self, plaintext: str) -> Tuple[bytes, bytes]:
         """Шифрование AES-256-CBC"""
-        iv = os.urandom(16)  # 128 bits
-        
-        cipher = Cipher(algorithms.AES(self.key), modes.CBC(iv), backend=self.backend)
-        encryptor = cipher.encryptor()
-        
-        padder = padding.PKCS7(128).padder()
-        padded_data = padder.update(plaintext.encode('utf-8')) + padder.finalize()
-        
-        ciphertext = encryptor.update(padded_data) + encryptor.finalize()
-        
-        return ciphertext, iv
-    
+        return self.cipher.encrypt_text(plaintext)
+
     def decrypt(self, ciphertext: bytes, iv: bytes) -> str:
         """Расшифровка"""
-        cipher = Cipher(algorithms.AES(self.key), modes.CBC(iv), backend=self.backend)
-        decryptor = cipher.decryptor()
-        
-        padded_plaintext = decryptor.update(ciphertext) + decryptor.finalize()
-        
-        unpadder = padding.PKCS7(128).unpadder()
-        plaintext = unpadder.update(padded_plaintext) + unpadder.finalize()
-        
-        return plaintext.decode('utf-8')
\ No newline at end of file
+        return self.cipher.decrypt_text(ciphertext, iv)
@@ -9,6 +9,7 @@ import base64
 import logging
 import hashlib
 import secrets
+import time
 from typing import Optional, Dict, Any, List, Tuple, Union
 from datetime import datetime, timedelta
 from contextlib import contextmanager
@@ -30,6 +31,10 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
 sys.path.insert(0, project_root)
 
+from src.config import load_env
+from src.security.encryption import get_cipher
+from src.utils.metrics import record_decrypt
+
 class TDEKeyManager:
     """
     Менеджер ключей для TDE
@@ -40,7 +45,8 @@ class TDEKeyManager:
         self.backend = default_backend()
         self.logger = logging.getLogger(__name__)
         
-        # Настройки ключей
+        # Настройки ключей (с учетом .env)
+        load_env()
         self.master_key_file = os.getenv('TDE_MASTER_KEY_FILE', '.tde_master_key')
         self.key_rotation_days = int(os.getenv('TDE_KEY_ROTATION_DAYS', 90))
         self.backup_keys = os.getenv('TDE_BACKUP_KEYS', 'True').lower() == 'true'
@@ -311,28 +317,11 @@ class TDEKeyManager:
     def _encrypt_with_key(self, plaintext: str, key: bytes) -> Tuple[bytes, bytes]:
         """Шифрование данных указанным ключом"""
         iv = secrets.token_bytes(self.iv_length)
-        
-        cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=self.backend)
-        encryptor = cipher.encryptor()
-        
-        padder = padding.PKCS7(128).padder()
-        padded_data = padder.update(plaintext.encode('utf-8')) + padder.finalize()
-        
-        ciphertext = encryptor.update(padded_data) + encryptor.finalize()
-        
-        return ciphertext, iv
+        return get_cipher(key).encrypt(plaintext.encode('utf-8'), iv)
     
     def _decrypt_with_key(self, ciphertext: bytes, iv: bytes, key: bytes) -> str:
         """Расшифровка данных указанным ключом"""
-        cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=self.backend)
-        decryptor = cipher.decryptor()
-        
-        padded_plaintext = decryptor.update(ciphertext) + decryptor.finalize()
-        
-        unpadder = padding.PKCS7(128).unpadder()
-        plaintext = unpadder.update(padded_plaintext) + unpadder.finalize()
-        
-        return plaintext.decode('utf-8')
+        return get_cipher(key).decrypt_text(ciphertext, iv)
 
 
 class TDEManager:
@@ -429,7 +418,9 @@ class TDEManager:
                 raise ValueError(f"Нет ключа для таблицы {table_name}")
             
             # Расшифровываем
+            start_time = time.perf_counter()
             plaintext = self.key_manager._decrypt_with_key(ciphertext, iv, table_key)
+            record_decrypt(time.perf_counter() - start_time)
             
             self.logger.debug(f"🔓 Расшифровано поле {table_name}.{field_name}")
             return plaintext
@@ -438,6 +429,88 @@ class TDEManager:
             self.logger.error(f"❌ Ошибка расшифровки {table_name}.{field_name}: {e}")
             return f"[ОШИБКА РАСШИФРОВКИ: {str(e)[:50]}]"
     
+    def encrypt_batch(self, table_name: str, field_name: str,
+                      values: List[Optional[str]]) -> List[Tuple[Optional[bytes], Optional[bytes]]]:
+        """
+        Пакетное шифрование значений одного поля
+        
+        Ключ таблицы и фабрика шифра получаются один раз на весь пакет.
+        
+        Args:
+            table_name: Название таблицы
+            field_name: Название поля
+            values: Значения для шифрования (None/пустые пропускаются)
+        
+        Returns:
+            List[Tuple[bytes, bytes]]: (зашифрованные_данные, iv) для каждого значения
+        """
+        config = self.encryption_config.get(table_name, {})
+        if field_name not in config.get('fields', []):
+            return [self.encrypt_field(table_name, field_name, value) if value else (None, None)
+                    for value in values]
+        
+        table_key = self.table_keys.get(table_name)
+        if not table_key:
+            raise ValueError(f"Нет ключа для таблицы {table_name}")
+        
+        cipher = get_cipher(table_key)
+        iv_length = self.key_manager.iv_length
+        results = []
+        
+        for value in values:
+            if not value or not str(value).strip():
+                results.append((None, None))
+                continue
+            results.append(cipher.encrypt(str(value).encode('utf-8'), secrets.token_bytes(iv_length)))
+        
+        self.logger.debug(f"🔒 Зашифровано пакетом {len(values)} значений {table_name}.{field_name}")
+        return results
+    
+    def decrypt_batch(self, table_name: str, field_name: str,
+                      pairs: List[Tuple[Optional[bytes], Optional[bytes]]]) -> List[Optional[str]]:
+        """
+        Пакетная расшифровка значений одного поля
+        
+        Ключ таблицы и фабрика шифра получаются один раз на весь пакет.
+        Ошибка одного значения не прерывает пакет (как в decrypt_field).
+        
+        Args:
+            table_name: Название таблицы
+            field_name: Название поля
+            pairs: (зашифрованные_данные, iv) для каждого значения
+        
+        Returns:
+            List[Optional[str]]: Расшифрованные значения (None, если значения нет)
+        """
+        config = self.encryption_config.get(table_name, {})
+        if field_name not in config.get('fields', []):
+            return [self.decrypt_field(table_name, field_name, ciphertext, iv) if ciphertext and iv else None
+                    for ciphertext, iv in pairs]
+        
+        table_key = self.table_keys.get(table_name)
+        if not table_key:
+            raise ValueError(f"Нет ключа для таблицы {table_name}")
+        
+        cipher = get_cipher(table_key)
+        results = []
+        decrypted = 0
+        start_time = time.perf_counter()
+        
+        for ciphertext, iv in pairs:
+            if not ciphertext or not iv:
+                results.append(None)
+                continue
+            try:
+                results.append(cipher.decrypt_text(ciphertext, iv))
+                decrypted += 1
+            except Exception as e:
+                self.logger.error(f"❌ Ошибка расшифровки {table_name}.{field_name}: {e}")
+                results.append(f"[ОШИБКА РАСШИФРОВКИ: {str(e)[:50]}]")
+        
+        record_decrypt(time.perf_counter() - start_time, decrypted)
+        self.logger.debug(f"🔓 Расшифровано пакетом {decrypted} значений {table_name}.{field_name}")
+        return results
+    
     def encrypt_record(self, table_name: str, record_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Автоматическое шифрование всех чувствительных полей в записи
@@ -558,6 +631,41 @@ class TDEDatabaseConnection:
                 cursor.close()
 
 
+# Характерные столбцы каждой таблицы для определения таблицы по строке результата
+TABLE_SIGNATURES = {
+    'patients': {'first_name', 'last_name', 'birth_date', 'gender'},
+    'doctors': {'specialization', 'license_number'},
+    'appointments': {'appointment_date', 'status', 'patient_id', 'doctor_id'},
+    'medical_records': {'appointment_id', 'complaints'},
+    'prescriptions': {'medication_name', 'dosage', 'frequency'}
+}
+
+
+def guess_table_from_row(result_row) -> Optional[str]:
+    """Определение таблицы по структуре строки результата"""
+    if not result_row:
+        return None
+    
+    columns = set(result_row.keys()) if hasattr(result_row, 'keys') else set()
+    
+    for table_name, signature in TABLE_SIGNATURES.items():
+        if signature.issubset(columns):
+            return table_name
+    
+    return None
+
+
+def decrypt_rows(tde_manager: 'TDEManager', rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Расшифровка строк результата так же, как это делает TDECursor.fetchall"""
+    if not rows:
+        return rows
+    
+    table_name = guess_table_from_row(rows[0])
+    if not table_name:
+        return rows
+    return [tde_manager.decrypt_record(table_name, dict(row)) for row in rows]
+
+
 class TDECursor:
     """
     Курсор БД с автоматическим шифрованием/расшифровкой
@@ -593,21 +701,11 @@ class TDECursor:
     
     def fetchall(self):
         """Получение всех записей с автоматической расшифровкой"""
-        results = self.cursor.fetchall()
-        if results:
-            table_name = self._guess_table_from_result(results[0])
-            if table_name:
-                return [self.tde.decrypt_record(table_name, dict(row)) for row in results]
-        return results
+        return decrypt_rows(self.tde, self.cursor.fetchall())
     
     def fetchmany(self, size=None):
         """Получение нескольких записей с автоматической расшифровкой"""
-        results = self.cursor.fetchmany(size)
-        if results:
-            table_name = self._guess_table_from_result(results[0])
-            if table_name:
-                return [self.tde.decrypt_record(table_name, dict(row)) for row in results]
-        return results
+        return decrypt_rows(self.tde, self.cursor.fetchmany(size))
     
     def _parse_query(self, query: str) -> Dict[str, str]:
         """Парсинг запроса для определения операции и таблицы"""
@@ -640,25 +738,7 @@ class TDECursor:
     
     def _guess_table_from_result(self, result_row) -> Optional[str]:
         """Определение таблицы по структуре результата"""
-        if not result_row:
-            return None
-        
-        columns = set(result_row.keys()) if hasattr(result_row, 'keys') else set()
-        
-        # Проверяем характерные столбцы для каждой таблицы
-        table_signatures = {
-            'patients': {'first_name', 'last_name', 'birth_date', 'gender'},
-            'doctors': {'specialization', 'license_number'},
-            'appointments': {'appointment_date', 'status', 'patient_id', 'doctor_id'},
-            'medical_records': {'appointment_id', 'complaints'},
-            'prescriptions': {'medication_name', 'dosage', 'frequency'}
-        }
-        
-        for table_name, signature in table_signatures.items():
-            if signature.issubset(columns):
-                return table_name
-        
-        return None
+        return guess_table_from_row(result_row)
     
     def __getattr__(self, name):
         """Проксирование всех остальных методов к оригинальному курсору"""
@@ -743,6 +823,67 @@ def upgrade_database_for_tde():
         raise
 
 
+def _legacy_encrypt(plaintext: str, key: bytes) -> Tuple[bytes, bytes]:
+    """Прежняя реализация: новый Cipher и padder на каждое значение (для сравнения)"""
+    iv = secrets.token_bytes(16)
+    cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
+    encryptor = cipher.encryptor()
+    padder = padding.PKCS7(128).padder()
+    padded_data = padder.update(plaintext.encode('utf-8')) + padder.finalize()
+    return encryptor.update(padded_data) + encryptor.finalize(), iv
+
+
+def _legacy_decrypt(ciphertext: bytes, iv: bytes, key: bytes) -> str:
+    """Прежняя реализация расшифровки (для сравнения)"""
+    cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
+    decryptor = cipher.decryptor()
+    padded_plaintext = decryptor.update(ciphertext) + decryptor.finalize()
+    unpadder = padding.PKCS7(128).unpadder()
+    return (unpadder.update(padded_plaintext) + unpadder.finalize()).decode('utf-8')
+
+
+def benchmark_tde_crypto(tde: 'TDEManager' = None, iterations: int = 1000,
+                         sizes: Tuple[int, ...] = (12, 32, 64, 256, 1024)) -> Dict[int, Dict[str, float]]:
+    """
+    Бенчмарк шифрования/расшифровки полей: прежняя реализация против общей фабрики
+    
+    Args:
+        tde: Менеджер TDE (создается, если не передан)
+        iterations: Количество циклов шифрование+расшифровка на каждый размер
+        sizes: Размеры значений в символах
+        
+    Returns:
+        Dict: {размер: {'before': ops/sec, 'after': ops/sec, 'speedup': x}}
+    """
+    tde = tde or TDEManager()
+    key = tde.table_keys['patients']
+    results = {}
+    
+    print(f"  {'Размер':>8} | {'До, оп/с':>12} | {'После, оп/с':>12} | {'Ускорение':>9}")
+    
+    for size in sizes:
+        test_text = ('Тестовые данные для проверки производительности ' * (size // 20 + 1))[:size]
+        
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            ciphertext, iv = _legacy_encrypt(test_text, key)
+            _legacy_decrypt(ciphertext, iv, key)
+        before = 2 * iterations / (time.perf_counter() - start_time)
+        
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            ciphertext, iv = tde.key_manager._encrypt_with_key(test_text, key)
+            decrypted = tde.key_manager._decrypt_with_key(ciphertext, iv, key)
+        after = 2 * iterations / (time.perf_counter() - start_time)
+        
+        assert decrypted == test_text
+        
+        results[size] = {'before': before, 'after': after, 'speedup': after / before}
+        print(f"  {size:>8} | {before:>12.0f} | {after:>12.0f} | {after / before:>8.2f}x")
+    
+    return results
+
+
 def test_tde():
     """Комплексное тестирование TDE"""
     print("🧪 КОМПЛЕКСНОЕ ТЕСТИРОВАНИЕ TDE")
@@ -804,20 +945,7 @@ def test_tde():
     # Тест 3: Производительность
     print(f"\n3️⃣ Тест производительности:")
     
-    import time
-    
-    # Тестируем скорость шифрования
-    start_time = time.time()
-    for i in range(1000):
-        test_text = f"Тестовые данные номер {i} для проверки производительности"
-        ciphertext, iv = tde.encrypt_field('patients', 'address', test_text)
-        decrypted = tde.decrypt_field('patients', 'address', ciphertext, iv)
-    
-    end_time = time.time()
-    operations_per_second = 2000 / (end_time - start_time)  # 2000 операций (1000 шифр + 1000 расшифр)
-    
-    print(f"  ⚡ Производительность: {operations_per_second:.0f} операций/сек")
-    print(f"  ⏱️ Время выполнения 1000 циклов: {(end_time - start_time):.2f}с")
+    benchmark_tde_crypto(tde, iterations=1000)
     
     # Тест 4: Информация о шифровании
     print(f"\n4️⃣ Информация о TDE:")
@@ -0,0 +1,181 @@
+"""
+Промышленный запуск API: gunicorn с несколькими процессами-воркерами
+
+Приложение загружается в мастер-процессе до fork (preload): ключи TDE
+выводятся один раз и наследуются воркерами. После fork каждый воркер
+сбрасывает состояние, которое не должно делиться между процессами:
+контексты AES, метрики, журнал медленных запросов и кэш версий таблиц.
+Подключения к БД (на каждый запрос или из пула DB_POOL_SIZE) воркер
+открывает сам: пул мастер-процесса закрывается до fork. Планировщик backup запускается отдельным процессом в одном
+экземпляре, а не в каждом воркере.
+
+Управление мастер-процессом:
+    kill -HUP <pid>    плавный перезапуск воркеров (новые принимают запросы,
+                       старые дообслуживают текущие)
+    kill -TERM <pid>   плавная остановка
+
+Пример:
+    python src/server.py --workers 4 --threads 8 --bind 0.0.0.0:8000
+    python run.py --production --workers 4
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Добавляем корневую папку в path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.config import config, load_env
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = min(multiprocessing.cpu_count() * 2 + 1, 9)
+DEFAULT_THREADS = 4
+GRACEFUL_TIMEOUT = 30
+
+
+def reset_process_state() -> None:
+    """Сброс состояния, унаследованного от мастер-процесса"""
+    from src.security.encryption import get_cipher
+    from src.utils.metrics import metrics_registry
+    from src.database.slow_query_log import slow_query_log
+    from src.database.table_versions import table_versions
+    
+    # Новые AESCipher создадут свои контексты OpenSSL в процессе воркера
+    get_cipher.cache_clear()
+    metrics_registry.reset()
+    slow_query_log.reset()
+    table_versions.invalidate()
+
+
+def start_backup_process() -> subprocess.Popen:
+    """Планировщик backup отдельным процессом (один на сервер)"""
+    return subprocess.Popen([sys.executable, str(PROJECT_ROOT / 'run.py'), '--backup-only'],
+                            cwd=str(PROJECT_ROOT))
+
+
+def run_gunicorn(bind: str, workers: int, threads: int, timeout: int,
+                 max_requests: int, preload: bool) -> None:
+    """Запуск приложения под gunicorn"""
+    from gunicorn.app.base import BaseApplication
+    
+    class MedicalRecordsApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+        
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            from src.database.connection import db
+            from src.main import app
+            
+            # Ключи TDE выводятся здесь (в мастере при preload) и наследуются воркерами
+            db.initialize()
+            # Подключения пула после проверки системы не должны переходить в воркеры
+            db.close_pool()
+            return app
+    
+    def post_fork(server, worker):
+        reset_process_state()
+        server.log.info(f"🔁 Воркер {worker.pid} инициализирован")
+    
+    options = {
+        'bind': bind,
+        'workers': workers,
+        'threads': threads,
+        # gthread: потоки внутри воркера для ожидания БД без блокировки процесса
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'timeout': timeout,
+        'graceful_timeout': GRACEFUL_TIMEOUT,
+        'max_requests': max_requests,
+        'max_requests_jitter': max_requests // 10 if max_requests else 0,
+        'preload_app': preload,
+        'post_fork': post_fork,
+        'proc_name': 'medical-records',
+        'accesslog': None,
+    }
+    MedicalRecordsApplication(options).run()
+
+
+def run_waitress(bind: str, threads: int) -> None:
+    """Многопоточный сервер без fork (Windows, где gunicorn недоступен)"""
+    from waitress import serve
+    from src.main import app
+    
+    host, _, port = bind.rpartition(':')
+    serve(app, host=host or '0.0.0.0', port=int(port), threads=threads)
+
+
+def serve(bind: str, workers: int = DEFAULT_WORKERS, threads: int = DEFAULT_THREADS,
+          timeout: int = 60, max_requests: int = 0, preload: bool = True,
+          backup: bool = True) -> int:
+    """
+    Запуск промышленного сервера
+    
+    Returns:
+        int: Код завершения
+    """
+    backup_process = start_backup_process() if backup else None
+    
+    try:
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            gunicorn = None
+        
+        if gunicorn is not None and os.name != 'nt':
+            print(f"🚀 gunicorn: {bind}, воркеров {workers}, потоков {threads}")
+            run_gunicorn(bind, workers, threads, timeout, max_requests, preload)
+            return 0
+        
+        try:
+            import waitress  # noqa: F401
+        except ImportError:
+            print("❌ Нет промышленного сервера: pip install gunicorn (Linux/macOS) или waitress (Windows)")
+            return 1
+        
+        print(f"🚀 waitress: {bind}, потоков {threads} (без воркеров-процессов)")
+        run_waitress(bind, threads)
+        return 0
+    finally:
+        if backup_process is not None:
+            backup_process.terminate()
+            backup_process.wait(timeout=10)
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    
+    parser = argparse.ArgumentParser(description='Промышленный запуск API системы медкарт')
+    parser.add_argument('--bind', default=f"{config.API_HOST}:{config.API_PORT}",
+                        help='Адрес и порт (host:port)')
+    parser.add_argument('--workers', type=int, default=config.API_WORKERS or DEFAULT_WORKERS,
+                        help='Число процессов-воркеров')
+    parser.add_argument('--threads', type=int, default=config.API_THREADS,
+                        help='Потоков в каждом воркере')
+    parser.add_argument('--timeout', type=int, default=60,
+                        help='Перезапуск зависшего воркера через N секунд')
+    parser.add_argument('--max-requests', type=int, default=0,
+                        help='Перезапуск воркера после N запросов (0 - никогда)')
+    parser.add_argument('--no-preload', action='store_true',
+                        help='Загружать приложение в каждом воркере (HUP перечитывает код)')
+    parser.add_argument('--no-backup', action='store_true',
+                        help='Не запускать планировщик backup')
+    args = parser.parse_args(argv)
+    
+    return serve(args.bind, args.workers, args.threads, args.timeout, args.max_requests,
+                 preload=not args.no_preload, backup=not args.no_backup)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Метрики производительности запросов API
+
+HDR-подобные гистограммы задержек (логарифмически-линейные корзины с
+относительной погрешностью ~3%), счетчики БД и TDE на каждый запрос
+и экспорт в текстовом формате Prometheus.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, List
+
+# 32 подкорзины на каждую степень двойки: погрешность значения не более 1/32
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+LINEAR_LIMIT = SUB_BUCKET_COUNT * 2
+
+# Границы корзин для экспорта в Prometheus (секунды)
+EXPORT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EXPORT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек в микросекундах (в стиле HdrHistogram)
+    Значения до 64 мкс хранятся точно, дальше - 32 корзины на степень двойки
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total_count = 0
+        self.total_sum = 0
+        self.min_value = None
+        self.max_value = 0
+
+    @staticmethod
+    def bucket_index(value: int) -> int:
+        """Индекс корзины для значения"""
+        if value < LINEAR_LIMIT:
+            return value
+        shift = value.bit_length() - (SUB_BUCKET_BITS + 1)
+        return LINEAR_LIMIT + (shift - 1) * SUB_BUCKET_COUNT + (value >> shift) - SUB_BUCKET_COUNT
+
+    @staticmethod
+    def bucket_upper_bound(index: int) -> int:
+        """Наибольшее значение, попадающее в корзину"""
+        if index < LINEAR_LIMIT:
+            return index
+        shift = (index - LINEAR_LIMIT) // SUB_BUCKET_COUNT + 1
+        top = (index - LINEAR_LIMIT) % SUB_BUCKET_COUNT + SUB_BUCKET_COUNT
+        return ((top + 1) << shift) - 1
+
+    def record(self, value_us: int) -> None:
+        """Добавить значение (мкс)"""
+        value_us = max(0, int(value_us))
+        index = self.bucket_index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total_count += 1
+        self.total_sum += value_us
+        self.max_value = max(self.max_value, value_us)
+        self.min_value = value_us if self.min_value is None else min(self.min_value, value_us)
+
+    def percentile(self, quantile: float) -> int:
+        """Значение перцентиля (мкс), quantile от 0 до 1"""
+        if not self.total_count:
+            return 0
+
+        target = max(1, int(round(quantile * self.total_count)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.bucket_upper_bound(index), self.max_value)
+        return self.max_value
+
+    def count_at_or_below(self, value_us: int) -> int:
+        """Количество значений не больше value_us (для кумулятивных корзин)"""
+        return sum(count for index, count in self.counts.items()
+                   if self.bucket_upper_bound(index) <= value_us)
+
+    def to_dict(self) -> dict:
+        """Сводка в миллисекундах для JSON"""
+        return {
+            'count': self.total_count,
+            'mean_ms': round(self.total_sum / self.total_count / 1000, 3) if self.total_count else 0,
+            'min_ms': round((self.min_value or 0) / 1000, 3),
+            'max_ms': round(self.max_value / 1000, 3),
+            **{f'p{int(q * 100)}_ms': round(self.percentile(q) / 1000, 3) for q in EXPORT_QUANTILES}
+        }
+
+
+class RequestStats:
+    """Счетчики одного HTTP-запроса"""
+
+    __slots__ = ('started_at', 'endpoint', 'db_time', 'queries', 'rows', 'decrypts', 'decrypt_time')
+
+    def __init__(self, endpoint: Optional[str] = None):
+        self.started_at = time.perf_counter()
+        self.endpoint = endpoint
+        self.db_time = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.decrypts = 0
+        self.decrypt_time = 0.0
+
+
+# Статистика текущего запроса (None вне запроса)
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar('current_request_stats', default=None)
+
+
+def record_query(elapsed: float) -> None:
+    """Учесть выполненный SQL-запрос в статистике текущего запроса"""
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+
+def record_rows(count: int) -> None:
+    """Учесть полученные строки"""
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.rows += count
+
+
+def record_decrypt(elapsed: float, count: int = 1) -> None:
+    """Учесть расшифровку поля TDE (count - число значений при пакетной расшифровке)"""
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.decrypts += count
+        stats.decrypt_time += elapsed
+
+
+class EndpointMetrics:
+    """Накопленные метрики одного эндпоинта"""
+
+    def __init__(self):
+        self.wall = LatencyHistogram()
+        self.db = LatencyHistogram()
+        self.decrypt = LatencyHistogram()
+        self.queries = 0
+        self.rows = 0
+        self.decrypts = 0
+        self.errors = 0
+
+
+class MetricsRegistry:
+    """Потокобезопасный реестр метрик по эндпоинтам"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+        self.started_at = time.time()
+
+    def record_request(self, endpoint: str, stats: RequestStats, wall_time: float, status_code: int) -> None:
+        """Записать завершенный запрос"""
+        with self._lock:
+            metrics = self.endpoints.get(endpoint)
+            if metrics is None:
+                metrics = self.endpoints[endpoint] = EndpointMetrics()
+
+            metrics.wall.record(wall_time * 1_000_000)
+            metrics.db.record(stats.db_time * 1_000_000)
+            metrics.decrypt.record(stats.decrypt_time * 1_000_000)
+            metrics.queries += stats.queries
+            metrics.rows += stats.rows
+            metrics.decrypts += stats.decrypts
+            if status_code >= 500:
+                metrics.errors += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.endpoints.clear()
+            self.started_at = time.time()
+
+    def to_dict(self) -> dict:
+        """Сводка для JSON-ответа"""
+        with self._lock:
+            return {
+                endpoint: {
+                    'wall': metrics.wall.to_dict(),
+                    'db': metrics.db.to_dict(),
+                    'decrypt': metrics.decrypt.to_dict(),
+                    'queries': metrics.queries,
+                    'rows': metrics.rows,
+                    'decrypts': metrics.decrypts,
+                    'errors': metrics.errors,
+                }
+                for endpoint, metrics in sorted(self.endpoints.items())
+            }
+
+    def render_prometheus(self, prefix: str = 'emr') -> str:
+        """Экспорт в текстовом формате Prometheus"""
+        lines: List[str] = []
+
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+
+            for name, attribute, help_text in (
+                ('request_duration_seconds', 'wall', 'Время обработки запроса'),
+                ('db_duration_seconds', 'db', 'Время выполнения SQL за запрос'),
+                ('decrypt_duration_seconds', 'decrypt', 'Время расшифровки TDE за запрос'),
+            ):
+                metric = f'{prefix}_{name}'
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} histogram')
+                for endpoint, metrics in endpoints:
+                    histogram = getattr(metrics, attribute)
+                    label = _escape_label(endpoint)
+                    for bound in EXPORT_BUCKETS:
+                        count = histogram.count_at_or_below(int(bound * 1_000_000))
+                        lines.append(f'{metric}_bucket{{endpoint="{label}",le="{bound}"}} {count}')
+                    lines.append(f'{metric}_bucket{{endpoint="{label}",le="+Inf"}} {histogram.total_count}')
+                    lines.append(f'{metric}_sum{{endpoint="{label}"}} {histogram.total_sum / 1_000_000:.6f}')
+                    lines.append(f'{metric}_count{{endpoint="{label}"}} {histogram.total_count}')
+
+            metric = f'{prefix}_request_duration_quantile_seconds'
+            lines.append(f'# HELP {metric} Перцентили времени обработки запроса')
+            lines.append(f'# TYPE {metric} gauge')
+            for endpoint, metrics in endpoints:
+                label = _escape_label(endpoint)
+                for quantile in EXPORT_QUANTILES:
+                    value = metrics.wall.percentile(quantile) / 1_000_000
+                    lines.append(f'{metric}{{endpoint="{label}",quantile="{quantile}"}} {value:.6f}')
+
+            for name, attribute, help_text in (
+                ('db_queries_total', 'queries', 'Количество SQL-запросов'),
+                ('db_rows_total', 'rows', 'Количество полученных строк'),
+                ('tde_decrypts_total', 'decrypts', 'Количество расшифрованных полей'),
+                ('request_errors_total', 'errors', 'Ответы с кодом 5xx'),
+            ):
+                metric = f'{prefix}_{name}'
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} counter')
+                for endpoint, metrics in endpoints:
+                    lines.append(f'{metric}{{endpoint="{_escape_label(endpoint)}"}} {getattr(metrics, attribute)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Глобальный реестр метрик приложения
+metrics_registry = MetricsRegistry()
@@ -1,5 +1,141 @@
-from datetime import datetime
+"""
+Форматирование дат, телефонов и пола для русского интерфейса
+
+Функции format_*_column форматируют столбец страницы целиком (например,
+все appointment_date ответа) и дают тот же результат, что одиночные
+функции для каждого значения. Строки дат и времени без часового пояса
+кэшируются (на странице приемов много одинаковых слотов, на странице
+пациентов - повторяющиеся даты рождения), цифры телефона выбираются
+таблицей str.translate, а названия пола и статусов - готовыми словарями.
+"""
+from datetime import date, datetime
+from functools import lru_cache
+from operator import attrgetter
 import locale
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Размер кэша строк дат/времени (значений, не страниц)
+DATE_CACHE_SIZE = 8192
+
+NOT_SPECIFIED = "не указан"
+NOT_SPECIFIED_DATETIME = "не указано"
+
+GENDER_NAMES = {'M': 'Мужской', 'F': 'Женский'}
+GENDER_NAMES_ANY_CASE = {**GENDER_NAMES, 'm': 'Мужской', 'f': 'Женский'}
+
+# Удаление всех ASCII-символов, кроме цифр (для ASCII isdigit - только 0-9)
+_ASCII_NON_DIGITS = str.maketrans('', '', ''.join(chr(code) for code in range(128) if not chr(code).isdigit()))
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _date_string(value: date) -> str:
+    return value.strftime('%d.%m.%Y')
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _datetime_string(value: datetime) -> str:
+    return value.strftime('%d.%m.%Y %H:%M')
+
+def _cached_datetime(value: datetime) -> str:
+    # Время с поясом не кэшируем: равные моменты в разных поясах пишутся по-разному
+    if value.tzinfo is None:
+        return _datetime_string(value)
+    return value.strftime('%d.%m.%Y %H:%M')
+
+def phone_digits(phone: str) -> str:
+    """Только цифры телефона"""
+    if phone.isascii():
+        return phone.translate(_ASCII_NON_DIGITS)
+    return ''.join(filter(str.isdigit, phone))
+
+def _format_phone_digits(phone: str) -> str:
+    digits = phone_digits(phone)
+    if len(digits) == 11 and digits.startswith('7'):
+        return f"+7 ({digits[1:4]}) {digits[4:7]}-{digits[7:9]}-{digits[9:11]}"
+    elif len(digits) == 11 and digits.startswith('8'):
+        return f"8 ({digits[1:4]}) {digits[4:7]}-{digits[7:9]}-{digits[9:11]}"
+    return phone
+
+# === ОДНО ЗНАЧЕНИЕ ===
+def format_birth_date(birth_date):
+    """Дата рождения в формате ДД.ММ.ГГГГ (date или строка ГГГГ-ММ-ДД)"""
+    if type(birth_date) is date:
+        return _date_string(birth_date)
+    try:
+        if isinstance(birth_date, str):
+            try:
+                if '.' in birth_date:
+                    pass  # Уже в русском формате
+                else:
+                    return datetime.strptime(birth_date, '%Y-%m-%d').date().strftime('%d.%m.%Y')
+            except ValueError:
+                logger.warning(f"Could not parse birth_date: {birth_date}")
+        elif hasattr(birth_date, 'strftime'):
+            return birth_date.strftime('%d.%m.%Y')
+    except Exception as e:
+        logger.error(f"Error formatting birth_date: {e}")
+    return birth_date
+
+def format_phone_number(phone):
+    """Телефон в формате +7 (XXX) XXX-XX-XX, пустой - не указан"""
+    if phone and phone != NOT_SPECIFIED and not phone.startswith("[ОШИБКА"):
+        return _format_phone_digits(phone)
+    return NOT_SPECIFIED
+
+def format_datetime_russian(dt):
+    """Форматирование даты/времени в русском формате"""
+    if not dt:
+        return NOT_SPECIFIED_DATETIME
+    if type(dt) is datetime:
+        return _cached_datetime(dt)
+    
+    try:
+        if isinstance(dt, str):
+            if '.' in dt and ':' in dt:
+                return dt
+            
+            if 'T' in dt:
+                dt = datetime.fromisoformat(dt.replace('Z', '+00:00'))
+            else:
+                dt = datetime.fromisoformat(dt)
+        
+        return dt.strftime('%d.%m.%Y %H:%M')
+    except Exception as e:
+        logger.error(f"Error formatting datetime: {e}")
+        return str(dt) if dt else NOT_SPECIFIED_DATETIME
+
+# === СТОЛБЕЦ СТРАНИЦЫ ===
+def format_birth_date_column(values) -> list:
+    """format_birth_date для всех значений столбца"""
+    return [_date_string(value) if type(value) is date else format_birth_date(value) for value in values]
+
+def format_datetime_column(values) -> list:
+    """format_datetime_russian для всех значений столбца"""
+    return [_cached_datetime(value) if type(value) is datetime else format_datetime_russian(value)
+            for value in values]
+
+def format_phone_column(values) -> list:
+    """format_phone_number для всех значений столбца"""
+    return [format_phone_number(value) for value in values]
+
+def format_gender_column(values) -> list:
+    """Пол M/F на русском для всех значений столбца"""
+    return [GENDER_NAMES.get(value, value or NOT_SPECIFIED) for value in values]
+
+def format_column(rows, column: str, formatter) -> None:
+    """
+    Замена значений столбца в строках страницы на formatter(значения)
+    
+    Строки - словари или объекты (строки RowMapper) одного вида.
+    """
+    if not rows:
+        return
+    if isinstance(rows[0], dict):
+        for row, value in zip(rows, formatter([row[column] for row in rows])):
+            row[column] = value
+    else:
+        for row, value in zip(rows, formatter(list(map(attrgetter(column), rows)))):
+            setattr(row, column, value)
 
 class RussianDateFormatter:
     """Форматирование дат для русского интерфейса"""
@@ -45,26 +181,17 @@ class RussianDateFormatter:
         
         if isinstance(datetime_obj, datetime):
             # Русский формат: дд.мм.гггг чч:мм
-            return datetime_obj.strftime('%d.%m.%Y %H:%M')
+            return _cached_datetime(datetime_obj)
         
         return str(datetime_obj)
 
 def format_phone_russian(phone):
     """Форматирование телефона в русском стиле"""
     if not phone:
-        return "не указан"
+        return NOT_SPECIFIED
     
-    # Убираем все кроме цифр
-    digits = ''.join(filter(str.isdigit, phone))
-    
-    if len(digits) == 11 and digits.startswith('7'):
-        # +7 (999) 123-45-67
-        return f"+7 ({digits[1:4]}) {digits[4:7]}-{digits[7:9]}-{digits[9:11]}"
-    elif len(digits) == 11 and digits.startswith('8'):
-        # 8 (999) 123-45-67
-        return f"8 ({digits[1:4]}) {digits[4:7]}-{digits[7:9]}-{digits[9:11]}"
-    else:
-        return phone
+    # +7 (999) 123-45-67 или 8 (999) 123-45-67
+    return _format_phone_digits(phone)
 
 def format_email_russian(email):
     """Форматирование email"""
@@ -72,10 +199,4 @@ def format_email_russian(email):
 
 def format_gender_russian(gender):
     """Форматирование пола на русском"""
-    gender_map = {
-        'M': 'Мужской',
-        'F': 'Женский',
-        'm': 'Мужской', 
-        'f': 'Женский'
-    }
-    return gender_map.get(gender, gender or 'не указан')
\ No newline at end of file
+    return GENDER_NAMES_ANY_CASE.get(gender, gender or NOT_SPECIFIED)
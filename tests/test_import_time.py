@@ -0,0 +1,54 @@
+"""
+Бюджет времени импорта src.database.connection
+
+Импорт не должен подключаться к БД, загружать модуль TDE (вывод ключей
+PBKDF2), загружать .env и менять окружение процесса - это выполняется при
+первом использовании db. Замер - python -X importtime в новом процессе.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_startup import import_time_ms, PROJECT_ROOT
+
+# Импорт с psycopg2 и dotenv занимает ~0.1 с, вывод ключей TDE - еще ~0.3 с
+CONNECTION_IMPORT_BUDGET_MS = float(os.getenv('CONNECTION_IMPORT_BUDGET_MS', 200))
+
+SIDE_EFFECTS_CHECK = """
+import os, sys
+before = dict(os.environ)
+import src.database.connection
+unchanged = dict(os.environ) == before
+from src.config import load_env
+load_env()
+print('src.security.tde' in sys.modules, 'cryptography' in sys.modules, unchanged,
+      os.environ.get('IMPORT_CHECK_DOTENV') == 'loaded')
+"""
+
+
+def test_connection_import_budget():
+    """Импорт src.database.connection укладывается в бюджет"""
+    elapsed = import_time_ms('src.database.connection')
+    print(f"Импорт src.database.connection: {elapsed:.1f} мс (бюджет {CONNECTION_IMPORT_BUDGET_MS:.0f} мс)")
+    assert elapsed < CONNECTION_IMPORT_BUDGET_MS
+
+
+def test_connection_import_has_no_side_effects(tmp_path):
+    """Импорт не загружает TDE и не меняет os.environ, даже если рядом есть .env"""
+    # python -c ищет .env в текущем каталоге - как при запуске из каталога проекта
+    (tmp_path / '.env').write_text('IMPORT_CHECK_DOTENV=loaded\n', encoding='utf-8')
+    env = dict(os.environ, TDE_ENABLED='True', PYTHONPATH=str(PROJECT_ROOT))
+    env.pop('IMPORT_CHECK_DOTENV', None)
+    completed = subprocess.run([sys.executable, '-c', SIDE_EFFECTS_CHECK], cwd=str(tmp_path),
+                               env=env, capture_output=True, text=True, encoding='utf-8')
+    assert completed.returncode == 0, completed.stderr
+    
+    tde_loaded, cryptography_loaded, environ_unchanged, dotenv_loaded = completed.stdout.split()
+    assert tde_loaded == 'False'
+    assert cryptography_loaded == 'False'
+    assert environ_unchanged == 'True'
+    # .env загружается явным load_env()
+    assert dotenv_loaded == 'True'
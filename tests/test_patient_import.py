@@ -0,0 +1,30 @@
+"""
+Импорт пациентов: очистка строк и пакетное шифрование TDE
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database.bulk import encrypt_rows
+from src.database.patient_import import clean_patient, ENCRYPTED_FIELDS
+from src.security.tde import TDEManager
+
+
+def test_tde_batch_with_missing_optional_fields(tmp_path, monkeypatch):
+    """Строки без телефона, email и адреса шифруются в NULL, а не роняют пакет"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('TDE_MASTER_KEY_FILE', str(tmp_path / '.tde_master_key'))
+    tde = TDEManager()
+    
+    bare, errors = clean_patient({'first_name': 'A', 'last_name': 'B', 'birth_date': '1990-01-01', 'gender': 'M'})
+    full, _ = clean_patient({'first_name': 'C', 'last_name': 'D', 'birth_date': '1985-05-05', 'gender': 'F',
+                             'phone': '+7 (900) 123-45-67', 'email': 'c@example.com'})
+    assert errors == []
+    
+    encrypt_rows(tde, 'patients', [bare, full], ENCRYPTED_FIELDS)
+    
+    assert not any(field in bare or field in full for field in ENCRYPTED_FIELDS)
+    assert bare['phone_encrypted'] is None and bare['email_iv'] is None and bare['address_encrypted'] is None
+    assert full['address_encrypted'] is None
+    assert tde.decrypt_field('patients', 'email', full['email_encrypted'], full['email_iv']) == 'c@example.com'
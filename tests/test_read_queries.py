@@ -0,0 +1,42 @@
+"""
+Разреженные наборы полей (fields=) в запросах пациентов
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database import read_queries
+from src.database.prepared_statements import statements
+
+
+def test_fields_limit_select_and_ciphertext():
+    """Выбираются только запрошенные столбцы и шифротекст только запрошенных полей"""
+    fields = read_queries.patient_fields('last_name, phone')
+    sql = read_queries.patients_page_statement(True, fields).sql
+    
+    assert fields == ('id', 'last_name', 'phone')
+    assert 'SELECT id, last_name, phone, phone_encrypted, phone_iv\n' in sql
+    assert 'email' not in sql and 'address' not in sql
+    assert 'JOIN' not in read_queries.patient_statement(True, read_queries.patient_fields('last_name', True)).sql
+    assert read_queries.patients_page_statement(False, None) is read_queries.PATIENTS_PAGE
+    with pytest.raises(ValueError):
+        read_queries.patient_fields('last_appointment')
+
+
+def test_field_order_shares_statement_and_cache_is_capped(monkeypatch):
+    """Порядок полей не создает новых запросов; сверх лимита - обычный SQL без реестра"""
+    first = read_queries.patient_fields('phone,last_name,first_name')
+    second = read_queries.patient_fields('first_name, phone, last_name, phone')
+    
+    assert first == second == ('id', 'first_name', 'last_name', 'phone')
+    assert read_queries.patients_page_statement(True, first) is read_queries.patients_page_statement(True, second)
+    
+    declared = len(statements.statements)
+    monkeypatch.setattr(read_queries, 'MAX_FIELD_STATEMENTS', len(read_queries._field_statements))
+    extra = read_queries.patients_page_statement(True, read_queries.patient_fields('email,address'))
+    
+    assert extra.name not in statements.statements and len(statements.statements) == declared
+    assert statements._next_step(object(), extra) == 'plain'
@@ -0,0 +1,44 @@
+"""
+Репозитории и пакетная загрузка без БД: проекция и один запрос на пакет ключей
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database import repositories
+from src.database.repositories import BatchLoader
+
+
+def test_projection_keeps_key_and_rejects_unknown_fields():
+    """Ключ выбирается всегда, поля не из модели отклоняются"""
+    statement = repositories.prescriptions.statement('medical_record_id', fields=['medication_name'])
+    
+    assert statement.sql.startswith("SELECT medical_record_id, medication_name FROM prescriptions")
+    assert "WHERE medical_record_id = ANY(%s)" in statement.sql
+    assert 'prescriptions' not in repositories.medical_records.columns
+    with pytest.raises(ValueError):
+        repositories.patients.projection(['password'])
+
+
+def test_loader_fetches_all_loaded_keys_once():
+    """Все ключи, переданные в load(), выбираются одним запросом"""
+    class Row:
+        def __init__(self, record_id):
+            self.medical_record_id = record_id
+    
+    calls = []
+    
+    def fetch(keys):
+        calls.append(keys)
+        return [Row(key) for key in keys if key != 3] + [Row(1)]
+    
+    loader = BatchLoader(fetch, 'medical_record_id', many=True)
+    loader.load_many([1, 2, 3, 2])
+    
+    assert [len(loader.get(key)) for key in (1, 2, 3)] == [2, 1, 0]
+    assert calls == [[1, 2, 3]]
+    with pytest.raises(LookupError):
+        loader.get(4)
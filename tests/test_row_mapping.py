@@ -0,0 +1,47 @@
+"""
+Строки RowMapper дают тот же JSON, что словари RealDictCursor
+
+Сравнение без БД: синтетическая страница пациентов (при TDE_ENABLED - с
+шифротекстами) форматируется format_patient_data и format_patient_row.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_formatting import make_patient_rows
+from benchmarks.bench_rows import FakeCursor
+
+
+def _patient_pages(count=50):
+    from src.api import russian_routes
+    
+    dict_rows = make_patient_rows(count, russian_routes.tde_manager)
+    dict_rows[0]['birth_date'] = None
+    dict_rows[1]['gender'] = None
+    columns = list(dict_rows[0])
+    cursor = FakeCursor(columns, [tuple(row[name] for name in columns) for row in dict_rows])
+    
+    expected = [russian_routes.format_patient_data(row) for row in dict_rows]
+    mapped = russian_routes.patient_rows.fetchall(cursor, russian_routes.tde_manager)
+    return expected, [russian_routes.format_patient_row(row) for row in mapped]
+
+
+def test_patient_rows_encode_like_dicts():
+    """orjson и stdlib кодируют строки RowMapper в те же байты"""
+    from src.api.json_provider import encode_json, orjson
+    
+    expected, rows = _patient_pages()
+    backends = ['stdlib'] + (['orjson'] if orjson is not None else [])
+    for backend in backends:
+        assert encode_json({'patients': rows}, backend) == encode_json({'patients': expected}, backend)
+
+
+def test_row_class_has_slots_and_model_methods():
+    """Класс строки без __dict__, с методами модели и без столбцов шифротекста"""
+    _, rows = _patient_pages(2)
+    row = rows[0]
+    
+    assert not hasattr(row, '__dict__')
+    assert row.full_name().startswith(row.last_name)
+    assert not any(name.endswith(('_encrypted', '_iv')) for name in row.__dataclass_fields__)
@@ -0,0 +1,29 @@
+"""
+Форматирование столбцами дает тот же результат, что по одному значению
+"""
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils import russian_helpers as helpers
+
+
+def test_columns_match_single_values():
+    """Кэш и таблицы не меняют результат, в том числе для времени с поясом"""
+    moment = datetime(2025, 3, 3, 9, 30)
+    # Один и тот же момент в разных поясах
+    datetimes = [moment, moment, moment.replace(tzinfo=timezone(timedelta(hours=3))),
+                 (moment - timedelta(hours=3)).replace(tzinfo=timezone.utc), '2025-03-03T09:30:00Z',
+                 '03.03.2025 09:30', None, '', 'не дата']
+    dates = [date(1985, 3, 15), date(1985, 3, 15), '1985-03-15', '15.03.1985', None, moment]
+    phones = ['+7 (999) 123-45-67', '89991234567', '７9991234567', '12345', None, '', 'не указан', '[ОШИБКА]']
+    genders = ['M', 'F', 'X', None, '']
+    
+    assert helpers.format_datetime_column(datetimes) == [helpers.format_datetime_russian(value) for value in datetimes]
+    assert helpers.format_datetime_column(datetimes)[2:4] == ['03.03.2025 09:30', '03.03.2025 06:30']
+    assert helpers.format_birth_date_column(dates) == [helpers.format_birth_date(value) for value in dates]
+    assert helpers.format_phone_column(phones)[:2] == ['+7 (999) 123-45-67', '8 (999) 123-45-67']
+    assert helpers.format_phone_column(phones) == [helpers.format_phone_number(value) for value in phones]
+    assert helpers.format_gender_column(genders) == ['Мужской', 'Женский', 'X', 'не указан', 'не указан']
@@ -0,0 +1,26 @@
+"""
+Планы медленных запросов без значений параметров
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database.slow_query_log import redact_plan
+
+
+def test_plan_conditions_hide_values():
+    """Литералы и числа условий скрыты, стоимость и время узлов остаются"""
+    plan = "\n".join([
+        "Index Scan using idx_patients_name on patients  (cost=0.29..8.31 rows=1 width=12) (actual time=0.02..0.03 rows=1 loops=1)",
+        "  Index Cond: ((last_name)::text = 'Иванов'::text)",
+        "  Filter: ((phone)::text ~~ '%79161234567%'::text AND (id > 42))",
+        "  Rows Removed by Filter: 3",
+        "  Buffers: shared hit=4",
+    ])
+    redacted = redact_plan(plan)
+    
+    assert 'Иванов' not in redacted and '79161234567' not in redacted and '42' not in redacted
+    assert "Index Cond: ((last_name)::text = '?'::text)" in redacted
+    assert 'cost=0.29..8.31 rows=1 width=12' in redacted
+    assert 'Rows Removed by Filter: 3' in redacted and 'shared hit=4' in redacted